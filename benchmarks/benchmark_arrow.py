@@ -0,0 +1,79 @@
+"""
+Benchmark of converting TSDF streams to Arrow, compared with going through pandas.
+
+Usage: python benchmarks/benchmark_arrow.py [n_rows]
+"""
+
+import sys
+import tempfile
+import time
+import numpy as np
+import pyarrow as pa
+import tsdf
+from tsdf import arrow_utils
+from tsdf.constants import ConcatenationType
+
+
+def _create_streams(dir_path: str, n_rows: int):
+    meta = {
+        "study_id": "benchmark",
+        "subject_id": "benchmark",
+        "device_id": "benchmark",
+        "metadata_version": "0.1",
+        "start_iso8601": "2024-01-01T00:00:00.000+00:00",
+        "end_iso8601": "2024-01-01T01:00:00.000+00:00",
+    }
+    rs = np.random.RandomState(seed=42)
+    time_meta = tsdf.write_binary_file(
+        dir_path,
+        "time.bin",
+        np.cumsum(rs.rand(n_rows)),
+        dict(meta, channels=["time"], units=["s"]),
+    )
+    samples_meta = tsdf.write_binary_file(
+        dir_path,
+        "samples.bin",
+        rs.randint(-2000, 2000, (n_rows, 6)).astype(np.int16),
+        dict(meta, channels=[f"c{i}" for i in range(6)], units=["g"] * 6),
+    )
+    return [time_meta, samples_meta]
+
+
+def _measure(name: str, func, repeat: int = 5) -> None:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    print(f"{name:<40} {min(durations) * 1000:10.1f} ms")
+
+
+def main(n_rows: int) -> None:
+    with tempfile.TemporaryDirectory() as dir_path:
+        metas = _create_streams(dir_path, n_rows)
+        arrow_path = f"{dir_path}/streams.arrow"
+        print(f"Round trip of {n_rows} rows (time + 6 int16 channels)")
+
+        def through_pandas():
+            df = tsdf.load_dataframe_from_binaries(metas, ConcatenationType.columns)
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            with pa.ipc.new_file(arrow_path, table.schema) as writer:
+                writer.write_table(table)
+            pa.ipc.open_file(arrow_path).read_all().to_pandas()
+
+        def through_arrow_utils():
+            arrow_utils.write_arrow_file(metas, arrow_path)
+            arrow_utils.arrow_file_to_binary(
+                arrow_path,
+                dir_path,
+                "samples_copy.bin",
+                metas[1].get_plain_tsdf_dict_copy(),
+                channels=metas[1].channels,
+            )
+
+        _measure("load_dataframe_from_binaries + pandas", through_pandas)
+        _measure("arrow_utils", through_arrow_utils)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,72 @@
+"""
+Benchmark of catalog queries over many streams.
+
+Usage: python benchmarks/benchmark_catalog.py [n_streams]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from tsdf import time_utils
+from tsdf.catalog import Catalog, CatalogEntry
+
+def _create_entries(n_streams: int):
+    rs = np.random.RandomState(seed=42)
+    origin = time_utils.iso8601_to_ns("2024-01-01T00:00:00+00:00")
+    starts = origin + rs.randint(0, 365 * 24, n_streams).astype(np.int64) * 3600 * 10**9
+    durations = rs.randint(1, 7 * 24, n_streams).astype(np.int64) * 3600 * 10**9
+    return [
+        CatalogEntry(
+            metadata_path=f"subject_{i % 500}/session_{i}_meta.json",
+            file_name=f"session_{i}_{i % 4}.bin",
+            study_id=f"study_{i % 3}",
+            subject_id=f"subject_{i % 500}",
+            device_id=f"device_{i % 4}",
+            channels=["time"] if i % 4 == 0 else ["acc_x", "acc_y", "acc_z"],
+            start_iso8601=time_utils.ns_to_iso8601(start),
+            end_iso8601=time_utils.ns_to_iso8601(start + duration),
+            start_ns=int(start),
+            end_ns=int(start + duration),
+        )
+        for i, (start, duration) in enumerate(zip(starts, durations))
+    ]
+
+
+def _measure(name: str, func, repeat: int = 200) -> None:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        durations.append(time.perf_counter() - start)
+    print(f"{name:<45} {np.median(durations) * 1e6:10.1f} µs ({len(result)} results)")
+
+
+def main(n_streams: int) -> None:
+    start = time.perf_counter()
+    catalog = Catalog(_create_entries(n_streams))
+    print(f"Built a catalog of {n_streams} streams in {time.perf_counter() - start:.2f} s")
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        path = os.path.join(dir_path, "catalog.json")
+        catalog.save(path)
+        start = time.perf_counter()
+        catalog = Catalog.load(path)
+        print(f"Loaded the saved catalog in {time.perf_counter() - start:.2f} s")
+
+    week = ("2024-03-01T00:00:00+00:00", "2024-03-07T00:00:00+00:00")
+    _measure(
+        "subject + device + week",
+        lambda: catalog.query(
+            subject_id="subject_42", device_id="device_2", start=week[0], end=week[1]
+        ),
+    )
+    _measure(
+        "channel + week",
+        lambda: catalog.query(channels=["acc_x"], start=week[0], end=week[1]),
+    )
+    _measure("subject", lambda: catalog.query(subject_id="subject_42"))
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,59 @@
+"""
+Benchmark of writing binary files atomically with large buffered writes, compared with `ndarray.tofile`.
+
+Usage: python benchmarks/benchmark_write.py [n_rows]
+"""
+
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+from tsdf import write_binary
+from tsdf.constants import WRITE_BUFFER_SIZE
+
+META = {
+    "study_id": "benchmark",
+    "subject_id": "benchmark",
+    "device_id": "benchmark",
+    "metadata_version": "0.1",
+    "start_iso8601": "2024-01-01T00:00:00.000+00:00",
+    "end_iso8601": "2024-01-01T01:00:00.000+00:00",
+    "channels": [f"c{i}" for i in range(6)],
+    "units": ["g"] * 6,
+}
+
+
+def _measure(name: str, func, n_bytes: int, repeat: int = 5) -> None:
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    best = min(durations)
+    print(f"{name:<45} {best * 1000:10.1f} ms {n_bytes / best / 2**20:10.1f} MiB/s")
+
+
+def main(n_rows: int) -> None:
+    rs = np.random.RandomState(seed=42)
+    data = rs.rand(n_rows, 6)
+    # Column-major data, as returned by `DataFrame.to_numpy()`
+    data_fortran = np.asfortranarray(data)
+    print(f"Writing {n_rows} rows × 6 float64 channels ({data.nbytes / 2**20:.0f} MiB)")
+
+    with tempfile.TemporaryDirectory() as dir_path:
+        path = os.path.join(dir_path, "samples.bin")
+        for label, array in [("C order", data), ("Fortran order", data_fortran)]:
+            _measure(f"tofile ({label})", lambda: array.tofile(path), data.nbytes)
+            for buffer_size in [2**16, WRITE_BUFFER_SIZE]:
+                _measure(
+                    f"write_binary_file ({label}, {buffer_size // 1024} KiB)",
+                    lambda: write_binary.write_binary_file(
+                        dir_path, "samples.bin", array, dict(META), buffer_size
+                    ),
+                    data.nbytes,
+                )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5_000_000)
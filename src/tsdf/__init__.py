@@ -1,8 +1,3 @@
-# read version from installed package
-from importlib.metadata import version
-
-__version__ = version("tsdf")
-
 from .read_tsdf import (
     load_metadata_file,
     load_metadata_from_path,
@@ -12,18 +7,32 @@ from .read_tsdf import (
 )
 from .write_tsdf import (
     write_metadata,
+    add_stream_to_metadata,
+    replace_stream_in_metadata,
+    remove_stream_from_metadata,
 )
 
 from .write_binary import (
     write_binary_file,
     write_dataframe_to_binaries,
+    write_chunks_to_binaries,
+    write_time_binary_file,
 )
 from .read_binary import (
     load_ndarray_from_binary,
     load_dataframe_from_binaries,
+    load_ndarray_chunks,
+    load_memmap_from_binary,
+    load_row_ranges,
 )
+from .channel_statistics import compute_channel_statistics
 
 from .tsdfmetadata import TSDFMetadata
+from .virtual_array import ConcatenatedArray
+from .windowing import iterate_windows
+from .resampling import resample, resample_to_binaries
+from .alignment import align_streams
+from .segments import add_segments, load_ndarray_from_time_range
 
 __all__ = [
     "load_metadata_file",
@@ -32,10 +41,37 @@ __all__ = [
     "load_metadata_string",
     "load_metadata_legacy_file",
     "write_metadata",
+    "add_stream_to_metadata",
+    "replace_stream_in_metadata",
+    "remove_stream_from_metadata",
     "write_binary_file",
     "write_dataframe_to_binaries",
+    "write_chunks_to_binaries",
+    "write_time_binary_file",
     "load_ndarray_from_binary",
     "load_dataframe_from_binaries",
+    "load_ndarray_chunks",
+    "load_memmap_from_binary",
+    "load_row_ranges",
+    "iterate_windows",
+    "resample",
+    "resample_to_binaries",
+    "align_streams",
+    "add_segments",
+    "load_ndarray_from_time_range",
+    "compute_channel_statistics",
     "TSDFMetadata",
+    "ConcatenatedArray",
     "constants",
 ]
+
+
+def __getattr__(name: str):
+    # Read the version from the installed package only when it is requested,
+    # as importing importlib.metadata slows down `import tsdf`
+    if name == "__version__":
+        from importlib.metadata import version
+
+        return version("tsdf")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
@@ -0,0 +1,177 @@
+"""
+Module for aligning multiple streams of a recording on a common time base.
+
+The time channels of the streams are merged chunk by chunk: at any moment, each stream only
+holds the chunk that is currently being merged (plus the sample preceding it), so memory use
+is bounded by the chunk size and not by the length of the recording.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from typing import Iterator, List, Optional, Tuple
+import numpy as np
+from tsdf import read_binary
+from tsdf import resampling
+from tsdf import time_utils
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+Stream = Tuple[TSDFMetadata, TSDFMetadata]
+""" A stream is described by the metadata of its time channel and the metadata of its values (which may be the same object). """
+
+
+class _StreamCursor:
+    """Buffer holding the currently merged part of a stream, with time stamps in seconds since the common origin."""
+
+    def __init__(
+        self, stream: Stream, chunk_rows: int, time_channel: str, origin_ns: int
+    ) -> None:
+        time_metadata, values_metadata = stream
+        if time_metadata.rows != values_metadata.rows:
+            raise TSDFMetadataFieldValueError(
+                f"Binary files {time_metadata.file_name} and {values_metadata.file_name} have a different number of rows."
+            )
+        if isinstance(values_metadata.data_type, list):
+            raise TSDFMetadataFieldValueError(
+                f"Alignment requires channels of a single data type, but {values_metadata.file_name} mixes data types."
+            )
+        seconds = time_utils.get_seconds_per_time_unit(time_metadata, time_channel)
+        # The time channel is relative to the start of its own stream
+        shift = (time_utils.iso8601_to_ns(time_metadata.start_iso8601) - origin_ns) / 1e9
+        self.chunks = (
+            (times * seconds + shift, values.reshape((values.shape[0], -1)))
+            for times, values in zip(
+                time_utils.iterate_time_chunks(time_metadata, chunk_rows, time_channel),
+                read_binary.load_ndarray_chunks(values_metadata, chunk_rows),
+            )
+        )
+        self.times = np.empty(0)
+        self.values = np.empty((0, len(values_metadata.channels)))
+        self.exhausted = False
+        self.load_next_chunk()
+
+    def load_next_chunk(self) -> None:
+        """Append the next chunk of the stream to the buffer, or mark the stream as exhausted."""
+        try:
+            times, values = next(self.chunks)
+        except StopIteration:
+            self.exhausted = True
+            return
+        self.times = np.concatenate([self.times, times])
+        self.values = np.concatenate([self.values, values]) if self.values.shape[0] else values
+
+    def discard_before(self, time: float) -> None:
+        """Drop buffered samples that are not needed for time stamps after the given time."""
+        first = max(int(np.searchsorted(self.times, time, side="right")) - 1, 0)
+        self.times = self.times[first:]
+        self.values = self.values[first:]
+
+
+def get_aligned_channels(streams: List[Stream]) -> List[str]:
+    """
+    Compute the names of the columns of the aligned values.
+
+    :param streams: list of (time metadata, values metadata) tuples.
+
+    :return: list of channel names, in order of the streams.
+    """
+    return [channel for _, values_metadata in streams for channel in values_metadata.channels]
+
+
+def iterate_aligned_chunks(
+    streams: List[Stream],
+    method: str = "linear",
+    rate: Optional[float] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Align several streams (e.g., originating from one `load_metadata_from_path` result) on a common time base, chunk by chunk.
+    The common time base is either the union of all time stamps of the streams (k-way merge), or,
+    if `rate` is provided, a regular grid with the given rate. It is restricted to the period covered by all the streams.
+    The time channels of the streams have to be sorted and may use different units. Each time channel is relative to the
+    `start_iso8601` of its stream, so streams starting at different times are shifted onto the earliest start.
+
+    :param streams: list of (time metadata, values metadata) tuples.
+    :param method: (optional) method used to compute the value of a stream at a common time stamp; one of `resampling.RESAMPLING_METHODS`.
+    :param rate: (optional) rate of the common time base in Hz.
+    :param chunk_rows: (optional) number of rows read at once from each stream.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: iterator over tuples of common time stamps (in seconds since the earliest start of the streams) and the aligned values,
+             with the columns given by `get_aligned_channels`.
+
+    :raises TSDFMetadataFieldValueError: if a time and values file have a different number of rows, or a values file mixes data types.
+    """
+    if method not in resampling.RESAMPLING_METHODS:
+        raise ValueError(
+            f"Alignment method '{method}' is not supported. Supported methods are: {resampling.RESAMPLING_METHODS}."
+        )
+    if len(streams) == 0:
+        raise TSDFMetadataFieldValueError("At least one stream is needed for the alignment.")
+    if rate is not None and rate <= 0:
+        raise ValueError("The sampling rate has to be positive.")
+
+    origin_ns = min(time_utils.iso8601_to_ns(time_metadata.start_iso8601) for time_metadata, _ in streams)
+    cursors = [_StreamCursor(stream, chunk_rows, time_channel, origin_ns) for stream in streams]
+    if any(cursor.times.shape[0] == 0 for cursor in cursors):
+        return
+    start_time = max(cursor.times[0] for cursor in cursors)
+    emitted_until = -np.inf
+    next_index = 0
+
+    while True:
+        horizon = min(cursor.times[-1] for cursor in cursors)
+        final = any(
+            cursor.exhausted and cursor.times[-1] == horizon for cursor in cursors
+        )
+
+        # Common time stamps that all the streams can provide values for
+        if rate is None:
+            candidates = np.unique(np.concatenate([cursor.times for cursor in cursors]))
+            candidates = candidates[(candidates >= start_time) & (candidates > emitted_until)]
+        else:
+            last_index = int(np.floor((horizon - start_time) * rate))
+            candidates = start_time + np.arange(next_index, last_index + 1) / rate
+        candidates = candidates[candidates <= horizon] if final else candidates[candidates < horizon]
+
+        if candidates.shape[0] > 0:
+            columns = [
+                resampling.interpolate(cursor.times, cursor.values, candidates, method)
+                for cursor in cursors
+            ]
+            yield candidates, np.hstack(columns)
+            emitted_until = candidates[-1]
+            next_index += candidates.shape[0]
+
+        if final:
+            return
+        for cursor in cursors:
+            cursor.discard_before(emitted_until)
+            if not cursor.exhausted and cursor.times[-1] == horizon:
+                cursor.load_next_chunk()
+
+
+def align_streams(
+    streams: List[Stream],
+    method: str = "linear",
+    rate: Optional[float] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Align several streams on a common time base and return the result as numpy arrays.
+    See `iterate_aligned_chunks` for the description of the parameters.
+
+    :return: tuple of the common time stamps (in seconds since the earliest start of the streams) and the aligned values, with the columns given by `get_aligned_channels`.
+    """
+    time_chunks = []
+    value_chunks = []
+    for times, values in iterate_aligned_chunks(
+        streams, method, rate, chunk_rows, time_channel
+    ):
+        time_chunks.append(times)
+        value_chunks.append(values)
+    if len(time_chunks) == 0:
+        return np.empty(0), np.empty((0, len(get_aligned_channels(streams))))
+    return np.concatenate(time_chunks), np.concatenate(value_chunks)
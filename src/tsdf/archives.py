@@ -0,0 +1,305 @@
+"""
+Module for reading TSDF files stored in ZIP or TAR archives, without extracting them.
+
+A file within an archive is addressed by appending the name of the member to the path of the archive,
+e.g., `recordings.zip/session_1/meta.json`. Members that are stored without compression (ZIP members
+stored with ZIP_STORED, and all members of uncompressed TAR archives) are read directly from the
+archive file at the offset of their data, and can therefore be memory-mapped. Compressed members are
+decompressed in a streaming way: reading a range of rows only decompresses the member up to the end of that range.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import fnmatch
+import io
+import os
+from functools import lru_cache
+from typing import IO, List, NamedTuple, Optional, Tuple
+
+# tarfile and zipfile are imported by the functions using them, as regular files never need them
+
+_ZIP_LOCAL_HEADER_SIZE = 30
+""" Size of the fixed part of the local file header of a ZIP member. """
+
+
+class ArchiveMember(NamedTuple):
+    """Location of a file within an archive."""
+
+    archive_path: str
+    """Path to the archive file."""
+    name: str
+    """Name of the member within the archive."""
+    size: int
+    """Uncompressed size (in bytes) of the member."""
+    data_offset: Optional[int]
+    """Offset of the data within the archive file, or None if the member is compressed."""
+
+
+def split_archive_path(path: str) -> Optional[Tuple[str, str]]:
+    """
+    Split a path pointing into an archive into the path of the archive and the name of the member.
+
+    :param path: path, e.g., `recordings.zip/session_1/meta.json`.
+
+    :return: tuple of the archive path and the member name, or None if the path does not point into an archive.
+    """
+    path = os.fspath(path)
+    prefix, parts = path, []
+    while prefix and not os.path.exists(prefix):
+        head, tail = os.path.split(prefix)
+        if head == prefix:
+            return None
+        prefix = head
+        if tail:
+            parts.insert(0, tail)
+    if not parts or not os.path.isfile(prefix):
+        return None
+
+    import tarfile
+    import zipfile
+
+    if not (zipfile.is_zipfile(prefix) or tarfile.is_tarfile(prefix)):
+        return None
+    return prefix, "/".join(parts)
+
+
+def get_member(path: str) -> Optional[ArchiveMember]:
+    """
+    Locate a file within an archive.
+
+    :param path: path pointing into an archive.
+
+    :return: location of the member, or None if the path does not point into an archive.
+
+    :raises FileNotFoundError: if the archive does not contain the member.
+    """
+    split = split_archive_path(path)
+    if split is None:
+        return None
+    archive_path, name = split
+    stat = os.stat(archive_path)
+    return _get_member(archive_path, name, stat.st_size, stat.st_mtime_ns)
+
+
+@lru_cache(maxsize=256)
+def _get_member(
+    archive_path: str, name: str, archive_size: int, archive_mtime_ns: int
+) -> ArchiveMember:
+    """
+    Locate a member of an archive. The result is cached for the given version (size and modification time) of the archive.
+
+    :param archive_path: path to the archive file.
+    :param name: name of the member.
+    :param archive_size: size of the archive file, used to invalidate the cache.
+    :param archive_mtime_ns: modification time of the archive file, used to invalidate the cache.
+
+    :return: location of the member.
+
+    :raises FileNotFoundError: if the archive does not contain the member.
+    """
+    import tarfile
+    import zipfile
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            try:
+                info = archive.getinfo(name)
+            except KeyError:
+                raise FileNotFoundError(f"{archive_path} does not contain {name}.")
+            if info.compress_type != zipfile.ZIP_STORED:
+                return ArchiveMember(archive_path, name, info.file_size, None)
+        # The data follows the local header, whose variable-length fields may differ from the central directory
+        with open(archive_path, "rb") as file:
+            file.seek(info.header_offset)
+            header = file.read(_ZIP_LOCAL_HEADER_SIZE)
+        name_length = int.from_bytes(header[26:28], "little")
+        extra_length = int.from_bytes(header[28:30], "little")
+        data_offset = (
+            info.header_offset + _ZIP_LOCAL_HEADER_SIZE + name_length + extra_length
+        )
+        return ArchiveMember(archive_path, name, info.file_size, data_offset)
+
+    try:
+        # Only uncompressed TAR archives can be opened in mode "r:"
+        archive = tarfile.open(archive_path, "r:")
+        compressed = False
+    except tarfile.ReadError:
+        archive = tarfile.open(archive_path, "r:*")
+        compressed = True
+    with archive:
+        try:
+            info = archive.getmember(name)
+        except KeyError:
+            raise FileNotFoundError(f"{archive_path} does not contain {name}.")
+    data_offset = None if compressed else info.offset_data
+    return ArchiveMember(archive_path, name, info.size, data_offset)
+
+
+def open_binary(path: str) -> IO[bytes]:
+    """
+    Open a file for reading in binary mode, either a regular file or a member of an archive.
+
+    :param path: path to the file.
+
+    :return: seekable file object.
+    """
+    try:
+        return open(path, "rb")
+    except (FileNotFoundError, NotADirectoryError):
+        member = get_member(path)
+        if member is None:
+            raise
+    if member.data_offset is not None:
+        return _MemberFile(member.archive_path, member.data_offset, member.size)
+
+    import tarfile
+    import zipfile
+
+    if zipfile.is_zipfile(member.archive_path):
+        # The opened member keeps the archive file open until it is closed itself
+        with zipfile.ZipFile(member.archive_path) as archive:
+            return archive.open(member.name)
+
+    tar = tarfile.open(member.archive_path, "r:*")
+    file = tar.extractfile(member.name)
+    if file is None:
+        tar.close()
+        raise FileNotFoundError(f"{member.name} in {member.archive_path} is not a file.")
+    # Close the archive together with the member
+    close_member = file.close
+
+    def close() -> None:
+        close_member()
+        tar.close()
+
+    file.close = close  # type: ignore[method-assign]
+    return file
+
+
+def get_file_size(path: str) -> int:
+    """
+    Compute the (uncompressed) size of a file, either a regular file or a member of an archive.
+
+    :param path: path to the file.
+
+    :return: size in bytes.
+    """
+    member = get_member(path)
+    if member is None:
+        return os.path.getsize(path)
+    return member.size
+
+
+def get_data_region(path: str) -> Optional[Tuple[str, int]]:
+    """
+    Locate the data of a file on disk, so that it can be memory-mapped.
+
+    :param path: path to the file, either a regular file or a member of an archive.
+
+    :return: tuple of the path of the file on disk and the offset of the data, or None for compressed members.
+    """
+    if os.path.isfile(path):
+        return path, 0
+    member = get_member(path)
+    if member is None:
+        raise FileNotFoundError(f"No such file: {path}")
+    if member.data_offset is None:
+        return None
+    return member.archive_path, member.data_offset
+
+
+def get_files_matching(archive_path: str, criteria: str) -> List[str]:
+    """
+    Get all the members of an archive (or of a directory within it) matching the criteria.
+
+    :param archive_path: path to the archive, or to a directory within it.
+    :param criteria: criteria to match (e.g., `**meta.json`).
+
+    :return: list of paths to the matching members.
+    """
+    import tarfile
+    import zipfile
+
+    split = split_archive_path(archive_path)
+    if split is None:
+        archive_path, prefix = os.fspath(archive_path), ""
+    else:
+        archive_path, prefix = split[0], split[1].rstrip("/") + "/"
+
+    if zipfile.is_zipfile(archive_path):
+        with zipfile.ZipFile(archive_path) as archive:
+            names = [info.filename for info in archive.infolist() if not info.is_dir()]
+    else:
+        with tarfile.open(archive_path, "r:*") as archive:
+            names = [info.name for info in archive.getmembers() if info.isfile()]
+
+    return [
+        os.path.join(archive_path, name)
+        for name in names
+        if name.startswith(prefix) and fnmatch.fnmatch(name[len(prefix) :], criteria)
+    ]
+
+
+def is_archive(path: str) -> bool:
+    """
+    Check whether a path points to an archive file, or into one.
+
+    :param path: path to be checked.
+
+    :return: True if the path points to a ZIP or TAR archive, or into one.
+    """
+    path = os.fspath(path)
+    if os.path.isfile(path):
+        import tarfile
+        import zipfile
+
+        return zipfile.is_zipfile(path) or tarfile.is_tarfile(path)
+    return split_archive_path(path) is not None
+
+
+class _MemberFile(io.RawIOBase):
+    """Read-only file object exposing a contiguous region of a file, i.e., an uncompressed member of an archive."""
+
+    def __init__(self, path: str, offset: int, size: int) -> None:
+        """
+        :param path: path to the archive file.
+        :param offset: offset of the region within the file.
+        :param size: size of the region.
+        """
+        super().__init__()
+        self._file = open(path, "rb")
+        self._offset = offset
+        self._size = size
+        self._position = 0
+        self.name = path
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:  # type: ignore[no-untyped-def]
+        view = memoryview(buffer).cast("B")
+        n_bytes = max(0, min(len(view), self._size - self._position))
+        if n_bytes == 0:
+            return 0
+        self._file.seek(self._offset + self._position)
+        n_read = self._file.readinto(view[:n_bytes])
+        self._position += n_read
+        return n_read
+
+    def close(self) -> None:
+        self._file.close()
+        super().close()
@@ -0,0 +1,311 @@
+"""
+Module for converting binary files associated with TSDF from and to Apache Arrow IPC (Feather) and Parquet files.
+
+Requires the optional `pyarrow` package. Single-channel binary files in native byte order are
+memory-mapped and wrapped as Arrow buffers without copying; other files are converted in chunks.
+The TSDF metadata of the streams is stored in the schema metadata of the Arrow/Parquet file.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import json
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
+import numpy as np
+from tsdf import quantization
+from tsdf import read_binary
+from tsdf import write_binary
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+ARROW_METADATA_KEY = b"tsdf"
+""" Key of the schema metadata entry containing the TSDF metadata of the converted streams. """
+
+
+def _import_pyarrow():
+    """Import pyarrow, which is an optional dependency of tsdf."""
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError(
+            "Converting TSDF from and to Arrow requires the 'pyarrow' package (e.g., pip install tsdf[arrow])."
+        ) from e
+    return pyarrow
+
+
+def _is_zero_copy(metadata: TSDFMetadata) -> bool:
+    """
+    Check whether the binary file can be wrapped as an Arrow column without copying.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: True if the file has a single channel in native byte order.
+    """
+    dtype = _get_dtype(metadata)
+    return (
+        len(metadata.channels) == 1
+        and dtype.names is None
+        and dtype.isnative
+        and not quantization.is_quantized(metadata)
+    )
+
+
+def _get_dtype(metadata: TSDFMetadata) -> np.dtype:
+    """Compute the NumPy data type of the values read from the binary file (quantised values are decoded to float64)."""
+    dtype, _ = read_binary._get_decoded_row_format(metadata)
+    return dtype
+
+
+def _get_schema(metadatas: List[TSDFMetadata]) -> "pa.Schema":
+    """
+    Compute the Arrow schema of the columns of the given streams.
+
+    :param metadatas: list of TSDFMetadata objects.
+
+    :return: Arrow schema containing one field per channel, and the TSDF metadata.
+    """
+    pa = _import_pyarrow()
+    fields = []
+    for metadata in metadatas:
+        dtype = _get_dtype(metadata)
+        for channel in metadata.channels:
+            channel_dtype = dtype[channel] if dtype.names is not None else dtype
+            fields.append(
+                pa.field(channel, pa.from_numpy_dtype(channel_dtype.newbyteorder("=")))
+            )
+    tsdf_metadata = json.dumps(
+        [metadata.get_plain_tsdf_dict_copy() for metadata in metadatas]
+    )
+    return pa.schema(fields, metadata={ARROW_METADATA_KEY: tsdf_metadata})
+
+
+def iterate_record_batches(
+    metadatas: List[TSDFMetadata], chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Iterator["pa.RecordBatch"]:
+    """
+    Iterate over the content of binary files with the same number of rows as Arrow record batches,
+    with one column per channel (i.e., the files are concatenated horizontally).
+    Columns of single-channel files in native byte order are views of the memory-mapped files.
+    Binary files mixing data types per channel keep the data type of each channel.
+
+    :param metadatas: list of TSDFMetadata objects.
+    :param chunk_rows: (optional) number of rows in each record batch.
+
+    :return: iterator over Arrow record batches.
+
+    :raises TSDFMetadataFieldValueError: if the binary files have a different number of rows.
+    """
+    pa = _import_pyarrow()
+    if len({metadata.rows for metadata in metadatas}) > 1:
+        raise TSDFMetadataFieldValueError(
+            "Binary files have to have the same number of rows to be converted into one Arrow table."
+        )
+    schema = _get_schema(metadatas)
+    n_rows = metadatas[0].rows if len(metadatas) > 0 else 0
+    memmaps: List[Optional[np.ndarray]] = [
+        read_binary.load_memmap_from_binary(metadata) if _is_zero_copy(metadata) else None
+        for metadata in metadatas
+    ]
+
+    for start_row in range(0, n_rows, chunk_rows):
+        end_row = min(start_row + chunk_rows, n_rows)
+        columns = []
+        for metadata, memmap in zip(metadatas, memmaps):
+            if memmap is not None:
+                columns.append(pa.array(memmap[start_row:end_row]))
+                continue
+            data = read_binary.load_ndarray_from_binary(metadata, start_row, end_row)
+            if data.dtype.names is not None:
+                for channel in metadata.channels:
+                    native_dtype = data.dtype[channel].newbyteorder("=")
+                    columns.append(pa.array(data[channel].astype(native_dtype)))
+                continue
+            data = data.reshape((data.shape[0], -1))
+            native_dtype = data.dtype.newbyteorder("=")
+            for i in range(data.shape[1]):
+                columns.append(pa.array(data[:, i].astype(native_dtype)))
+        yield pa.RecordBatch.from_arrays(columns, schema=schema)
+
+
+def load_arrow_table(
+    metadatas: List[TSDFMetadata], chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> "pa.Table":
+    """
+    Load the content of binary files with the same number of rows into an Arrow table (see `iterate_record_batches`).
+
+    :param metadatas: list of TSDFMetadata objects.
+    :param chunk_rows: (optional) number of rows in each chunk of the table.
+
+    :return: Arrow table with one column per channel.
+    """
+    pa = _import_pyarrow()
+    return pa.Table.from_batches(
+        list(iterate_record_batches(metadatas, chunk_rows)), schema=_get_schema(metadatas)
+    )
+
+
+def write_arrow_file(
+    metadatas: List[TSDFMetadata], path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> None:
+    """
+    Write the content of binary files with the same number of rows to an Arrow IPC (Feather v2) file, chunk by chunk.
+
+    :param metadatas: list of TSDFMetadata objects.
+    :param path: path to the Arrow file.
+    :param chunk_rows: (optional) number of rows in each record batch.
+    """
+    pa = _import_pyarrow()
+    with pa.ipc.new_file(path, _get_schema(metadatas)) as writer:
+        for batch in iterate_record_batches(metadatas, chunk_rows):
+            writer.write_batch(batch)
+
+
+def write_parquet_file(
+    metadatas: List[TSDFMetadata], path: str, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> None:
+    """
+    Write the content of binary files with the same number of rows to a Parquet file, chunk by chunk.
+
+    :param metadatas: list of TSDFMetadata objects.
+    :param path: path to the Parquet file.
+    :param chunk_rows: (optional) number of rows in each row group.
+    """
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    with pq.ParquetWriter(path, _get_schema(metadatas)) as writer:
+        for batch in iterate_record_batches(metadatas, chunk_rows):
+            writer.write_batch(batch)
+
+
+def load_arrow_metadata(schema: "pa.Schema") -> List[Dict[str, Any]]:
+    """
+    Retrieve the TSDF metadata stored in the schema of an Arrow/Parquet file.
+
+    :param schema: Arrow schema.
+
+    :return: list of plain TSDF metadata dictionaries, or an empty list if the schema does not contain TSDF metadata.
+    """
+    if schema.metadata is None or ARROW_METADATA_KEY not in schema.metadata:
+        return []
+    return json.loads(schema.metadata[ARROW_METADATA_KEY])
+
+
+def arrow_file_to_binary(
+    path: str,
+    file_dir: str,
+    file_name: str,
+    metadata: Dict[str, Any],
+    channels: Optional[List[str]] = None,
+) -> TSDFMetadata:
+    """
+    Convert columns of an Arrow IPC (Feather v2) file into a binary file, record batch by record batch.
+    The Arrow file is memory-mapped, so primitive columns are read without copying.
+
+    :param path: path to the Arrow file.
+    :param file_dir: path to the directory where the binary file will be saved.
+    :param file_name: name of the binary file to be saved.
+    :param metadata: dictionary containing the metadata of the new stream. The data properties are derived from the data, and missing units are taken from the TSDF metadata stored in the file.
+    :param channels: (optional) columns to be converted. If None, all the columns are converted.
+
+    :return: TSDFMetadata object.
+    """
+    pa = _import_pyarrow()
+    with pa.memory_map(path, "r") as source:
+        reader = pa.ipc.open_file(source)
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+        return _record_batches_to_binary(
+            reader.schema, batches, file_dir, file_name, metadata, channels
+        )
+
+
+def parquet_file_to_binary(
+    path: str,
+    file_dir: str,
+    file_name: str,
+    metadata: Dict[str, Any],
+    channels: Optional[List[str]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+) -> TSDFMetadata:
+    """
+    Convert columns of a Parquet file into a binary file, chunk by chunk.
+    See `arrow_file_to_binary` for the description of the parameters.
+
+    :param chunk_rows: (optional) number of rows read at once.
+
+    :return: TSDFMetadata object.
+    """
+    _import_pyarrow()
+    import pyarrow.parquet as pq
+
+    parquet_file = pq.ParquetFile(path)
+    schema = parquet_file.schema_arrow
+    batches = parquet_file.iter_batches(batch_size=chunk_rows, columns=channels)
+    return _record_batches_to_binary(
+        schema, batches, file_dir, file_name, metadata, channels
+    )
+
+
+def _record_batches_to_binary(
+    schema: "pa.Schema",
+    batches: Iterator["pa.RecordBatch"],
+    file_dir: str,
+    file_name: str,
+    metadata: Dict[str, Any],
+    channels: Optional[List[str]],
+) -> TSDFMetadata:
+    """
+    Write the selected columns of record batches into a binary file.
+
+    :param schema: Arrow schema of the record batches.
+    :param batches: iterator over record batches.
+    :param file_dir: path to the directory where the binary file will be saved.
+    :param file_name: name of the binary file to be saved.
+    :param metadata: dictionary containing the metadata of the new stream.
+    :param channels: columns to be converted. If None, all the columns are converted.
+
+    :return: TSDFMetadata object.
+    """
+    if channels is None:
+        channels = schema.names
+    channel_dtypes = [
+        np.dtype(schema.field(channel).type.to_pandas_dtype()) for channel in channels
+    ]
+    if len(set(channel_dtypes)) > 1:
+        # Channels of different types are stored as records mixing these types
+        dtype = np.dtype(list(zip(channels, channel_dtypes)))
+    else:
+        dtype = channel_dtypes[0]
+
+    def iterate_arrays() -> Iterator[np.ndarray]:
+        for batch in batches:
+            columns = [
+                batch.column(channel).to_numpy(zero_copy_only=False)
+                for channel in channels
+            ]
+            if dtype.names is not None:
+                data = np.empty(batch.num_rows, dtype=dtype)
+                for channel, column in zip(channels, columns):
+                    data[channel] = column
+                yield data
+            elif len(columns) == 1:
+                yield columns[0].astype(dtype, copy=False)
+            else:
+                yield np.column_stack(columns).astype(dtype, copy=False)
+
+    metadata = metadata.copy()
+    if "units" not in metadata:
+        units = {}
+        for stream in load_arrow_metadata(schema):
+            units.update(zip(stream["channels"], stream["units"]))
+        metadata["units"] = [units.get(channel, "unknown") for channel in channels]
+    metadata.update(write_binary._get_metadata_from_ndarray(np.empty(0, dtype)))
+    metadata["file_name"] = file_name
+    metadata["channels"] = list(channels)
+    new_metadata = TSDFMetadata(metadata, file_dir)
+    write_binary.write_chunks_to_binaries(
+        file_dir, iterate_arrays(), [new_metadata], update_end_time=False
+    )
+    return new_metadata
@@ -0,0 +1,265 @@
+"""
+Module providing a catalog of recordings, to find the streams matching a query without loading every metadata file.
+
+The catalog indexes the study, subject and device identifiers, the channels and the time interval
+(`start_iso8601` to `end_iso8601`) of each stream. Identifiers and channels are indexed by hash maps of
+sorted row numbers, and intervals by the start times (sorted) together with the running maximum of the
+end times, so that overlapping intervals are found with two binary searches. A catalog can be saved to
+(and loaded from) a json file, which avoids reading and parsing the metadata files again.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import json
+import os
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Union
+import numpy as np
+from tsdf import file_utils
+from tsdf import read_tsdf
+from tsdf import storage
+from tsdf import time_utils
+from tsdf.constants import METADATA_NAMING_PATTERN
+from tsdf.tsdfmetadata import TSDFMetadata
+
+INDEXED_FIELDS = ["study_id", "subject_id", "device_id"]
+""" Metadata fields that can be queried for equality. """
+
+CATALOG_VERSION = 1
+""" Version of the format of saved catalogs. """
+
+
+class CatalogEntry(NamedTuple):
+    """Indexed properties of a stream."""
+
+    metadata_path: str
+    """Path to the metadata file describing the stream."""
+    file_name: str
+    """Name of the binary file of the stream."""
+    study_id: str
+    subject_id: str
+    device_id: str
+    channels: List[str]
+    start_iso8601: str
+    end_iso8601: str
+    start_ns: int
+    """Start of the recording (in ns since the Unix epoch)."""
+    end_ns: int
+    """End of the recording (in ns since the Unix epoch)."""
+
+    def load_metadata(self) -> TSDFMetadata:
+        """
+        Load the metadata of the stream.
+
+        :return: TSDFMetadata object.
+        """
+        return read_tsdf.load_metadata_from_path(self.metadata_path)[self.file_name]
+
+
+class Catalog:
+    """Index over the streams of a collection of recordings."""
+
+    entries: List[CatalogEntry]
+    """Indexed streams, sorted by start time."""
+
+    def __init__(self, entries: Iterable[CatalogEntry]) -> None:
+        """
+        :param entries: properties of the indexed streams.
+        """
+        self.entries = sorted(entries, key=lambda entry: entry.start_ns)
+        self._starts = np.array([e.start_ns for e in self.entries], dtype=np.int64)
+        self._ends = np.array([e.end_ns for e in self.entries], dtype=np.int64)
+        # The running maximum of the end times is sorted, so it can be searched
+        # for the first interval that may end after a given time
+        self._max_ends = np.maximum.accumulate(self._ends) if self.entries else self._ends
+
+        self._field_index: Dict[str, Dict[str, np.ndarray]] = {}
+        for field in INDEXED_FIELDS:
+            self._field_index[field] = _build_index(
+                (getattr(entry, field), row) for row, entry in enumerate(self.entries)
+            )
+        self._channel_index = _build_index(
+            (channel, row)
+            for row, entry in enumerate(self.entries)
+            for channel in set(entry.channels)
+        )
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    @classmethod
+    def from_metadatas(cls, metadatas: Iterable[Dict[str, TSDFMetadata]]) -> "Catalog":
+        """
+        Build a catalog from loaded metadata files (e.g., the result of `load_metadatas_from_dir`).
+
+        :param metadatas: dictionaries of TSDFMetadata objects, one for each metadata file.
+
+        :return: catalog of the streams.
+        """
+        entries = []
+        for streams in metadatas:
+            for file_name, metadata in streams.items():
+                entries.append(
+                    CatalogEntry(
+                        metadata_path=os.path.join(
+                            metadata.file_dir_path, metadata.metadata_file_name
+                        ),
+                        file_name=file_name,
+                        study_id=metadata.study_id,
+                        subject_id=metadata.subject_id,
+                        device_id=metadata.device_id,
+                        channels=list(metadata.channels),
+                        start_iso8601=metadata.start_iso8601,
+                        end_iso8601=metadata.end_iso8601,
+                        start_ns=time_utils.iso8601_to_ns(metadata.start_iso8601),
+                        end_ns=time_utils.iso8601_to_ns(metadata.end_iso8601),
+                    )
+                )
+        return cls(entries)
+
+    @classmethod
+    def from_dir(
+        cls, dir_path: str, naming_pattern: str = METADATA_NAMING_PATTERN
+    ) -> "Catalog":
+        """
+        Build a catalog from all the metadata files in a directory.
+
+        :param dir_path: path to the directory containing the TSDF metadata files.
+        :param naming_pattern: (optional) naming pattern of the TSDF metadata files.
+
+        :return: catalog of the streams.
+        """
+        metadatas = read_tsdf.load_metadatas_from_dir(dir_path, naming_pattern)
+        return cls.from_metadatas(metadatas)
+
+    def query(
+        self,
+        study_id: Optional[str] = None,
+        subject_id: Optional[str] = None,
+        device_id: Optional[str] = None,
+        channels: Optional[List[str]] = None,
+        start: Optional[Union[str, datetime]] = None,
+        end: Optional[Union[str, datetime]] = None,
+    ) -> List[CatalogEntry]:
+        """
+        Find the streams matching all the given criteria.
+
+        :param study_id: (optional) required study identifier.
+        :param subject_id: (optional) required subject identifier.
+        :param device_id: (optional) required device identifier.
+        :param channels: (optional) channels that the streams have to contain (all of them).
+        :param start: (optional) start of the time range that the recordings have to overlap with (inclusive).
+        :param end: (optional) end of the time range that the recordings have to overlap with (inclusive).
+
+        :return: matching streams, sorted by start time.
+        """
+        selections = []
+        for field, value in zip(INDEXED_FIELDS, [study_id, subject_id, device_id]):
+            if value is not None:
+                selections.append(self._field_index[field].get(value, _EMPTY_ROWS))
+        for channel in channels or []:
+            selections.append(self._channel_index.get(channel, _EMPTY_ROWS))
+        if start is not None or end is not None:
+            selections.append(self._overlapping_rows(start, end))
+
+        if not selections:
+            return list(self.entries)
+        # Start from the most selective criterion, so each intersection is cheap
+        selections.sort(key=len)
+        rows = selections[0]
+        for other in selections[1:]:
+            rows = _intersect_sorted(rows, other)
+        return [self.entries[row] for row in rows]
+
+    def _overlapping_rows(
+        self,
+        start: Optional[Union[str, datetime]],
+        end: Optional[Union[str, datetime]],
+    ) -> np.ndarray:
+        """
+        Find the streams whose recording interval overlaps with a time range.
+
+        :param start: start of the time range, or None for an unbounded start.
+        :param end: end of the time range, or None for an unbounded end.
+
+        :return: sorted row numbers of the overlapping streams.
+        """
+        # Intervals starting after the end of the range cannot overlap with it
+        last = len(self.entries)
+        if end is not None:
+            end_ns = time_utils.iso8601_to_ns(end)
+            last = int(np.searchsorted(self._starts, end_ns, side="right"))
+        if start is None:
+            return np.arange(last)
+        # Intervals before the first one whose running maximum reaches the start all end before the range
+        start_ns = time_utils.iso8601_to_ns(start)
+        first = int(np.searchsorted(self._max_ends, start_ns, side="left"))
+        rows = np.arange(first, max(first, last))
+        return rows[self._ends[first : max(first, last)] >= start_ns]
+
+    def save(self, path: str) -> None:
+        """
+        Save the catalog to a json file (written atomically).
+
+        :param path: path to the file.
+        """
+        dir_path, file_name = os.path.split(os.fspath(path))
+        file_utils.write_to_file(
+            {
+                "catalog_version": CATALOG_VERSION,
+                "fields": list(CatalogEntry._fields),
+                "entries": [list(entry) for entry in self.entries],
+            },
+            dir_path,
+            file_name,
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "Catalog":
+        """
+        Load a catalog saved with `save`.
+
+        :param path: path to the file.
+
+        :return: loaded catalog.
+
+        :raises ValueError: if the file was saved in an unsupported format.
+        """
+        with storage.open_binary(path) as file:
+            data: Dict[str, Any] = json.load(file)
+        if data.get("catalog_version") != CATALOG_VERSION:
+            raise ValueError(f"Catalog version {data.get('catalog_version')} not supported.")
+        fields = data["fields"]
+        return cls(CatalogEntry(**dict(zip(fields, values))) for values in data["entries"])
+
+
+_EMPTY_ROWS = np.empty(0, dtype=np.int64)
+
+
+def _intersect_sorted(small: np.ndarray, large: np.ndarray) -> np.ndarray:
+    """
+    Intersect two sorted arrays of unique row numbers, in O(n log m) for arrays of lengths n and m.
+
+    :param small: sorted array of row numbers (preferably the smaller one).
+    :param large: sorted array of row numbers.
+
+    :return: sorted array of the row numbers contained in both arrays.
+    """
+    if small.shape[0] == 0 or large.shape[0] == 0:
+        return _EMPTY_ROWS
+    positions = np.minimum(np.searchsorted(large, small), large.shape[0] - 1)
+    return small[large[positions] == small]
+
+
+def _build_index(pairs: Iterable[Any]) -> Dict[str, np.ndarray]:
+    """
+    Map each value to the sorted array of rows in which it occurs.
+
+    :param pairs: iterable of (value, row) tuples, sorted by row.
+
+    :return: dictionary mapping each value to an array of row numbers.
+    """
+    index: Dict[str, List[int]] = {}
+    for value, row in pairs:
+        index.setdefault(value, []).append(row)
+    return {value: np.array(rows, dtype=np.int64) for value, rows in index.items()}
@@ -0,0 +1,275 @@
+"""
+Module for computing per-channel statistics of binary files associated with TSDF.
+
+The statistics are accumulated chunk by chunk, so binary files of any size can be
+summarised without loading them into memory. Results are cached in a sidecar file
+next to the binary file, keyed by the size and modification time of the binary, its channels,
+and the metadata fields determining how its bytes are decoded (see `FORMAT_FIELDS`).
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import json
+import os
+from typing import Any, Dict, List, Optional
+import numpy as np
+from tsdf import file_utils
+from tsdf import read_binary
+from tsdf import tsdfmetadata
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+
+STATISTICS_SIDECAR_SUFFIX = ".stats.json"
+""" Suffix appended to the binary file name to obtain the name of the statistics sidecar file. """
+
+FORMAT_FIELDS = [
+    "data_type",
+    "bits",
+    "endianness",
+    "value_encode",
+    "value_scales",
+    "value_offsets",
+    "time_encode",
+    "sampling_rate",
+    "time_exceptions",
+]
+""" Metadata fields determining the values decoded from a binary file, which invalidate the cached statistics when they change. """
+
+
+class ChannelStatistics:
+    """
+    Running statistics (count, NaN count, minimum, maximum, mean and variance) of each channel.
+    The mean and variance are accumulated with the parallel variant of Welford's algorithm,
+    which makes it possible to merge the statistics of independent parts of a file.
+    """
+
+    count: np.ndarray
+    """Number of non-NaN values per channel."""
+    nan_count: np.ndarray
+    """Number of NaN values per channel."""
+    minimum: np.ndarray
+    """Minimal value per channel."""
+    maximum: np.ndarray
+    """Maximal value per channel."""
+    mean: np.ndarray
+    """Mean value per channel."""
+    m2: np.ndarray
+    """Sum of squared differences from the mean per channel."""
+
+    def __init__(self, n_channels: int) -> None:
+        """
+        Create empty statistics.
+
+        :param n_channels: number of channels.
+        """
+        self.count = np.zeros(n_channels, dtype=np.int64)
+        self.nan_count = np.zeros(n_channels, dtype=np.int64)
+        self.minimum = np.full(n_channels, np.nan)
+        self.maximum = np.full(n_channels, np.nan)
+        self.mean = np.zeros(n_channels)
+        self.m2 = np.zeros(n_channels)
+
+    def update(self, chunk: np.ndarray) -> None:
+        """
+        Add a chunk of data to the statistics.
+
+        :param chunk: numpy array of shape (rows, channels), (rows,) for a single channel, or a structured array with a field per channel.
+        """
+        if chunk.dtype.names is not None:
+            from numpy.lib import recfunctions
+
+            values = recfunctions.structured_to_unstructured(chunk, dtype=np.float64)
+        else:
+            values = np.asarray(chunk, dtype=np.float64)
+        if values.ndim == 1:
+            values = values.reshape((-1, 1))
+        if values.shape[0] == 0:
+            return
+
+        nan_mask = np.isnan(values)
+        chunk_stats = ChannelStatistics(values.shape[1])
+        chunk_stats.nan_count = nan_mask.sum(axis=0)
+        chunk_stats.count = values.shape[0] - chunk_stats.nan_count
+        chunk_stats.minimum = np.fmin.reduce(values, axis=0)
+        chunk_stats.maximum = np.fmax.reduce(values, axis=0)
+
+        filled = np.where(nan_mask, 0.0, values)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            chunk_mean = filled.sum(axis=0) / chunk_stats.count
+        chunk_stats.mean = np.where(chunk_stats.count > 0, chunk_mean, 0.0)
+        deviations = np.where(nan_mask, 0.0, values - chunk_stats.mean)
+        chunk_stats.m2 = np.einsum("ij,ij->j", deviations, deviations)
+
+        self.merge(chunk_stats)
+
+    def merge(self, other: "ChannelStatistics") -> None:
+        """
+        Merge the statistics of another part of the data into these statistics.
+
+        :param other: statistics to be merged.
+        """
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        with np.errstate(invalid="ignore", divide="ignore"):
+            weight = np.where(total > 0, other.count / total, 0.0)
+        self.mean = self.mean + delta * weight
+        self.m2 = self.m2 + other.m2 + delta**2 * self.count * weight
+        self.count = total
+        self.nan_count = self.nan_count + other.nan_count
+        self.minimum = np.fmin(self.minimum, other.minimum)
+        self.maximum = np.fmax(self.maximum, other.maximum)
+
+    @property
+    def std(self) -> np.ndarray:
+        """Population standard deviation per channel."""
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.count > 0, np.sqrt(self.m2 / self.count), np.nan)
+
+    def to_dict(self, channels: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Summarise the statistics per channel.
+
+        :param channels: names of the channels.
+
+        :return: dictionary mapping each channel name to its statistics.
+        """
+        std = self.std
+        summary = {}
+        for i, channel in enumerate(channels):
+            has_values = self.count[i] > 0
+            summary[channel] = {
+                "count": int(self.count[i]),
+                "nan_count": int(self.nan_count[i]),
+                "min": float(self.minimum[i]),
+                "max": float(self.maximum[i]),
+                "mean": float(self.mean[i]) if has_values else float("nan"),
+                "std": float(std[i]),
+            }
+        return summary
+
+
+def compute_channel_statistics(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    workers: int = 1,
+    use_cache: bool = True,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Compute the minimum, maximum, mean, standard deviation, and NaN count of each channel of a binary file.
+    The file is read in chunks; with multiple workers, the rows are split into contiguous parts that are processed concurrently.
+
+    :param metadata: TSDFMetadata object.
+    :param chunk_rows: (optional) number of rows read at once.
+    :param workers: (optional) number of threads used to process the file.
+    :param use_cache: (optional) flag to read the statistics from, and store them to, the sidecar file next to the binary file.
+
+    :return: dictionary mapping each channel name to its statistics.
+    """
+    bin_path = os.path.join(metadata.file_dir_path, metadata.file_name)
+    # No sidecar file can be stored next to binary files within archives
+    use_cache = use_cache and os.path.isfile(bin_path)
+    if use_cache:
+        cached = _load_cached_statistics(bin_path, metadata)
+        if cached is not None:
+            return cached
+
+    n_workers = max(1, min(workers, metadata.rows))
+    bounds = np.linspace(0, metadata.rows, n_workers + 1).astype(np.int64)
+
+    def accumulate(start_row: int, end_row: int) -> ChannelStatistics:
+        stats = ChannelStatistics(len(metadata.channels))
+        for chunk in read_binary.load_ndarray_chunks(
+            metadata, chunk_rows, int(start_row), int(end_row)
+        ):
+            stats.update(chunk)
+        return stats
+
+    if n_workers == 1:
+        parts = [accumulate(0, metadata.rows)]
+    else:
+        from concurrent.futures import ThreadPoolExecutor
+
+        with ThreadPoolExecutor(max_workers=n_workers) as executor:
+            parts = list(executor.map(accumulate, bounds[:-1], bounds[1:]))
+
+    stats = ChannelStatistics(len(metadata.channels))
+    for part in parts:
+        stats.merge(part)
+    summary = stats.to_dict(metadata.channels)
+
+    if use_cache:
+        _store_cached_statistics(bin_path, metadata, summary)
+    return summary
+
+
+def _file_signature(bin_path: str) -> Dict[str, int]:
+    """
+    Compute the values identifying the current version of a binary file.
+
+    :param bin_path: path to the binary file.
+
+    :return: dictionary containing the file size and modification time.
+    """
+    stat = os.stat(bin_path)
+    return {"file_size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def _data_format(metadata: "tsdfmetadata.TSDFMetadata") -> Dict[str, Any]:
+    """
+    Collect the metadata fields determining how the bytes of a binary file are decoded.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: dictionary containing the `FORMAT_FIELDS` (None for missing fields).
+    """
+    return {field: getattr(metadata, field, None) for field in FORMAT_FIELDS}
+
+
+def _load_cached_statistics(
+    bin_path: str, metadata: "tsdfmetadata.TSDFMetadata"
+) -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Load the statistics from the sidecar file, if it is up to date with the binary file and its metadata.
+
+    :param bin_path: path to the binary file.
+    :param metadata: TSDFMetadata object of the binary file.
+
+    :return: the cached statistics, or None if there is no valid cache.
+    """
+    sidecar_path = bin_path + STATISTICS_SIDECAR_SUFFIX
+    try:
+        with open(sidecar_path, "r") as file:
+            cached = json.load(file)
+    except (OSError, ValueError):
+        return None
+
+    if cached.get("signature") != _file_signature(bin_path):
+        return None
+    if cached.get("channels") != metadata.channels:
+        return None
+    # Values read back from json compare equal to the original ones (lists, numbers and strings)
+    if cached.get("format") != _data_format(metadata):
+        return None
+    return cached.get("statistics")
+
+
+def _store_cached_statistics(
+    bin_path: str, metadata: "tsdfmetadata.TSDFMetadata", summary: Dict[str, Dict[str, Any]]
+) -> None:
+    """
+    Store the statistics in the sidecar file next to the binary file.
+
+    :param bin_path: path to the binary file.
+    :param metadata: TSDFMetadata object of the binary file.
+    :param summary: statistics to be stored.
+    """
+    dir_path, file_name = os.path.split(bin_path)
+    file_utils.write_to_file(
+        {
+            "signature": _file_signature(bin_path),
+            "channels": metadata.channels,
+            "format": _data_format(metadata),
+            "statistics": summary,
+        },
+        dir_path,
+        file_name + STATISTICS_SIDECAR_SUFFIX,
+    )
@@ -31,8 +31,8 @@ MANDATORY_TSDF_KEYS_VALUES = {
         "str",
         "str",
         "str",
-        "str",
-        "int",
+        "str_or_list",
+        "int_or_list",
         "int",
         "list",
         "list",
@@ -47,7 +47,9 @@ KEY_VALUE_TYPES = {
     "int": int,
     "list": list,
     "float": float,
-    "str": str
+    "str": str,
+    "str_or_list": (str, list),
+    "int_or_list": (int, list),
     # etc
 }
 """ List of data types that are supported within the TSDF metadata file. """
@@ -56,3 +58,21 @@ METADATA_NAMING_PATTERN = "**meta.json"
 """ Naming convention for the metadata files. ** allows for any prefix, including additional directories. """
 
 ConcatenationType = Enum("ConcatenationType", ["rows", "columns", "none"])
+
+DEFAULT_CHUNK_ROWS = 2**16
+""" Default number of rows read at once when a binary file is processed in chunks. """
+
+WRITE_BUFFER_SIZE = 8 * 2**20
+""" Default size (in bytes) of the buffer used when binary files are written incrementally. """
+
+COALESCE_GAP_SIZE = 2**16
+""" Default largest gap (in bytes) between row ranges that are read with a single read call. """
+
+CACHE_BLOCK_SIZE = 2**20
+""" Default size (in bytes) of the blocks of the storage block cache. """
+
+CACHE_CAPACITY = 256 * 2**20
+""" Default capacity (in bytes) of the storage block cache. """
+
+CACHE_READ_AHEAD = 4
+""" Default number of blocks read ahead of a block that is missing from the storage block cache. """
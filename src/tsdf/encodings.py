@@ -0,0 +1,162 @@
+"""
+Module for encoding time channels compactly when they are written, and decoding them when they are read.
+
+Two encodings are declared in the metadata with the field `time_encode`:
+
+- `"difference"`: the time stamps are rounded to a tick (stored in `scale_factors`) and the differences between
+  consecutive ticks are stored as int32 values, which takes 4 bytes per row instead of 8 for float64 time stamps.
+- `"constant_rate"`: the time stamps follow the `sampling_rate`, except at the rows listed in `time_exceptions`.
+  Each exception `[row, time]` (re)starts the regular sequence at a given time, e.g., after a gap in the recording;
+  the first row is always listed. No time stamp is stored in the binary file, which is empty.
+
+Difference encoded channels are accumulated by the functions of `time_utils`; constant rate channels are generated
+by the readers of `read_binary`, chunk by chunk, as if their time stamps were stored.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+from tsdf import time_utils
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+TIME_ENCODINGS = ["difference", "constant_rate"]
+""" Supported encodings of time channels. """
+
+_INT32_RANGE = (np.iinfo(np.int32).min, np.iinfo(np.int32).max)
+
+
+def encode_time(
+    times: np.ndarray,
+    encoding: str,
+    unit: str = "ms",
+    tick: Optional[float] = None,
+    rate: Optional[float] = None,
+    tolerance: Optional[float] = None,
+) -> Tuple[np.ndarray, Dict[str, Any]]:
+    """
+    Encode the time stamps of a time channel.
+
+    :param times: time stamps (relative to the start of the recording), in the given unit.
+    :param encoding: encoding; one of `TIME_ENCODINGS`.
+    :param unit: (optional) unit of the time stamps; one of `time_utils.SECONDS_PER_TIME_UNIT`.
+    :param tick: (optional) resolution of difference encoded time stamps, in the given unit. By default, 1.
+    :param rate: (optional) sampling rate (in Hz) of constant rate time stamps. By default, the median rate of the time stamps.
+    :param tolerance: (optional) largest error (in the given unit) of constant rate time stamps. By default, a tenth of the sampling period.
+
+    :return: tuple of the data to be stored in the binary file and the metadata fields describing the encoding.
+
+    :raises TSDFMetadataFieldValueError: if the encoding is not supported or the time stamps cannot be encoded.
+    """
+    times = np.asarray(times, dtype=np.float64).reshape(-1)
+    if unit not in time_utils.SECONDS_PER_TIME_UNIT:
+        raise TSDFMetadataFieldValueError(f"Unit '{unit}' of the time channel is not supported.")
+
+    if encoding == "difference":
+        tick = tick or 1.0
+        ticks = np.rint(times / tick).astype(np.int64)
+        deltas = np.diff(ticks, prepend=0)
+        if deltas.shape[0] and (deltas.min() < _INT32_RANGE[0] or deltas.max() > _INT32_RANGE[1]):
+            raise TSDFMetadataFieldValueError(
+                "The differences between time stamps do not fit in int32 values; use a larger tick."
+            )
+        return deltas.astype(np.int32), {
+            "time_encode": "difference",
+            "units": [unit],
+            "scale_factors": [tick],
+        }
+
+    if encoding == "constant_rate":
+        period_seconds = time_utils.SECONDS_PER_TIME_UNIT[unit]
+        if rate is None:
+            intervals = np.diff(times)
+            if intervals.shape[0] == 0 or np.median(intervals) <= 0:
+                raise TSDFMetadataFieldValueError("The sampling rate cannot be derived from the time stamps.")
+            rate = 1 / (float(np.median(intervals)) * period_seconds)
+        period = 1 / (rate * period_seconds)
+        if tolerance is None:
+            tolerance = period / 10
+        return np.empty(0, dtype=np.float64), {
+            "time_encode": "constant_rate",
+            "units": [unit],
+            "scale_factors": [1],
+            "sampling_rate": rate,
+            "time_exceptions": _find_exceptions(times, period, tolerance),
+        }
+
+    raise TSDFMetadataFieldValueError(
+        f"Time encoding '{encoding}' is not supported. Supported encodings are: {TIME_ENCODINGS}."
+    )
+
+
+def _find_exceptions(times: np.ndarray, period: float, tolerance: float) -> List[List[Any]]:
+    """
+    Find the rows at which the time stamps deviate from a regular sequence by more than the tolerance.
+
+    :param times: time stamps.
+    :param period: interval between regular time stamps.
+    :param tolerance: largest allowed deviation.
+
+    :return: list of [row, time] pairs, at which a new regular sequence starts.
+    """
+    exceptions: List[List[Any]] = []
+    anchor = 0
+    while anchor < times.shape[0]:
+        exceptions.append([anchor, float(times[anchor])])
+        # Search the next deviation in blocks of increasing size, so that
+        # frequent exceptions are found without scanning the whole channel each time
+        position, block = anchor + 1, 64
+        while position < times.shape[0]:
+            end = min(position + block, times.shape[0])
+            expected = times[anchor] + np.arange(position - anchor, end - anchor) * period
+            deviations = np.flatnonzero(np.abs(times[position:end] - expected) > tolerance)
+            if deviations.shape[0]:
+                position += int(deviations[0])
+                break
+            position = end
+            block = min(2 * block, DEFAULT_CHUNK_ROWS)
+        anchor = position
+    return exceptions
+
+
+def is_generated(metadata: TSDFMetadata) -> bool:
+    """
+    Check whether the rows of a binary file are generated from its metadata instead of being stored (constant rate time channels).
+
+    :param metadata: TSDFMetadata object.
+
+    :return: True if the rows are generated, otherwise False.
+    """
+    return getattr(metadata, "time_encode", None) == "constant_rate"
+
+
+def generate_rows(
+    metadata: TSDFMetadata, start_row: int = 0, end_row: int = -1
+) -> np.ndarray:
+    """
+    Generate the time stamps of a constant rate time channel.
+
+    :param metadata: TSDFMetadata object of the time channel.
+    :param start_row: (optional) first row to generate.
+    :param end_row: (optional) row after the last row to generate. If -1, generate all rows.
+
+    :return: float64 numpy array containing the time stamps, in the unit of the channel.
+
+    :raises TSDFMetadataFieldValueError: if the metadata does not describe the sequence.
+    """
+    if end_row == -1:
+        end_row = metadata.rows
+    exceptions = getattr(metadata, "time_exceptions", None)
+    rate = getattr(metadata, "sampling_rate", None)
+    if not rate or (metadata.rows > 0 and not exceptions):
+        raise TSDFMetadataFieldValueError(
+            f"Constant rate time channel {metadata.file_name} requires 'sampling_rate' and 'time_exceptions'."
+        )
+    period = 1 / (rate * time_utils.SECONDS_PER_TIME_UNIT[metadata.units[0]])
+    anchor_rows = np.array([row for row, _ in exceptions], dtype=np.int64)
+    anchor_times = np.array([time for _, time in exceptions], dtype=np.float64)
+
+    rows = np.arange(start_row, end_row, dtype=np.int64)
+    anchors = np.searchsorted(anchor_rows, rows, side="right") - 1
+    return anchor_times[anchors] + (rows - anchor_rows[anchors]) * period
@@ -1,7 +1,9 @@
 import json
 import os
 import glob
-from typing import Dict, Any
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Iterator
+from tsdf.constants import WRITE_BUFFER_SIZE
 
 
 def get_files_matching(directory: str,  criteria: str) -> list:
@@ -16,15 +18,75 @@ def get_files_matching(directory: str,  criteria: str) -> list:
     return glob.glob(os.path.join(directory, criteria), recursive=True)
 
 
-def write_to_file(dict: Dict[str, Any], dir_path: str, file_name: str) -> None:
+def write_to_file(
+    dict: Dict[str, Any], dir_path: str, file_name: str, durable: bool = True
+) -> None:
     """
     Write a dictionary to a json file.
 
     :param dict: Dictionary to be written.
     :param dir_path: Path to the directory where the file will be saved.
     :param file_name: Name of the file to be saved.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `atomic_write`).
     """
+    # The storage backends use the atomic writes of this module
+    from tsdf import storage
+
     path = os.path.join(dir_path, file_name)
-    with open(path, "w") as convert_file:
+    with storage.atomic_write(path, "w", durable=durable) as convert_file:
         convert_file.write(json.dumps(dict, indent=4))
 
+
+@contextmanager
+def atomic_write(
+    path: str,
+    mode: str = "wb",
+    buffer_size: int = WRITE_BUFFER_SIZE,
+    durable: bool = True,
+) -> Iterator[IO[Any]]:
+    """
+    Open a file for writing, such that readers see either the previous version of the file or the complete new version.
+    The data is written to a temporary file in the same directory, which replaces the target file when the context
+    exits without an exception; otherwise, the temporary file is removed and the target file is left untouched.
+
+    :param path: path to the file to be written.
+    :param mode: (optional) mode in which the file is opened ("w" or "wb").
+    :param buffer_size: (optional) size (in bytes) of the write buffer.
+    :param durable: (optional) flag to flush the data to disk (fsync) before renaming, and the directory entry after renaming.
+
+    :return: context manager yielding the opened temporary file.
+    """
+    dir_path, file_name = os.path.split(os.fspath(path))
+    tmp_path = os.path.join(dir_path, f".{file_name}.{os.urandom(8).hex()}.tmp")
+    try:
+        with open(tmp_path, mode.replace("w", "x"), buffering=buffer_size) as file:
+            yield file
+            file.flush()
+            if durable:
+                os.fsync(file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    if durable:
+        _fsync_dir(dir_path)
+
+
+def _fsync_dir(dir_path: str) -> None:
+    """
+    Flush a directory entry to disk, so that a rename within the directory survives a crash (POSIX only).
+
+    :param dir_path: path to the directory.
+    """
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(dir_path or ".", os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    except OSError:
+        # Not all file systems support syncing directories
+        pass
+    finally:
+        os.close(fd)
+
@@ -0,0 +1,160 @@
+"""
+Module for gathering batches of samples at random positions of many binary files associated with TSDF, e.g., for data loaders.
+
+A `SampleGatherer` memory-maps the binary files of its streams on first use and keeps the maps in a
+least-recently-used pool, so that gathering a sample never opens a file again while the stream is in the pool.
+The requested samples are sorted by stream and row before they are read, which keeps the accesses
+to each file sequential, and copied directly into a preallocated batch array.
+
+    >>> gatherer = SampleGatherer(metadatas, window_rows=256)
+    >>> batch = gatherer.gather(streams, rows)
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+from tsdf import read_binary
+from tsdf.tsdfmetadata import TSDFMetadata
+
+
+class SampleGatherer:
+    """
+    Reader of windows of consecutive rows (samples) at arbitrary positions of a collection of streams.
+    All the streams have to share the same data type and number of channels. A gatherer can be used by
+    multiple threads at once, and sent to worker processes (the pool of open files is not sent along).
+    """
+
+    metadatas: List[TSDFMetadata]
+    """Streams from which the samples are gathered, addressed by their position in the list."""
+    window_rows: int
+    """Number of consecutive rows in each sample."""
+    max_open_streams: int
+    """Maximal number of streams kept memory-mapped at once."""
+    dtype: np.dtype
+    """Data type of the gathered samples (in the byte order of the machine)."""
+    n_columns: int
+    """Number of channels of the streams."""
+
+    def __init__(
+        self,
+        metadatas: Sequence[TSDFMetadata],
+        window_rows: int = 1,
+        max_open_streams: int = 128,
+    ) -> None:
+        """
+        :param metadatas: streams from which the samples are gathered.
+        :param window_rows: (optional) number of consecutive rows in each sample.
+        :param max_open_streams: (optional) maximal number of streams kept memory-mapped at once.
+
+        :raises ValueError: if the streams do not share the same row format, or if a parameter is not positive.
+        """
+        if window_rows < 1 or max_open_streams < 1:
+            raise ValueError("The window length and the number of open streams have to be positive.")
+        self.metadatas = list(metadatas)
+        self.window_rows = window_rows
+        self.max_open_streams = max_open_streams
+
+        formats = {read_binary._get_decoded_row_format(metadata) for metadata in self.metadatas}
+        if len(formats) != 1:
+            raise ValueError("All the streams have to share the same data type and number of channels.")
+        dtype, self.n_columns = formats.pop()
+        self.dtype = dtype.newbyteorder("=")
+        self._rows = np.array([metadata.rows for metadata in self.metadatas], dtype=np.int64)
+        self._init_pool()
+
+    def _init_pool(self) -> None:
+        self._pool: "OrderedDict[int, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        del state["_pool"]
+        del state["_lock"]
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        self._init_pool()
+
+    @property
+    def sample_shape(self) -> Tuple[int, ...]:
+        """Shape of a single sample."""
+        if self.n_columns > 1:
+            return (self.window_rows, self.n_columns)
+        return (self.window_rows,)
+
+    def gather(
+        self,
+        streams: Sequence[int],
+        rows: Sequence[int],
+        out: Optional[np.ndarray] = None,
+    ) -> np.ndarray:
+        """
+        Read a batch of samples.
+
+        :param streams: position (in `metadatas`) of the stream of each sample.
+        :param rows: first row of each sample.
+        :param out: (optional) preallocated array of shape `(n_samples,) + sample_shape` to be filled.
+
+        :return: array of shape `(n_samples,) + sample_shape`, with the samples in the requested order.
+
+        :raises IndexError: if a sample is not within its stream.
+        :raises ValueError: if the output array does not have the expected shape.
+        """
+        streams = np.asarray(streams, dtype=np.int64)
+        rows = np.asarray(rows, dtype=np.int64)
+        if streams.shape != rows.shape or streams.ndim != 1:
+            raise ValueError("The streams and the rows have to be one-dimensional and of the same length.")
+        shape = (streams.shape[0],) + self.sample_shape
+        if out is None:
+            out = np.empty(shape, dtype=self.dtype)
+        elif out.shape != shape:
+            raise ValueError(f"The output array has to be of shape {shape}.")
+        if streams.shape[0] == 0:
+            return out
+
+        if np.any(streams < 0) or np.any(streams >= len(self.metadatas)):
+            raise IndexError("Stream index out of range.")
+        if np.any(rows < 0) or np.any(rows + self.window_rows > self._rows[streams]):
+            raise IndexError("Samples have to be within the rows of their streams.")
+
+        # Read the samples file by file, in increasing order of rows
+        order = np.lexsort((rows, streams))
+        sorted_streams = streams[order]
+        boundaries = np.flatnonzero(np.diff(sorted_streams)) + 1
+        window = np.arange(self.window_rows)
+        for group in np.split(order, boundaries):
+            data = self._get_data(int(streams[group[0]]))
+            out[group] = data[rows[group, np.newaxis] + window]
+        return out
+
+    def close(self) -> None:
+        """Release all the memory-mapped streams of the pool (they are mapped again when needed)."""
+        with self._lock:
+            self._pool.clear()
+
+    def _get_data(self, stream: int) -> np.ndarray:
+        """
+        Get the memory-mapped data of a stream from the pool, mapping it (and evicting the least recently used stream if needed) if it is missing.
+
+        :param stream: position of the stream.
+
+        :return: memory-mapped numpy array (or in-memory array, see `read_binary.load_memmap_from_binary`).
+        """
+        with self._lock:
+            data = self._pool.get(stream)
+            if data is not None:
+                self._pool.move_to_end(stream)
+                return data
+        # Map the file outside of the lock, so other threads are not blocked meanwhile
+        data = read_binary.load_memmap_from_binary(self.metadatas[stream])
+        with self._lock:
+            self._pool[stream] = data
+            self._pool.move_to_end(stream)
+            while len(self._pool) > self.max_open_streams:
+                # Evicted maps remain valid for the threads still using them
+                self._pool.popitem(last=False)
+        return data
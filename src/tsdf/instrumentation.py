@@ -0,0 +1,131 @@
+"""
+Module providing opt-in instrumentation of the I/O and parsing hot paths of TSDF.
+
+Tracers are callables that are registered with `add_tracer` and receive, for every call of an
+instrumented function, the name of its phase, its duration (in seconds) and the number of bytes it
+read or wrote (0 if not applicable). While no tracer is registered, instrumented functions only
+check an empty list before calling the original function.
+
+    >>> with PhaseTotals() as totals:
+    ...     tsdf.load_dataframe_from_binaries(metadatas)
+    >>> totals.print_summary()
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import functools
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+Tracer = Callable[[str, float, int], None]
+""" Callback receiving the phase name, the duration (in seconds) and the number of bytes of an instrumented call. """
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+_tracers: List[Tracer] = []
+
+
+def add_tracer(tracer: Tracer) -> None:
+    """
+    Register a tracer, which will be called after every instrumented call (from any thread).
+
+    :param tracer: callable receiving the phase name, the duration (in seconds) and the number of bytes.
+    """
+    _tracers.append(tracer)
+
+
+def remove_tracer(tracer: Tracer) -> None:
+    """
+    Unregister a tracer.
+
+    :param tracer: previously registered tracer.
+    """
+    _tracers.remove(tracer)
+
+
+def traced(
+    phase: str, count_bytes: Optional[Callable[..., int]] = None
+) -> Callable[[F], F]:
+    """
+    Decorator reporting the calls of a function to the registered tracers.
+
+    :param phase: name of the phase reported to the tracers.
+    :param count_bytes: (optional) function computing the number of bytes from the result and the arguments of the call, i.e., `count_bytes(result, *args, **kwargs)`.
+
+    :return: decorator.
+    """
+
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if not _tracers:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            duration = time.perf_counter() - start
+            n_bytes = count_bytes(result, *args, **kwargs) if count_bytes else 0
+            for tracer in list(_tracers):
+                tracer(phase, duration, n_bytes)
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+class PhaseTotals:
+    """
+    Tracer aggregating the number of calls, the total duration and the total number of bytes per phase.
+    It can be used as a context manager, which registers it while the context is active.
+    Note that phases can be nested (e.g., writing metadata includes validating it).
+    """
+
+    totals: Dict[str, Dict[str, float]]
+    """Mapping of each phase to its 'calls', 'seconds' and 'bytes'."""
+
+    def __init__(self) -> None:
+        self.totals = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, phase: str, duration: float, n_bytes: int) -> None:
+        with self._lock:
+            total = self.totals.setdefault(
+                phase, {"calls": 0, "seconds": 0.0, "bytes": 0}
+            )
+            total["calls"] += 1
+            total["seconds"] += duration
+            total["bytes"] += n_bytes
+
+    def __enter__(self) -> "PhaseTotals":
+        add_tracer(self)
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        remove_tracer(self)
+
+    def reset(self) -> None:
+        """Discard the aggregated totals."""
+        with self._lock:
+            self.totals = {}
+
+    def summary(self) -> str:
+        """
+        Format the totals as a table, sorted by decreasing duration.
+
+        :return: table with a row per phase.
+        """
+        lines = [f"{'phase':<20} {'calls':>8} {'seconds':>10} {'MiB':>10} {'MiB/s':>10}"]
+        with self._lock:
+            items = sorted(self.totals.items(), key=lambda item: -item[1]["seconds"])
+        for phase, total in items:
+            mib = total["bytes"] / 2**20
+            rate = mib / total["seconds"] if total["seconds"] > 0 else 0.0
+            lines.append(
+                f"{phase:<20} {int(total['calls']):>8} {total['seconds']:>10.4f} {mib:>10.2f} {rate:>10.1f}"
+            )
+        return "\n".join(lines)
+
+    def print_summary(self) -> None:
+        """Print the totals per phase."""
+        print(self.summary())
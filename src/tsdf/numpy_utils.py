@@ -1,23 +1,37 @@
 import sys
+from typing import List, Optional, Union
 import numpy as np
 
 
 _map_from_numpy_types = {
     "i": "int",
+    "u": "uint",
     "f": "float",
+    "b": "bool",
     # etc
 }
 """ Mapping of NumPy data types to their TSDF metadata annotations. """
 
 
-def data_type_numpy_to_tsdf(data: np.ndarray):
-    """Compute the TSDF metadata 'data_type' value, based on the NumPy data."""
+def data_type_numpy_to_tsdf(data: np.ndarray) -> Union[str, List[str]]:
+    """
+    Compute the TSDF metadata 'data_type' value, based on the NumPy data.
+    For structured arrays (records mixing data types), a list with the data type of each field is returned.
+
+    :param data: NumPy data.
+
+    :return: TSDF metadata 'data_type' value.
+    """
+    if data.dtype.names is not None:
+        return [_map_from_numpy_types[data.dtype[name].kind] for name in data.dtype.names]
     return _map_from_numpy_types[data.dtype.kind]
 
 
 _map_to_numpy_types = {
     "int": "i",
+    "uint": "u",
     "float": "f",
+    "bool": "b",
     # etc
 }
 """ Mapping of data types that are supported by TSDF to 
@@ -35,14 +49,50 @@ def data_type_tsdf_to_numpy(data_type: str) -> str:
     return _map_to_numpy_types[data_type]
 
 
-def bits_numpy_to_tsdf(data: np.ndarray) -> int:
+def dtype_tsdf_to_numpy(
+    data_type: Union[str, List[str]],
+    n_bits: Union[int, List[int]],
+    endianness: str,
+    channels: Optional[List[str]] = None,
+) -> np.dtype:
+    """
+    Compute the NumPy data type, based on the TSDF metadata 'data_type', 'bits' and 'endianness' values.
+    If 'data_type' and 'bits' are lists (one value per channel), the result is a structured data type
+    describing a record of mixed types, with one field per channel.
+
+    :param data_type: TSDF metadata 'data_type' value.
+    :param n_bits: TSDF metadata 'bits' value.
+    :param endianness: TSDF metadata 'endianness' value.
+    :param channels: (optional) TSDF metadata 'channels' value, used to name the fields of a structured data type.
+
+    :return: NumPy data type.
+    """
+    if isinstance(data_type, list):
+        if channels is None:
+            channels = [f"f{i}" for i in range(len(data_type))]
+        return np.dtype(
+            [
+                (channel, dtype_tsdf_to_numpy(field_type, field_bits, endianness))
+                for channel, field_type, field_bits in zip(channels, data_type, n_bits)
+            ]
+        )
+    s_endianness = endianness_tsdf_to_numpy(endianness)
+    s_type = data_type_tsdf_to_numpy(data_type)
+    s_n_bytes = bytes_tsdf_to_numpy(n_bits)
+    return np.dtype("".join([s_endianness, s_type, s_n_bytes]))
+
+
+def bits_numpy_to_tsdf(data: np.ndarray) -> Union[int, List[int]]:
     """
     Compute TSDF metadata 'n_bits' value, based on the NumPy data.
+    For structured arrays, a list with the number of bits of each field is returned.
 
     :param data: NumPy data.
 
     :return: TSDF metadata 'n_bits' value.
     """
+    if data.dtype.names is not None:
+        return [data.dtype[name].itemsize * 8 for name in data.dtype.names]
     return data.dtype.itemsize * 8
 
 
@@ -73,7 +123,17 @@ def endianness_numpy_to_tsdf(data: np.ndarray) -> str:
     :param data: NumPy data.
 
     :return: TSDF metadata 'data_type' value (as a string).
+
+    :raises ValueError: if the fields of a structured array have different byte orders.
     """
+    if data.dtype.names is not None:
+        field_endianness = {
+            _map_from_numpy_endianness[data.dtype[name].byteorder]
+            for name in data.dtype.names
+        } - {"not applicable"}
+        if len(field_endianness) > 1:
+            raise ValueError("All the fields of a record must have the same byte order.")
+        return field_endianness.pop() if field_endianness else "not applicable"
     return _map_from_numpy_endianness[data.dtype.byteorder]
 
 
@@ -95,6 +155,20 @@ def endianness_tsdf_to_numpy(endianness: str) -> str:
     return _map_to_numpy_endianness[endianness]
 
 
+def dtype_with_endianness(dtype: np.dtype, endianness: str) -> np.dtype:
+    """
+    Change the byte order of a NumPy data type (of each field, for structured data types).
+
+    :param dtype: NumPy data type.
+    :param endianness: TSDF metadata 'endianness' value, i.e., "little" or "big" ("not applicable" keeps the data type).
+
+    :return: NumPy data type with the requested byte order.
+    """
+    if endianness == "not applicable":
+        return dtype
+    return dtype.newbyteorder(endianness_tsdf_to_numpy(endianness))
+
+
 def rows_numpy_to_tsdf(data: np.ndarray) -> int:
     """
     Compute TSDF metadata 'rows' value, based on the NumPy data.
@@ -7,12 +7,13 @@ Reference: https://arxiv.org/abs/2211.11294
 import os
 from typing import Any, Dict, List
 import re
-from dateutil import parser
 
 from tsdf import constants
 from tsdf import tsdfmetadata
+from tsdf.instrumentation import traced
 
 
+@traced("parse_metadata")
 def read_data(data: Any, source_path: str) -> Dict[str, "tsdfmetadata.TSDFMetadata"]:
     """
     Function used to parse the JSON object containing TSDF metadata. It returns a
@@ -163,6 +164,13 @@ def contains_tsdf_mandatory_fields(dictionary: Dict[str, Any]) -> bool:
         raise tsdfmetadata.TSDFMetadataFieldValueError(
             f"TSDF metadata structure must specify equal number of {units} and {channels} for each binary file."
         )
+    for key in ["data_type", "bits"]:
+        if isinstance(dictionary[key], list) and len(dictionary[key]) != len(
+            dictionary[channels]
+        ):
+            raise tsdfmetadata.TSDFMetadataFieldValueError(
+                f"When {key} is specified per channel, it must specify a value for each of the {channels}."
+            )
 
     for key, value in dictionary.items():
         _check_tsdf_property_format(key, value, version)
@@ -247,6 +255,8 @@ def is_iso8601(date_string: str) -> bool:
     # The parser is too lenient in accepting different formats
     iso8601_regex = r"^(-?(?:[1-9][0-9]*)?[0-9]{4})-(1[0-2]|0[1-9])-(3[01]|0[1-9]|[12][0-9])(T(2[0-3]|[01][0-9]):[0-5][0-9]:[0-5][0-9](?:\.[0-9]+)?(?:Z|[+-](?:2[0-3]|[01][0-9]):[0-5][0-9])?)?$"
     if re.match(iso8601_regex, date_string):
+        from dateutil import parser
+
         try:
             parser.parse(date_string)
             return True
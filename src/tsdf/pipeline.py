@@ -0,0 +1,169 @@
+"""
+Module for applying a function to a binary file associated with TSDF chunk by chunk, in parallel, and writing the result to a new binary file.
+
+Each chunk is read together with `overlap` rows (the halo) on both sides, so that functions depending on
+neighbouring rows (e.g., filters) have the context they need at the edges of the chunk. The halo rows are
+removed from the result, which is written in order to the new binary file while the next chunks are processed.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, Deque, Iterator, List, Optional
+import numpy as np
+from tsdf import read_binary
+from tsdf import write_binary
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+
+def map_chunks(
+    metadata: TSDFMetadata,
+    func: Callable[[np.ndarray], np.ndarray],
+    file_dir: str,
+    file_name: str,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    overlap: int = 0,
+    workers: Optional[int] = None,
+    use_processes: bool = False,
+    channels: Optional[List[str]] = None,
+    units: Optional[List[str]] = None,
+) -> TSDFMetadata:
+    """
+    Apply a function to a stream chunk by chunk and write the result to a new binary file. The function
+    receives the rows of a chunk together with up to `overlap` rows before and after it (fewer at the
+    edges of the stream), and has to return the same number of rows; the overlapping rows are removed from the result.
+
+    :param metadata: TSDFMetadata object of the binary file to be processed.
+    :param func: function mapping an array of rows to an array with the same number of rows. It has to be picklable if `use_processes` is set.
+    :param file_dir: path to the directory where the new binary file will be saved.
+    :param file_name: name of the new binary file.
+    :param chunk_rows: (optional) number of rows of each chunk (without the overlapping rows).
+    :param overlap: (optional) number of rows added on both sides of each chunk.
+    :param workers: (optional) number of chunks processed concurrently. By default, the number of processors.
+    :param use_processes: (optional) flag to process the chunks in worker processes instead of threads.
+    :param channels: (optional) channels of the result, if they differ from the channels of the stream.
+    :param units: (optional) units of the result, if they differ from the units of the stream.
+
+    :return: TSDFMetadata object describing the new binary file (the data properties are derived from the result).
+
+    :raises ValueError: if the chunk size or the overlap is invalid.
+    :raises TSDFMetadataFieldValueError: if the result of the function does not have the expected shape.
+    """
+    if chunk_rows < 1 or overlap < 0:
+        raise ValueError("The number of rows per chunk has to be positive, and the overlap non-negative.")
+    meta_dict = metadata.get_plain_tsdf_dict_copy()
+    meta_dict["file_name"] = file_name
+    if channels is not None:
+        meta_dict["channels"] = channels
+    if units is not None:
+        meta_dict["units"] = units
+    new_metadata = TSDFMetadata(meta_dict, file_dir)
+
+    workers = workers or os.cpu_count() or 1
+    pool_type = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with pool_type(workers) as executor:
+        write_binary.write_chunks_to_binaries(
+            file_dir,
+            _iterate_mapped_chunks(
+                executor,
+                metadata,
+                func,
+                chunk_rows,
+                overlap,
+                workers,
+                len(new_metadata.channels),
+            ),
+            [new_metadata],
+            total_rows=metadata.rows,
+            update_end_time=False,
+        )
+    return new_metadata
+
+
+def _iterate_mapped_chunks(
+    executor: Executor,
+    metadata: TSDFMetadata,
+    func: Callable[[np.ndarray], np.ndarray],
+    chunk_rows: int,
+    overlap: int,
+    workers: int,
+    n_channels: int,
+) -> Iterator[np.ndarray]:
+    """
+    Process the chunks of a stream with an executor and yield the results in order. At most twice the number
+    of workers are submitted ahead of the chunk being yielded, which bounds the memory used by pending results.
+
+    :param executor: executor processing the chunks.
+    :param metadata: TSDFMetadata object of the binary file to be processed.
+    :param func: function applied to each chunk.
+    :param chunk_rows: number of rows of each chunk.
+    :param overlap: number of rows added on both sides of each chunk.
+    :param workers: number of workers of the executor.
+    :param n_channels: expected number of channels of the results.
+
+    :return: iterator over the results, without the overlapping rows.
+    """
+    bounds = (
+        (start, min(start + chunk_rows, metadata.rows))
+        for start in range(0, metadata.rows, chunk_rows)
+    )
+    pending: Deque[Future] = deque()
+    for start, end in bounds:
+        pending.append(executor.submit(_map_chunk, metadata, func, start, end, overlap))
+        if len(pending) >= 2 * workers:
+            yield _check_result(pending.popleft().result(), n_channels)
+    while pending:
+        yield _check_result(pending.popleft().result(), n_channels)
+
+
+def _map_chunk(
+    metadata: TSDFMetadata,
+    func: Callable[[np.ndarray], np.ndarray],
+    start: int,
+    end: int,
+    overlap: int,
+) -> np.ndarray:
+    """
+    Read a chunk with its overlapping rows, apply the function and remove the overlapping rows from the result.
+
+    :param metadata: TSDFMetadata object of the binary file.
+    :param func: function applied to the chunk.
+    :param start: first row of the chunk.
+    :param end: row after the last row of the chunk.
+    :param overlap: number of rows added on both sides of the chunk.
+
+    :return: result of the function for the rows of the chunk.
+    """
+    # Fewer overlapping rows are available at the edges of the stream
+    before, after = min(overlap, start), min(overlap, metadata.rows - end)
+    data = read_binary.load_ndarray_from_binary(
+        metadata, start - before, end + after, native_byte_order=True
+    )
+    result = np.asarray(func(data))
+    if result.ndim == 0 or result.shape[0] != data.shape[0]:
+        raise TSDFMetadataFieldValueError(
+            f"The function has to return {data.shape[0]} rows, not {result.shape[0] if result.ndim else 0}."
+        )
+    return result[before : result.shape[0] - after]
+
+
+def _check_result(result: np.ndarray, n_channels: int) -> np.ndarray:
+    """
+    Check that the result of a chunk has a column for each channel of the new binary file.
+
+    :param result: result of a chunk.
+    :param n_channels: number of channels of the new binary file.
+
+    :return: the result.
+
+    :raises TSDFMetadataFieldValueError: if the number of columns does not match.
+    """
+    n_columns = result.shape[1] if result.ndim > 1 else 1
+    if n_columns != n_channels:
+        raise TSDFMetadataFieldValueError(
+            f"The function returned {n_columns} columns, but the result has {n_channels} channels."
+        )
+    return result
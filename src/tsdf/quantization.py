@@ -0,0 +1,164 @@
+"""
+Module for storing float channels as fixed-point integers, which the readers decode transparently.
+
+The channels of a binary file are analysed in a streaming pass (chunk by chunk), to find the range of each channel
+and whether its values are all whole numbers. Each channel is then stored as `round((value - offset) / scale)`,
+using the smallest unsigned integer type that fits all the channels. Channels of whole numbers are stored losslessly
+(with a scale of 1, or a larger whole scale if the tolerance allows it); other channels use a scale of just under
+twice the tolerance, so that every decoded value is within the tolerance of the original value.
+
+The encoding is declared in the metadata with `"value_encode": "fixed_point"`, together with the `value_scales`
+and `value_offsets` of the channels. These dedicated fields leave the `scale_factors` of the metadata (which convert
+the decoded values into physical units) untouched. The readers of `read_binary` decode such binary files to float64 values.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from typing import Any, Dict, List, NamedTuple, Optional, Tuple, Union
+import numpy as np
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata
+
+QUANTIZED_TYPES = [np.uint8, np.uint16, np.uint32]
+""" Integer types in which quantised channels can be stored, from the smallest. """
+
+ENCODING_FIELDS = ["value_encode", "value_scales", "value_offsets"]
+""" Metadata fields declaring the fixed-point encoding. """
+
+
+class Quantization(NamedTuple):
+    """Fixed-point encoding of the channels of a binary file."""
+
+    dtype: np.dtype
+    """Integer type in which the channels are stored."""
+    scale_factors: List[float]
+    """Scale of each channel."""
+    offsets: List[float]
+    """Offset of each channel."""
+
+
+def analyse(
+    data: np.ndarray, tolerance: float, chunk_rows: int = DEFAULT_CHUNK_ROWS
+) -> Optional[Quantization]:
+    """
+    Find the most compact fixed-point encoding of float data that meets a tolerance.
+
+    :param data: NumPy array of shape (rows,) or (rows, channels).
+    :param tolerance: largest absolute error allowed for each value (0 to only allow lossless encodings).
+    :param chunk_rows: (optional) number of rows analysed at once.
+
+    :return: encoding, or None if the data cannot be stored more compactly (e.g., it is not float data, contains
+             non-finite values, or has a channel that cannot be encoded losslessly with a tolerance of 0).
+    """
+    if data.dtype.kind != "f" or data.ndim not in (1, 2) or data.shape[0] == 0:
+        return None
+    values = data.reshape((data.shape[0], -1))
+    minimums = np.full(values.shape[1], np.inf)
+    maximums = np.full(values.shape[1], -np.inf)
+    whole = np.ones(values.shape[1], dtype=bool)
+    for start in range(0, values.shape[0], chunk_rows):
+        block = values[start : start + chunk_rows]
+        if not np.all(np.isfinite(block)):
+            return None
+        np.minimum(minimums, block.min(axis=0), out=minimums)
+        np.maximum(maximums, block.max(axis=0), out=maximums)
+        whole &= np.all(block == np.rint(block), axis=0)
+
+    # A scale of exactly twice the tolerance lets the rounding errors of decoding exceed the tolerance, so the
+    # scale of fractional channels leaves a margin of a few units in the last place of their largest values
+    magnitudes = np.maximum(np.abs(minimums), np.abs(maximums))
+    margins = 8 * np.spacing(magnitudes) + np.spacing(tolerance)
+    scales = np.where(whole, max(1.0, np.floor(2 * tolerance)), 2 * (tolerance - margins))
+    if np.any(scales <= 0):
+        return None
+    levels = np.rint((maximums - minimums) / scales).max()
+    for dtype in QUANTIZED_TYPES:
+        if levels <= np.iinfo(dtype).max:
+            break
+    else:
+        return None
+    if np.dtype(dtype).itemsize >= data.dtype.itemsize:
+        return None
+    return Quantization(np.dtype(dtype), scales.tolist(), minimums.tolist())
+
+
+def quantize(block: np.ndarray, quantization: Quantization) -> np.ndarray:
+    """
+    Encode rows of float data.
+
+    :param block: NumPy array of shape (rows,) or (rows, channels).
+    :param quantization: encoding of the channels.
+
+    :return: NumPy array of the integer type of the encoding.
+    """
+    scales, offsets = _get_parameters(block, quantization.scale_factors, quantization.offsets)
+    return np.rint((block - offsets) / scales).astype(quantization.dtype)
+
+
+def get_encoding_fields(quantization: Quantization) -> Dict[str, Any]:
+    """
+    :param quantization: encoding of the channels.
+
+    :return: metadata fields declaring the encoding.
+    """
+    return {
+        "value_encode": "fixed_point",
+        "value_scales": quantization.scale_factors,
+        "value_offsets": quantization.offsets,
+    }
+
+
+def is_quantized(metadata: TSDFMetadata) -> bool:
+    """
+    Check whether the channels of a binary file are stored as fixed-point integers.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: True if the channels are quantised, otherwise False.
+    """
+    return getattr(metadata, "value_encode", None) == "fixed_point"
+
+
+def decode(values: np.ndarray, metadata: TSDFMetadata) -> np.ndarray:
+    """
+    Decode rows of a quantised binary file.
+
+    :param values: NumPy array of shape (rows,) or (rows, channels), as stored in the binary file.
+    :param metadata: TSDFMetadata object of the binary file.
+
+    :return: float64 NumPy array of the same shape.
+    """
+    scales, offsets = _get_parameters(values, metadata.value_scales, metadata.value_offsets)
+    result = values.astype(np.float64)
+    result *= scales
+    result += offsets
+    return result
+
+
+def clear_encoding(metadata: Union[TSDFMetadata, Dict[str, Any]]) -> None:
+    """
+    Remove the fields declaring a fixed-point encoding, e.g., from metadata copied from a quantised binary file.
+
+    :param metadata: TSDFMetadata object or metadata dictionary.
+    """
+    fields = metadata if isinstance(metadata, dict) else metadata.__dict__
+    if fields.get("value_encode") == "fixed_point":
+        for field in ENCODING_FIELDS:
+            fields.pop(field, None)
+
+
+def _get_parameters(
+    values: np.ndarray, scale_factors: List[float], offsets: List[float]
+) -> Tuple[Any, Any]:
+    """
+    Shape the scales and offsets of the channels so that they broadcast with the values.
+
+    :param values: NumPy array of shape (rows,) or (rows, channels).
+    :param scale_factors: scale of each channel.
+    :param offsets: offset of each channel.
+
+    :return: tuple of the scales and the offsets (scalars for one-dimensional values).
+    """
+    if values.ndim == 1:
+        return scale_factors[0], offsets[0]
+    return np.asarray(scale_factors), np.asarray(offsets)
@@ -5,31 +5,55 @@ Reference: https://arxiv.org/abs/2211.11294
 """
 
 import os
-from typing import List, Union
+from typing import IO, TYPE_CHECKING, Dict, Iterator, List, Optional, Sequence, Tuple, Union
 import numpy as np
-import pandas as pd
+from tsdf import encodings
 from tsdf import numpy_utils
+from tsdf import quantization
+from tsdf import storage
+from tsdf.instrumentation import traced
 from tsdf import tsdfmetadata
-from tsdf.constants import ConcatenationType
+from tsdf.constants import COALESCE_GAP_SIZE, ConcatenationType, DEFAULT_CHUNK_ROWS
+
+if TYPE_CHECKING:
+    # pandas is slow to import, so it is only imported by the functions creating data frames
+    import pandas as pd
 
 
 def load_dataframe_from_binaries(
     metadatas: List["tsdfmetadata.TSDFMetadata"],
     concatenation: ConcatenationType = ConcatenationType.none,
-) -> Union[pd.DataFrame, List[pd.DataFrame]]:
+    native_byte_order: bool = False,
+    time_index: bool = False,
+    time_channel: Optional[str] = None,
+) -> Union["pd.DataFrame", List["pd.DataFrame"]]:
     """
     Load content of binary files associated with TSDF into a pandas DataFrame. The data frames can be concatenated horizontally (ConcatenationType.columns), vertically (ConcatenationType.rows) or provided as a list of data frames (ConcatenationType.none).
 
     :param metadatas: list of TSDFMetadata objects.
     :param concatenation: concatenation rule, i.e., determines whether the data frames (content of binary files) should be concatenated horizontally (ConcatenationType.columns), vertically (ConcatenationType.rows) or provided as a list of data frames (ConcatenationType.none).
+    :param native_byte_order: (optional) flag to convert the data to the byte order of the machine while it is read (see `load_ndarray_from_binary`).
+    :param time_index: (optional) flag to index the data frames by time (a UTC DatetimeIndex). The time stamps of a binary file are taken from
+                       its time channel (which is removed from the columns), else from the time channel of another binary file with the same
+                       number of rows and 'start_iso8601', else from 'start_iso8601' and 'sampling_rate'.
+    :param time_channel: (optional) name of the time channel. By default, `time_utils.TIME_CHANNEL`.
 
     :return: pandas DataFrame containing the combined data.
+
+    :raises tsdfmetadata.TSDFMetadataFieldValueError: if the time stamps of a binary file cannot be determined.
     """
+    import pandas as pd
+
     # Load the data
     data_frames = []
+    time_cache: Dict[int, np.ndarray] = {}
     for metadata in metadatas:
-        data = load_ndarray_from_binary(metadata)
-        df = pd.DataFrame(data, columns=metadata.channels)
+        data = load_ndarray_from_binary(
+            metadata, native_byte_order=native_byte_order
+        )
+        df = _create_dataframe(data, metadata.channels)
+        if time_index:
+            df = _set_time_index(df, metadata, metadatas, time_channel, time_cache)
         data_frames.append(df)
 
     # Merge the data
@@ -41,21 +65,98 @@ def load_dataframe_from_binaries(
         return data_frames
 
 
+@traced("build_dataframe")
+def _create_dataframe(data: np.ndarray, channels: List[str]) -> "pd.DataFrame":
+    """
+    Wrap the data of a binary file in a pandas DataFrame.
+
+    :param data: numpy array containing the data.
+    :param channels: names of the channels, used as column names.
+
+    :return: pandas DataFrame.
+    """
+    import pandas as pd
+
+    return pd.DataFrame(data, columns=channels)
+
+
+def _set_time_index(
+    df: "pd.DataFrame",
+    metadata: "tsdfmetadata.TSDFMetadata",
+    metadatas: List["tsdfmetadata.TSDFMetadata"],
+    time_channel: Optional[str],
+    time_cache: Dict[int, np.ndarray],
+) -> "pd.DataFrame":
+    """
+    Index the data frame of a binary file by the time stamps of its rows (see `load_dataframe_from_binaries`).
+
+    :param df: pandas DataFrame containing the data of the binary file.
+    :param metadata: TSDFMetadata object of the binary file.
+    :param metadatas: TSDFMetadata objects of all the loaded binary files, which may contain the time channel.
+    :param time_channel: name of the time channel, or None for the default name.
+    :param time_cache: time stamps that have already been loaded, by identifier of the metadata object of the time channel.
+
+    :return: pandas DataFrame indexed by time.
+
+    :raises tsdfmetadata.TSDFMetadataFieldValueError: if the only time channels with the same number of rows start at another time.
+    """
+    import pandas as pd
+    from tsdf import time_utils
+
+    channel = time_channel or time_utils.TIME_CHANNEL
+    if channel in metadata.channels:
+        source: Optional["tsdfmetadata.TSDFMetadata"] = metadata
+    else:
+        # The time channel of another binary file only applies to rows of the same recording
+        candidates = [m for m in metadatas if channel in m.channels and m.rows == metadata.rows]
+        start = time_utils.iso8601_to_ns(metadata.start_iso8601)
+        source = next(
+            (m for m in candidates if time_utils.iso8601_to_ns(m.start_iso8601) == start),
+            None,
+        )
+        if source is None and len(candidates) > 0:
+            raise tsdfmetadata.TSDFMetadataFieldValueError(
+                f"The time channel of {candidates[0].file_name} does not start at the same time as {metadata.file_name}."
+            )
+
+    if source is None:
+        times = time_utils.get_sampled_time_ns(metadata)
+    elif id(source) in time_cache:
+        times = time_cache[id(source)]
+    else:
+        times = time_utils.load_time_ns(source, time_channel=channel)
+        time_cache[id(source)] = times
+
+    df.index = pd.DatetimeIndex(times.view("datetime64[ns]"), name=channel).tz_localize("UTC")
+    if channel in df.columns:
+        df = df.drop(columns=channel)
+    return df
+
+
 def load_ndarray_from_binary(
-    metadata: "tsdfmetadata.TSDFMetadata", start_row: int = 0, end_row: int = -1
+    metadata: "tsdfmetadata.TSDFMetadata",
+    start_row: int = 0,
+    end_row: int = -1,
+    native_byte_order: bool = False,
 ) -> np.ndarray:
     """
     Use metadata properties to load and return numpy array from a binary file (located the same directory where the metadata is saved).
+    Quantised binary files (see `quantization`) are decoded to float64 values.
 
     :param metadata: TSDFMetadata object.
     :param start_row: (optional) first row to load.
     :param end_row: (optional) last row to load. If -1, load all rows.
+    :param native_byte_order: (optional) flag to convert the data to the byte order of the machine. The bytes are
+                              swapped in place in the array they are read into, so numpy and pandas operations on the
+                              result do not have to handle a non-native byte order.
 
     :return: numpy array containing the data."""
+    if encodings.is_generated(metadata):
+        return encodings.generate_rows(metadata, start_row, end_row)
     metadata_dir = metadata.file_dir_path
 
     bin_path = os.path.join(metadata_dir, metadata.file_name)
-    return _load_binary_file(
+    values = _load_binary_file(
         bin_path,
         metadata.data_type,
         metadata.bits,
@@ -64,18 +165,268 @@ def load_ndarray_from_binary(
         len(metadata.channels),
         start_row,
         end_row,
+        metadata.channels,
+        native_byte_order,
+    )
+    if quantization.is_quantized(metadata):
+        return quantization.decode(values, metadata)
+    return values
+
+
+def load_row_ranges(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    ranges: Sequence[Tuple[int, int]],
+    max_gap_size: int = COALESCE_GAP_SIZE,
+    concatenate: bool = False,
+    native_byte_order: bool = False,
+) -> Union[List[np.ndarray], Tuple[np.ndarray, np.ndarray]]:
+    """
+    Load many row ranges of a binary file at once. The ranges are sorted, and ranges that overlap or are separated
+    by at most `max_gap_size` bytes are coalesced, so the file is opened once and read with a few large reads
+    (with `os.preadv` where available) into a single buffer.
+
+    :param metadata: TSDFMetadata object.
+    :param ranges: sequence of (first row, row after the last row) tuples, in any order.
+    :param max_gap_size: (optional) largest number of bytes between two ranges that are read together (the bytes in between are read and discarded).
+    :param concatenate: (optional) flag to return the ranges as one concatenated array, instead of a list of arrays.
+    :param native_byte_order: (optional) flag to convert the data to the byte order of the machine (see `load_ndarray_from_binary`).
+
+    :return: list of numpy arrays (views into one buffer), one for each range in the given order; or, if `concatenate` is set,
+             a tuple of the concatenated array and the offsets of the ranges in it (one more than the number of ranges).
+    """
+    bounds = np.asarray(ranges, dtype=np.int64).reshape((-1, 2))
+    if np.any(bounds[:, 0] < 0) or np.any(bounds[:, 1] < bounds[:, 0]) or np.any(bounds[:, 1] > metadata.rows):
+        raise IndexError(f"Row ranges have to be within the {metadata.rows} rows of {metadata.file_name}.")
+    if encodings.is_generated(metadata):
+        pieces = [encodings.generate_rows(metadata, int(start), int(end)) for start, end in bounds]
+    else:
+        pieces = _read_row_ranges(metadata, bounds, max_gap_size, native_byte_order)
+
+    if not concatenate:
+        return pieces
+    offsets = np.concatenate([[0], np.cumsum(bounds[:, 1] - bounds[:, 0])]).astype(np.int64)
+    if len(pieces) == 0:
+        dtype, n_columns = _get_decoded_row_format(metadata)
+        return np.empty((0, n_columns) if n_columns > 1 else (0,), dtype=dtype), offsets
+    return np.concatenate(pieces), offsets
+
+
+def _read_row_ranges(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    bounds: np.ndarray,
+    max_gap_size: int,
+    native_byte_order: bool,
+) -> List[np.ndarray]:
+    """
+    Read row ranges of a binary file, coalescing nearby ranges into single reads (see `load_row_ranges`).
+
+    :param metadata: TSDFMetadata object.
+    :param bounds: array of shape (ranges, 2) containing the first row and the row after the last row of each range.
+    :param max_gap_size: largest number of bytes between two ranges that are read together.
+    :param native_byte_order: flag to convert the data to the byte order of the machine.
+
+    :return: list of numpy arrays (views into one buffer), one for each range.
+    """
+    dtype, n_columns = _get_row_format(metadata)
+    row_size = n_columns * dtype.itemsize
+
+    # Coalesce the sorted ranges into reads, skipping empty ranges
+    order = np.argsort(bounds[:, 0], kind="stable")
+    max_gap_rows = max_gap_size // row_size
+    read_starts: List[int] = []
+    read_ends: List[int] = []
+    for start, end in bounds[order]:
+        if start == end:
+            continue
+        if read_ends and start <= read_ends[-1] + max_gap_rows:
+            read_ends[-1] = max(read_ends[-1], int(end))
+        else:
+            read_starts.append(int(start))
+            read_ends.append(int(end))
+    read_rows = np.subtract(read_ends, read_starts, dtype=np.int64)
+    buffer_offsets = np.concatenate([[0], np.cumsum(read_rows)]).astype(np.int64)
+
+    buffer = np.empty(int(buffer_offsets[-1]) * row_size, dtype=np.uint8)
+    bin_path = os.path.join(metadata.file_dir_path, metadata.file_name)
+    _read_regions(
+        bin_path,
+        [start * row_size for start in read_starts],
+        [buffer[offset * row_size : (offset + rows) * row_size] for offset, rows in zip(buffer_offsets, read_rows)],
+    )
+
+    values = buffer.view(dtype)
+    if native_byte_order and not dtype.isnative:
+        values = values.byteswap(inplace=True).view(dtype.newbyteorder("="))
+    if n_columns > 1:
+        values = values.reshape((-1, n_columns))
+    if quantization.is_quantized(metadata):
+        values = quantization.decode(values, metadata)
+
+    # Locate each range within the read that contains it
+    read_index = np.searchsorted(read_starts, bounds[:, 0], side="right") - 1
+    pieces = []
+    for (start, end), index in zip(bounds, read_index):
+        if start == end:
+            pieces.append(values[:0])
+            continue
+        offset = buffer_offsets[index] + start - read_starts[index]
+        pieces.append(values[offset : offset + end - start])
+    return pieces
+
+
+def _read_regions(path: str, file_offsets: List[int], buffers: List[np.ndarray]) -> None:
+    """
+    Read regions of a file into buffers, using positional reads on one file descriptor where possible.
+
+    :param path: path to the file (which may be a member of an archive).
+    :param file_offsets: offset of each region within the file.
+    :param buffers: byte buffers to be filled, one for each region (their lengths determine the sizes of the regions).
+
+    :raises Exception: if the file is shorter than expected.
+    """
+    region = storage.get_data_region(path)
+    if region is None or not hasattr(os, "preadv"):
+        # Compressed archive members (and platforms without positional reads) are read sequentially
+        with storage.open_binary(path) as fid:
+            for offset, buffer in zip(file_offsets, buffers):
+                fid.seek(offset)
+                if fid.readinto(buffer) != buffer.shape[0]:
+                    raise Exception("Number of rows doesn't match file length.")
+        return
+
+    file_path, data_offset = region
+    fd = os.open(file_path, os.O_RDONLY)
+    try:
+        for offset, buffer in zip(file_offsets, buffers):
+            n_read = 0
+            while n_read < buffer.shape[0]:
+                count = os.preadv(fd, [buffer[n_read:]], data_offset + offset + n_read)
+                if count == 0:
+                    raise Exception("Number of rows doesn't match file length.")
+                n_read += count
+    finally:
+        os.close(fd)
+
+
+def _get_row_format(metadata: "tsdfmetadata.TSDFMetadata") -> Tuple[np.dtype, int]:
+    """
+    Compute the NumPy data type of the values in a binary file and the number of values per row.
+    Rows of binary files mixing data types are represented by a single record (structured data type).
+
+    :param metadata: TSDFMetadata object.
+
+    :return: tuple of the NumPy data type and the number of values per row.
+    """
+    dtype = numpy_utils.dtype_tsdf_to_numpy(
+        metadata.data_type, metadata.bits, metadata.endianness, metadata.channels
     )
+    n_columns = 1 if dtype.names is not None else len(metadata.channels)
+    return dtype, n_columns
+
+
+def _get_decoded_row_format(metadata: "tsdfmetadata.TSDFMetadata") -> Tuple[np.dtype, int]:
+    """
+    Compute the NumPy data type of the values returned by the readers (after decoding quantised values) and the number of values per row.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: tuple of the NumPy data type and the number of values per row.
+    """
+    dtype, n_columns = _get_row_format(metadata)
+    if quantization.is_quantized(metadata):
+        dtype = np.dtype(np.float64)
+    return dtype, n_columns
 
 
+def load_memmap_from_binary(metadata: "tsdfmetadata.TSDFMetadata") -> np.ndarray:
+    """
+    Use metadata properties to memory-map a binary file as a read-only numpy array. The data is only read from disk when it is accessed.
+    Binary files stored uncompressed in an archive are memory-mapped within the archive file; compressed ones
+    (as well as constant rate time channels, quantised binary files and empty files) are loaded into memory.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: numpy array containing the data: a `np.memmap` if the file can be memory-mapped, otherwise a plain in-memory array.
+    """
+    if encodings.is_generated(metadata):
+        return encodings.generate_rows(metadata)
+    if quantization.is_quantized(metadata):
+        # Quantised values have to be decoded, so they are loaded into memory
+        return load_ndarray_from_binary(metadata)
+    bin_path = os.path.join(metadata.file_dir_path, metadata.file_name)
+    dtype, n_columns = _get_row_format(metadata)
+    shape = (metadata.rows, n_columns) if n_columns > 1 else (metadata.rows,)
+    if storage.get_file_size(bin_path) != metadata.rows * n_columns * dtype.itemsize:
+        raise Exception("Number of rows doesn't match file length.")
+    if metadata.rows == 0:
+        # Empty files cannot be memory-mapped
+        return np.empty(shape, dtype=dtype)
+    region = storage.get_data_region(bin_path)
+    if region is None:
+        return load_ndarray_from_binary(metadata)
+    file_path, offset = region
+    return np.memmap(file_path, dtype=dtype, mode="r", offset=offset, shape=shape)
+
+
+def load_ndarray_chunks(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    start_row: int = 0,
+    end_row: int = -1,
+    native_byte_order: bool = False,
+) -> Iterator[np.ndarray]:
+    """
+    Use metadata properties to iterate over a binary file in consecutive chunks of rows. The file is opened once and read sequentially, so only one chunk is kept in memory at a time.
+
+    :param metadata: TSDFMetadata object.
+    :param chunk_rows: (optional) maximal number of rows in each chunk.
+    :param start_row: (optional) first row to load.
+    :param end_row: (optional) last row to load. If -1, load all rows.
+    :param native_byte_order: (optional) flag to convert each chunk to the byte order of the machine while it is read.
+
+    :return: iterator over numpy arrays containing consecutive chunks of the data.
+    """
+    if chunk_rows < 1:
+        raise ValueError("The number of rows per chunk has to be positive.")
+    bin_path = os.path.join(metadata.file_dir_path, metadata.file_name)
+    dtype, n_columns = _get_row_format(metadata)
+    row_size = n_columns * dtype.itemsize
+    if end_row == -1:
+        end_row = metadata.rows
+
+    if encodings.is_generated(metadata):
+        for chunk_start in range(start_row, end_row, chunk_rows):
+            yield encodings.generate_rows(
+                metadata, chunk_start, min(chunk_start + chunk_rows, end_row)
+            )
+        return
+
+    with storage.open_binary(bin_path) as fid:
+        fid.seek(start_row * row_size)
+        for chunk_start in range(start_row, end_row, chunk_rows):
+            chunk_end = min(chunk_start + chunk_rows, end_row)
+            values = _read_rows(
+                fid, chunk_end - chunk_start, dtype, n_columns, native_byte_order
+            )
+            if values.shape[0] != chunk_end - chunk_start:
+                raise Exception("Number of rows doesn't match file length.")
+            if quantization.is_quantized(metadata):
+                values = quantization.decode(values, metadata)
+            yield values
+
+
+@traced("read_binary", lambda values, *args, **kwargs: values.nbytes)
 def _load_binary_file(
     bin_file_path: str,
-    data_type: str,
-    n_bits: int,
+    data_type: Union[str, List[str]],
+    n_bits: Union[int, List[int]],
     endianness: str,
     n_rows: int,
     n_columns: int,
     start_row: int = 0,
     end_row: int = -1,
+    channels: Optional[List[str]] = None,
+    native_byte_order: bool = False,
 ) -> np.ndarray:
     """
     Use provided parameters to load and return a numpy array from a binary file.
@@ -88,27 +439,81 @@ def _load_binary_file(
     :param n_columns: number of columns in the binary file.
     :param start_row: (optional) first row to load.
     :param end_row: (optional) last row to load. If -1, load all rows.
+    :param channels: (optional) names of the channels, used as field names when the data types differ per channel.
+    :param native_byte_order: (optional) flag to convert the data to the byte order of the machine.
 
-    :return: numpy array containing the data.
+    :return: numpy array containing the data. If the data types differ per channel, each row is a record (structured array).
     """
 
-    s_endianness = numpy_utils.endianness_tsdf_to_numpy(endianness)
-    s_type = numpy_utils.data_type_tsdf_to_numpy(data_type)
-    s_n_bytes = numpy_utils.bytes_tsdf_to_numpy(n_bits)
-    format_string = "".join([s_endianness, s_type, s_n_bytes])
+    dtype = numpy_utils.dtype_tsdf_to_numpy(data_type, n_bits, endianness, channels)
+    if dtype.names is not None:
+        n_columns = 1
 
     # Load the data and reshape
-    with open(bin_file_path, "rb") as fid:
-        fid.seek(start_row * n_columns * n_bits // 8)
+    with storage.open_binary(bin_file_path) as fid:
+        fid.seek(start_row * n_columns * dtype.itemsize)
         if end_row == -1:
             end_row = n_rows
-        buffer = fid.read((end_row - start_row) * n_columns * n_bits // 8)
-        values = np.frombuffer(buffer, dtype=format_string)
-        if n_columns > 1:
-            values = values.reshape((-1, n_columns))
+        values = _read_rows(fid, end_row - start_row, dtype, n_columns, native_byte_order)
 
     # Check whether the number of rows matches the metadata
     if values.shape[0] != end_row - start_row:
         raise Exception("Number of rows doesn't match file length.")
 
     return values
+
+
+def _read_rows(
+    fid: IO[bytes],
+    n_rows: int,
+    dtype: np.dtype,
+    n_columns: int,
+    native_byte_order: bool = False,
+) -> np.ndarray:
+    """
+    Read rows from the current position of an opened binary file.
+
+    :param fid: opened binary file.
+    :param n_rows: number of rows to read.
+    :param dtype: NumPy data type of the values.
+    :param n_columns: number of values per row.
+    :param native_byte_order: (optional) flag to convert the values to the byte order of the machine.
+
+    :return: numpy array containing the rows that were read (fewer than requested at the end of the file).
+
+    :raises Exception: if the file ends within a row.
+    """
+    row_size = n_columns * dtype.itemsize
+    if not native_byte_order or dtype.isnative:
+        buffer = fid.read(n_rows * row_size)
+        _check_whole_rows(len(buffer), row_size)
+        values = np.frombuffer(buffer, dtype=dtype)
+    else:
+        # Read into the output array and swap the bytes in place, instead of converting a copy
+        values = np.empty(n_rows * n_columns, dtype=dtype)
+        raw = values.view(np.uint8)
+        n_read = 0
+        while n_read < raw.shape[0]:
+            count = fid.readinto(raw[n_read:])
+            if not count:
+                break
+            n_read += count
+        _check_whole_rows(n_read, row_size)
+        values = values[: n_read // dtype.itemsize]
+        values = values.byteswap(inplace=True).view(dtype.newbyteorder("="))
+    if n_columns > 1:
+        values = values.reshape((-1, n_columns))
+    return values
+
+
+def _check_whole_rows(n_bytes: int, row_size: int) -> None:
+    """
+    Check that a number of bytes read from a binary file consists of whole rows.
+
+    :param n_bytes: number of bytes read.
+    :param row_size: number of bytes per row.
+
+    :raises Exception: if the last row is incomplete.
+    """
+    if n_bytes % row_size != 0:
+        raise Exception("Number of rows doesn't match file length.")
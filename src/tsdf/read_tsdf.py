@@ -7,18 +7,21 @@ Reference: https://arxiv.org/abs/2211.11294
 import json
 import os
 from pathlib import Path
-from typing import Dict, List
+from typing import IO, Dict, List, Union
+from tsdf import archives
 from tsdf import file_utils 
 from tsdf.constants import METADATA_NAMING_PATTERN
 from tsdf import parse_metadata 
 from tsdf import legacy_tsdf_utils 
+from tsdf import storage
 from tsdf.tsdfmetadata import TSDFMetadata
 
 
 def load_metadata_file(file) -> Dict[str, TSDFMetadata]:
     """Loads a TSDF metadata file, returns a dictionary
 
-    :param file: file object containing the TSDF metadata.
+    :param file: file object containing the TSDF metadata. Binary files are located relative to
+                 its `name` attribute; file objects without a name resolve them relative to the working directory.
 
     :return: dictionary of TSDFMetadata objects.
     """
@@ -26,7 +29,7 @@ def load_metadata_file(file) -> Dict[str, TSDFMetadata]:
     # The data is isomorphic to a JSON
     data = json.load(file)
 
-    abs_path = os.path.realpath(file.name)
+    abs_path = _get_source_path(file)
 
     # Parse the data and verify that it complies with TSDF requirements
     return parse_metadata.read_data(data, abs_path)
@@ -42,7 +45,7 @@ def load_metadata_legacy_file(file) -> Dict[str, TSDFMetadata]:
     # The data is isomorphic to a JSON
     legacy_data = json.load(file)
 
-    abs_path = os.path.realpath(file.name)
+    abs_path = _get_source_path(file)
 
     tsdf_data = legacy_tsdf_utils.convert_tsdb_to_tsdf(legacy_data)
 
@@ -55,13 +58,16 @@ def load_metadatas_from_dir(
     """
     Loads all TSDF metadata files in a directory, returns a dictionary
 
-    :param dir_path: path to the directory containing the TSDF metadata files.
+    :param dir_path: path to the directory containing the TSDF metadata files. This can also be a ZIP or TAR archive, or a directory within one.
     :param naming_pattern: (optional) naming pattern of the TSDF metadata files .
 
     :return: dictionary of TSDFMetadata objects.
     """
     # Get all files in the directory
-    file_paths = file_utils.get_files_matching(dir_path, naming_pattern)
+    if archives.is_archive(dir_path):
+        file_paths = archives.get_files_matching(dir_path, naming_pattern)
+    else:
+        file_paths = file_utils.get_files_matching(dir_path, naming_pattern)
 
     # Load all files
     metadatas = []
@@ -72,23 +78,48 @@ def load_metadatas_from_dir(
     return metadatas
 
 
-def load_metadata_from_path(path: Path) -> Dict[str, TSDFMetadata]:
+def load_metadata_from_path(path: Union[Path, IO]) -> Dict[str, TSDFMetadata]:
     """
     Loads a TSDF metadata file, returns a dictionary
 
-    :param path: path to the TSDF metadata file.
+    :param path: path to the TSDF metadata file, which may be located within a ZIP or TAR archive
+                 (e.g., `recordings.zip/session_1/meta.json`) or a mounted storage backend (see `storage`),
+                 or a file object (see `load_metadata_file`).
 
     :return: dictionary of TSDFMetadata objects.
     """
+    if hasattr(path, "read"):
+        return load_metadata_file(path)
+
     # The data is isomorphic to a JSON
-    with open(path, "r") as file:
+    with storage.open_binary(path) as file:
         data = json.load(file)
 
-    abs_path = os.path.realpath(path)
+    abs_path = _get_source_path(path)
     # Parse the data and verify that it complies with TSDF requirements
     return parse_metadata.read_data(data, abs_path)
 
 
+def _get_source_path(path: Union[Path, IO]) -> str:
+    """
+    Compute the absolute path of a metadata file, used to locate the binary files.
+
+    :param path: path to the metadata file (possibly within an archive), or a file object.
+
+    :return: absolute path, or an empty string for file objects without a name.
+    """
+    if hasattr(path, "read"):
+        path = getattr(path, "name", "")
+        if not path or not isinstance(path, (str, os.PathLike)):
+            return ""
+    if storage.is_mounted(path):
+        return os.fspath(path)
+    split = archives.split_archive_path(path)
+    if split is not None:
+        return os.path.join(os.path.realpath(split[0]), split[1])
+    return os.path.realpath(path)
+
+
 def load_metadata_string(json_str) -> Dict[str, TSDFMetadata]:
     """
     Loads a TSDF metadata string, returns a dictionary.
@@ -0,0 +1,230 @@
+"""
+Module for resampling binary files associated with TSDF to a fixed sampling rate.
+
+The time stamps and values are processed in chunks, and the last sample of each chunk
+is carried over to the next one, so the result is the same as resampling the whole recording at once.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from typing import Any, Iterable, Iterator, Tuple
+import numpy as np
+from tsdf import quantization
+from tsdf import read_binary
+from tsdf import segments
+from tsdf import time_utils
+from tsdf import write_binary
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+RESAMPLING_METHODS = ["linear", "nearest", "previous"]
+""" Supported interpolation methods. """
+
+STALE_FIELDS = [segments.SEGMENTS_KEY, "time_encode", "time_exceptions"]
+""" Metadata fields of the original stream that do not describe the resampled stream. """
+
+
+def iterate_resampled_chunks(
+    time_metadata: TSDFMetadata,
+    values_metadata: TSDFMetadata,
+    rate: float,
+    method: str = "linear",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Resample a stream to a fixed rate, chunk by chunk. The new time stamps start at the first
+    time stamp of the stream and are spaced by `1 / rate` seconds (expressed in the unit of the time channel).
+
+    :param time_metadata: TSDFMetadata object of the binary file containing the time channel.
+    :param values_metadata: TSDFMetadata object of the binary file containing the values (with the same number of rows).
+    :param rate: target sampling rate in Hz.
+    :param method: (optional) interpolation method; one of `RESAMPLING_METHODS`.
+    :param chunk_rows: (optional) number of rows read at once.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: iterator over tuples of new time stamps and corresponding (interpolated) values.
+
+    :raises TSDFMetadataFieldValueError: if the time and values files have a different number of rows, or the values file mixes data types.
+    """
+    if method not in RESAMPLING_METHODS:
+        raise ValueError(
+            f"Resampling method '{method}' is not supported. Supported methods are: {RESAMPLING_METHODS}."
+        )
+    if rate <= 0:
+        raise ValueError("The sampling rate has to be positive.")
+    if time_metadata.rows != values_metadata.rows:
+        raise TSDFMetadataFieldValueError(
+            f"Binary files {time_metadata.file_name} and {values_metadata.file_name} have a different number of rows."
+        )
+    if isinstance(values_metadata.data_type, list):
+        raise TSDFMetadataFieldValueError(
+            f"Resampling requires channels of a single data type, but {values_metadata.file_name} mixes data types."
+        )
+
+    step = 1.0 / (rate * time_utils.get_seconds_per_time_unit(time_metadata, time_channel))
+    single_channel = len(values_metadata.channels) == 1
+    start_time = None
+    next_index = 0
+    carry_time = None
+    carry_values = None
+
+    chunks = zip(
+        time_utils.iterate_time_chunks(time_metadata, chunk_rows, time_channel),
+        read_binary.load_ndarray_chunks(values_metadata, chunk_rows),
+    )
+    for (times, values), is_last in _mark_last(chunks):
+        if values.ndim == 1:
+            values = values.reshape((-1, 1))
+        if carry_time is not None:
+            times = np.concatenate([[carry_time], times])
+            values = np.concatenate([carry_values[np.newaxis], values])
+        if times.shape[0] == 0:
+            continue
+        if start_time is None:
+            start_time = times[0]
+
+        last_index = int(np.floor((times[-1] - start_time) / step))
+        grid = start_time + np.arange(next_index, last_index + 1) * step
+        # Grid points at or after the last time stamp are handled with the next chunk
+        grid = grid[grid <= times[-1]] if is_last else grid[grid < times[-1]]
+        if grid.shape[0] > 0:
+            resampled = interpolate(times, values, grid, method)
+            yield grid, resampled[:, 0] if single_channel else resampled
+            next_index += grid.shape[0]
+
+        carry_time = times[-1]
+        carry_values = values[-1]
+
+
+def resample(
+    time_metadata: TSDFMetadata,
+    values_metadata: TSDFMetadata,
+    rate: float,
+    method: str = "linear",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Resample a stream to a fixed rate and return the result as numpy arrays.
+    See `iterate_resampled_chunks` for the description of the parameters.
+
+    :return: tuple of the new time stamps and the corresponding (interpolated) values.
+    """
+    time_chunks = []
+    value_chunks = []
+    for times, values in iterate_resampled_chunks(
+        time_metadata, values_metadata, rate, method, chunk_rows, time_channel
+    ):
+        time_chunks.append(times)
+        value_chunks.append(values)
+    if len(time_chunks) == 0:
+        n_channels = len(values_metadata.channels)
+        return np.empty(0), np.empty(0) if n_channels == 1 else np.empty((0, n_channels))
+    return np.concatenate(time_chunks), np.concatenate(value_chunks)
+
+
+def resample_to_binaries(
+    time_metadata: TSDFMetadata,
+    values_metadata: TSDFMetadata,
+    rate: float,
+    file_dir: str,
+    time_file_name: str,
+    values_file_name: str,
+    method: str = "linear",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> Tuple[TSDFMetadata, TSDFMetadata]:
+    """
+    Resample a stream to a fixed rate and write the result, chunk by chunk, to new binary files.
+    The new time channel contains absolute time stamps (float64) in the unit of the original time channel.
+    See `iterate_resampled_chunks` for the description of the remaining parameters.
+
+    :param file_dir: path to the directory where the files will be saved.
+    :param time_file_name: name of the binary file for the new time stamps.
+    :param values_file_name: name of the binary file for the resampled values.
+
+    :return: tuple of TSDFMetadata objects describing the new time and values files.
+    """
+    time_index = time_utils.get_time_channel_index(time_metadata, time_channel)
+    time_dict = time_metadata.get_plain_tsdf_dict_copy()
+    # The tick of an encoded time channel does not apply to the new (float) time stamps
+    time_dict.pop("scale_factors", None)
+    time_dict.update(
+        {
+            "channels": [time_metadata.channels[time_index]],
+            "units": [time_metadata.units[time_index]],
+        }
+    )
+    values_dict = values_metadata.get_plain_tsdf_dict_copy()
+
+    new_metadatas = []
+    for meta_dict, file_name in [
+        (time_dict, time_file_name),
+        (values_dict, values_file_name),
+    ]:
+        # The segments and encodings of the original stream do not describe the resampled rows
+        for field in STALE_FIELDS:
+            meta_dict.pop(field, None)
+        quantization.clear_encoding(meta_dict)
+        meta_dict.update({"file_name": file_name, "sampling_rate": rate})
+        new_metadatas.append(TSDFMetadata(meta_dict, file_dir))
+
+    write_binary.write_chunks_to_binaries(
+        file_dir,
+        iterate_resampled_chunks(
+            time_metadata, values_metadata, rate, method, chunk_rows, time_channel
+        ),
+        new_metadatas,
+        update_end_time=False,
+    )
+    return new_metadatas[0], new_metadatas[1]
+
+
+def interpolate(
+    times: np.ndarray, values: np.ndarray, grid: np.ndarray, method: str
+) -> np.ndarray:
+    """
+    Interpolate the values at the given time stamps, which lie within the range of `times`.
+
+    :param times: sorted time stamps of the samples.
+    :param values: numpy array of shape (rows, channels) containing the samples.
+    :param grid: time stamps at which the values are interpolated.
+    :param method: interpolation method; one of `RESAMPLING_METHODS`.
+
+    :return: numpy array of shape (len(grid), channels) containing the interpolated values.
+    """
+    left = np.searchsorted(times, grid, side="right") - 1
+    if method == "previous":
+        return values[left]
+
+    right = np.minimum(left + 1, times.shape[0] - 1)
+    if method == "nearest":
+        closer_right = (times[right] - grid) < (grid - times[left])
+        return values[np.where(closer_right, right, left)]
+
+    interval = times[right] - times[left]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        fraction = np.where(interval > 0, (grid - times[left]) / interval, 0.0)
+    left_values = values[left].astype(np.float64)
+    right_values = values[right].astype(np.float64)
+    return left_values + (right_values - left_values) * fraction[:, np.newaxis]
+
+
+def _mark_last(iterable: Iterable[Any]) -> Iterator[Tuple[Any, bool]]:
+    """
+    Iterate over the elements, marking whether each element is the last one.
+
+    :param iterable: elements to iterate over.
+
+    :return: iterator over tuples of an element and a flag that is True for the last element.
+    """
+    iterator = iter(iterable)
+    try:
+        previous = next(iterator)
+    except StopIteration:
+        return
+    for element in iterator:
+        yield previous, False
+        previous = element
+    yield previous, True
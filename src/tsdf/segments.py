@@ -0,0 +1,319 @@
+"""
+Module for describing recordings with gaps by a table of contiguous segments.
+
+The optional `segments` metadata field lists, for each contiguous part of a recording, its start and
+end time (`start_iso8601`, `end_iso8601`), the first row of the segment in the binary file (`row_offset`),
+and its number of rows (`rows`). Gaps between segments are not stored in the binary file. Within a segment,
+the rows of a time range are found by a binary search of the time channel, so the samples do not have to be
+equally spaced in time.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from datetime import datetime
+from bisect import bisect_left
+from typing import Any, Dict, List, Optional, Tuple, Union
+import numpy as np
+from tsdf import read_binary
+from tsdf import time_utils
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+SEGMENTS_KEY = "segments"
+""" Name of the metadata field containing the segment table. """
+
+class SegmentTable:
+    """
+    Parsed segment table, used to map time ranges to row ranges in O(log n) (for n segments). The rows within
+    a segment are found by a binary search of the time channel, which only reads the probed rows.
+    """
+
+    starts: np.ndarray
+    """Start time of each segment (in ns since the Unix epoch)."""
+    ends: np.ndarray
+    """End time of each segment (in ns since the Unix epoch)."""
+    row_offsets: np.ndarray
+    """First row of each segment."""
+    rows: np.ndarray
+    """Number of rows of each segment."""
+    time_metadata: Optional[TSDFMetadata]
+    """Binary file containing the time channel of the rows, searched to find the rows within a segment."""
+
+    def __init__(
+        self,
+        segments: List[Dict[str, Any]],
+        time_metadata: Optional[TSDFMetadata] = None,
+        time_origin: Optional[Union[str, datetime]] = None,
+        time_channel: str = time_utils.TIME_CHANNEL,
+    ) -> None:
+        """
+        :param segments: segment table, as stored in the `segments` metadata field (sorted by time).
+        :param time_metadata: (optional) TSDFMetadata object of the binary file containing the time channel, with the same rows as the segments.
+                              It is required to select part of a segment.
+        :param time_origin: (optional) time corresponding to the value 0 of the time channel. By default, the start of the recording (`start_iso8601`).
+        :param time_channel: (optional) name of the time channel.
+
+        :raises TSDFMetadataFieldValueError: if the segments are not sorted or overlap.
+        """
+        self.time_metadata = time_metadata
+        self._time_origin = time_origin
+        self._time_channel = time_channel
+        self._times: Optional[np.ndarray] = None
+        self.starts = np.array(
+            [time_utils.iso8601_to_ns(s["start_iso8601"]) for s in segments],
+            dtype=np.int64,
+        )
+        self.ends = np.array(
+            [time_utils.iso8601_to_ns(s["end_iso8601"]) for s in segments],
+            dtype=np.int64,
+        )
+        self.row_offsets = np.array([s["row_offset"] for s in segments], dtype=np.int64)
+        self.rows = np.array([s["rows"] for s in segments], dtype=np.int64)
+        if np.any(self.ends < self.starts) or np.any(self.starts[1:] < self.ends[:-1]):
+            raise TSDFMetadataFieldValueError(
+                "Segments have to be sorted by time and must not overlap."
+            )
+        if np.any(self.row_offsets[1:] < self.row_offsets[:-1] + self.rows[:-1]):
+            raise TSDFMetadataFieldValueError("Rows of the segments must not overlap.")
+
+    @classmethod
+    def from_metadata(
+        cls,
+        metadata: TSDFMetadata,
+        time_metadata: Optional[TSDFMetadata] = None,
+        time_channel: str = time_utils.TIME_CHANNEL,
+    ) -> "SegmentTable":
+        """
+        Parse the segment table of a stream.
+
+        :param metadata: TSDFMetadata object containing the `segments` field.
+        :param time_metadata: (optional) TSDFMetadata object of the binary file containing the time channel. By default, the stream itself if it contains the time channel.
+        :param time_channel: (optional) name of the time channel.
+
+        :return: the parsed segment table.
+
+        :raises TSDFMetadataFieldValueError: if the metadata does not contain a segment table.
+        """
+        segments = getattr(metadata, SEGMENTS_KEY, None)
+        if segments is None:
+            raise TSDFMetadataFieldValueError(
+                f"Metadata of {metadata.file_name} does not contain a segment table."
+            )
+        if time_metadata is None and time_channel in metadata.channels:
+            time_metadata = metadata
+        return cls(segments, time_metadata, time_channel=time_channel)
+
+    def __len__(self) -> int:
+        return self.starts.shape[0]
+
+    def _first_row_at_or_after(self, index: int, ns: int) -> int:
+        """
+        Compute the first row of a segment with a time stamp at or after the given time.
+
+        :param index: index of the segment.
+        :param ns: time (in ns since the Unix epoch).
+
+        :return: row index (relative to the segment), between 0 and the number of rows in the segment.
+
+        :raises TSDFMetadataFieldValueError: if the time is within the segment, but the table has no time channel.
+        """
+        # The stored start and end are rounded down to microseconds
+        if ns <= int(self.starts[index]):
+            return 0
+        if ns > int(self.ends[index]) + 999:
+            return int(self.rows[index])
+        if self.time_metadata is None:
+            raise TSDFMetadataFieldValueError(
+                "Selecting part of a segment requires the time channel of the segmented rows."
+            )
+        offset = int(self.row_offsets[index])
+        return bisect_left(
+            range(offset, offset + int(self.rows[index])), ns, key=self._get_time_ns
+        )
+
+    def _get_time_ns(self, row: int) -> int:
+        """
+        Get the time stamp of a row, as returned by `time_utils.load_time_ns`. The time channel is memory-mapped
+        on first use; difference encoded time channels are loaded at once, as each time stamp depends on the previous rows.
+
+        :param row: row index.
+
+        :return: time stamp (in ns since the Unix epoch).
+        """
+        metadata = self.time_metadata
+        if time_utils.is_difference_encoded(metadata):
+            if self._times is None:
+                self._times = time_utils.load_time_ns(
+                    metadata, self._time_origin, time_channel=self._time_channel
+                )
+            return int(self._times[row])
+        if self._times is None:
+            index = time_utils.get_time_channel_index(metadata, self._time_channel)
+            data = read_binary.load_memmap_from_binary(metadata)
+            self._times = time_utils._get_time_column(metadata, data, index)
+            self._ns_per_unit, self._exact = time_utils._get_ns_per_unit(metadata, self._time_channel)
+            self._origin = time_utils.iso8601_to_ns(
+                self._time_origin if self._time_origin is not None else metadata.start
+            )
+        out = np.empty(1, dtype=np.int64)
+        time_utils._to_ns(self._times[row : row + 1], self._ns_per_unit, self._exact, out)
+        return self._origin + int(out[0])
+
+    def get_row_ranges(
+        self, start: Union[str, datetime], end: Union[str, datetime]
+    ) -> List[Tuple[int, int]]:
+        """
+        Compute the row ranges containing the samples within a time range, skipping the gaps.
+
+        :param start: start of the time range (inclusive).
+        :param end: end of the time range (exclusive).
+
+        :return: list of (first row, row after the last row) tuples, one for each segment overlapping with the time range.
+        """
+        start_ns = time_utils.iso8601_to_ns(start)
+        end_ns = time_utils.iso8601_to_ns(end)
+        # The stored ends are rounded down to microseconds, so a segment may end up to 1 us after its stored end
+        first = int(np.searchsorted(self.ends, start_ns - 999, side="left"))
+        last = int(np.searchsorted(self.starts, end_ns, side="left"))
+        row_ranges = []
+        for index in range(first, last):
+            offset = int(self.row_offsets[index])
+            row_start = offset + self._first_row_at_or_after(index, start_ns)
+            row_end = offset + self._first_row_at_or_after(index, end_ns)
+            if row_end > row_start:
+                row_ranges.append((row_start, row_end))
+        return row_ranges
+
+
+def load_ndarray_from_time_range(
+    metadata: TSDFMetadata,
+    start: Union[str, datetime],
+    end: Union[str, datetime],
+    segment_table: Optional[SegmentTable] = None,
+    time_metadata: Optional[TSDFMetadata] = None,
+) -> np.ndarray:
+    """
+    Load the rows of a segmented stream that lie within a time range. Only the rows of the overlapping segments are read.
+
+    :param metadata: TSDFMetadata object containing the `segments` field.
+    :param start: start of the time range (inclusive).
+    :param end: end of the time range (exclusive).
+    :param segment_table: (optional) parsed segment table of the stream, to avoid parsing it for every call.
+    :param time_metadata: (optional) TSDFMetadata object of the binary file containing the time channel of the rows, if it is not part of the stream
+                          (see `SegmentTable.from_metadata`). It is ignored if a segment table is given.
+
+    :return: numpy array containing the data.
+
+    :raises TSDFMetadataFieldValueError: if the time range starts or ends within a segment, and the time channel is not available.
+    """
+    if segment_table is None:
+        segment_table = SegmentTable.from_metadata(metadata, time_metadata)
+    pieces = [
+        read_binary.load_ndarray_from_binary(metadata, row_start, row_end)
+        for row_start, row_end in segment_table.get_row_ranges(start, end)
+    ]
+    if len(pieces) == 0:
+        return read_binary.load_ndarray_from_binary(metadata, 0, 0)
+    return np.concatenate(pieces)
+
+
+def build_segments(
+    time_metadata: TSDFMetadata,
+    max_gap: Optional[float] = None,
+    time_origin: Optional[datetime] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> List[Dict[str, Any]]:
+    """
+    Build the segment table of a recording from its time channel, which is read in chunks.
+    A new segment starts whenever consecutive time stamps are more than `max_gap` seconds apart.
+
+    :param time_metadata: TSDFMetadata object of the binary file containing the time channel.
+    :param max_gap: (optional) largest interval (in seconds) between samples of one segment. By default, 1.5 times the median interval of the first chunk.
+    :param time_origin: (optional) time corresponding to the value 0 of the time channel. By default, the start of the recording (`start_iso8601`).
+    :param chunk_rows: (optional) number of rows read at once.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: segment table, as stored in the `segments` metadata field.
+    """
+    seconds = time_utils.get_seconds_per_time_unit(time_metadata, time_channel)
+    origin_ns = time_utils.iso8601_to_ns(
+        time_origin if time_origin is not None else time_metadata.start
+    )
+    max_gap_units = None if max_gap is None else max_gap / seconds
+
+    segment_starts: List[int] = []  # First row of each segment
+    boundary_times: List[Tuple[float, float]] = []  # (start, end) time of each segment
+    previous_time = None
+    row = 0
+    for times in time_utils.iterate_time_chunks(time_metadata, chunk_rows, time_channel):
+        if times.shape[0] == 0:
+            continue
+        if max_gap_units is None:
+            intervals = np.diff(times)
+            max_gap_units = 1.5 * float(np.median(intervals)) if intervals.shape[0] else np.inf
+
+        if previous_time is None:
+            segment_starts.append(0)
+            boundary_times.append((times[0], times[0]))
+            gaps = np.flatnonzero(np.diff(times) > max_gap_units) + 1
+        else:
+            gaps = np.flatnonzero(np.diff(times, prepend=previous_time) > max_gap_units)
+
+        segment_end_times = [times[gap - 1] if gap > 0 else previous_time for gap in gaps]
+        boundary_times[-1] = (boundary_times[-1][0], times[-1])
+        for gap, end_time in zip(gaps, segment_end_times):
+            boundary_times[-1] = (boundary_times[-1][0], end_time)
+            segment_starts.append(row + int(gap))
+            boundary_times.append((times[gap], times[-1]))
+
+        previous_time = times[-1]
+        row += times.shape[0]
+
+    segment_starts.append(row)
+    segments = []
+    for index, (start_time, end_time) in enumerate(boundary_times):
+        segments.append(
+            {
+                "start_iso8601": time_utils.ns_to_iso8601(
+                    origin_ns + round(start_time * seconds * 1e9)
+                ),
+                "end_iso8601": time_utils.ns_to_iso8601(
+                    origin_ns + round(end_time * seconds * 1e9)
+                ),
+                "row_offset": segment_starts[index],
+                "rows": segment_starts[index + 1] - segment_starts[index],
+            }
+        )
+    return segments
+
+
+def add_segments(
+    time_metadata: TSDFMetadata,
+    metadatas: Optional[List[TSDFMetadata]] = None,
+    max_gap: Optional[float] = None,
+    time_origin: Optional[datetime] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = time_utils.TIME_CHANNEL,
+) -> List[Dict[str, Any]]:
+    """
+    Build the segment table from a time channel (see `build_segments`) and store it in the metadata
+    of the time channel and of the other streams sharing its rows. The table is saved with `write_metadata`.
+
+    :param time_metadata: TSDFMetadata object of the binary file containing the time channel.
+    :param metadatas: (optional) TSDFMetadata objects of streams with the same rows as the time channel.
+
+    :return: segment table.
+
+    :raises TSDFMetadataFieldValueError: if a stream has a different number of rows than the time channel.
+    """
+    metadatas = metadatas or []
+    for metadata in metadatas:
+        if metadata.rows != time_metadata.rows:
+            raise TSDFMetadataFieldValueError(
+                f"Binary file {metadata.file_name} has a different number of rows than {time_metadata.file_name}."
+            )
+    segments = build_segments(time_metadata, max_gap, time_origin, chunk_rows, time_channel)
+    for metadata in [time_metadata] + metadatas:
+        setattr(metadata, SEGMENTS_KEY, segments)
+    return segments
@@ -0,0 +1,214 @@
+"""
+Module for loading binary files associated with TSDF into shared memory, to share them with worker processes without copying.
+
+The data is read from the binary file directly into a `multiprocessing.shared_memory` block, which is owned by a
+`SharedMemoryStore`. The store returns lightweight, picklable handles that worker processes use to attach the block
+as a NumPy array (or a pandas DataFrame) backed by the shared memory.
+
+    >>> with SharedMemoryStore() as store:
+    ...     handle = store.load(metadata)
+    ...     with multiprocessing.Pool() as pool:
+    ...         results = pool.map(process, [(handle, start, end) for start, end in ranges])
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import os
+import sys
+from multiprocessing import shared_memory
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+import numpy as np
+from tsdf import encodings
+from tsdf import quantization
+from tsdf import read_binary
+from tsdf import storage
+from tsdf.tsdfmetadata import TSDFMetadata
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+
+class SharedArrayHandle:
+    """
+    Picklable reference to a binary file loaded into shared memory. Sending a handle to another process only
+    transfers its name, shape and data type; the data itself is attached from the shared memory block.
+    """
+
+    name: str
+    """Name of the shared memory block."""
+    shape: Tuple[int, ...]
+    """Shape of the array."""
+    dtype: np.dtype
+    """Data type of the array."""
+    channels: List[str]
+    """Names of the channels."""
+
+    def __init__(
+        self, name: str, shape: Tuple[int, ...], dtype: np.dtype, channels: List[str]
+    ) -> None:
+        self.name = name
+        self.shape = shape
+        self.dtype = dtype
+        self.channels = channels
+        self._shm: Optional[shared_memory.SharedMemory] = None
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_shm"] = None
+        return state
+
+    def attach(self) -> np.ndarray:
+        """
+        Map the shared memory block as a NumPy array, without copying the data. The block stays
+        mapped in this process until `detach` is called (or the handle is garbage collected).
+
+        :return: NumPy array backed by the shared memory.
+        """
+        if self._shm is None:
+            self._shm = _open_shared_memory(self.name)
+        return np.ndarray(self.shape, dtype=self.dtype, buffer=self._shm.buf)
+
+    def attach_dataframe(self) -> "pd.DataFrame":
+        """
+        Map the shared memory block as a pandas DataFrame with a column per channel. The data is only shared
+        without copying if all the channels have the same data type; records mixing data types are copied.
+
+        :return: pandas DataFrame backed by the shared memory.
+        """
+        import pandas as pd
+
+        data = self.attach()
+        if data.dtype.names is not None:
+            return pd.DataFrame(data)
+        return pd.DataFrame(
+            data.reshape((self.shape[0], -1)), columns=self.channels, copy=False
+        )
+
+    def detach(self) -> None:
+        """
+        Unmap the shared memory block from this process. Arrays obtained with `attach` must no longer be used afterwards.
+        """
+        if self._shm is not None:
+            self._shm.close()
+            self._shm = None
+
+
+class SharedMemoryStore:
+    """
+    Owner of the shared memory blocks containing loaded binary files. The blocks are released (unlinked) when the
+    store is closed, e.g., at the end of a `with` block; worker processes must have finished using them by then.
+    """
+
+    handles: Dict[str, SharedArrayHandle]
+    """Handles of the loaded binary files, by file name."""
+
+    def __init__(self) -> None:
+        self.handles = {}
+        self._blocks: List[shared_memory.SharedMemory] = []
+
+    def __enter__(self) -> "SharedMemoryStore":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def load(self, metadata: TSDFMetadata) -> SharedArrayHandle:
+        """
+        Read a binary file directly into a new shared memory block. Quantised binary files (see `quantization`)
+        are decoded to float64 values, and constant rate time channels are generated.
+
+        :param metadata: TSDFMetadata object describing the binary file.
+
+        :return: handle to the loaded data, which can be sent to other processes.
+
+        :raises Exception: if the number of rows doesn't match the file length.
+        """
+        dtype, n_columns = read_binary._get_decoded_row_format(metadata)
+        shape = (metadata.rows, n_columns) if n_columns > 1 else (metadata.rows,)
+        n_bytes = metadata.rows * n_columns * dtype.itemsize
+
+        # Blocks cannot be empty
+        block = shared_memory.SharedMemory(create=True, size=max(n_bytes, 1))
+        self._blocks.append(block)
+        if encodings.is_generated(metadata) or quantization.is_quantized(metadata):
+            # Constant rate time channels are generated and quantised values are decoded into the block
+            _copy_chunks(metadata, np.ndarray(shape, dtype=dtype, buffer=block.buf))
+        else:
+            _read_into(metadata, block.buf[:n_bytes])
+
+        handle = SharedArrayHandle(block.name, shape, dtype, list(metadata.channels))
+        self.handles[metadata.file_name] = handle
+        return handle
+
+    def load_all(self, metadatas: List[TSDFMetadata]) -> Dict[str, SharedArrayHandle]:
+        """
+        Read multiple binary files into shared memory.
+
+        :param metadatas: list of TSDFMetadata objects.
+
+        :return: dictionary mapping each file name to the handle of its data.
+        """
+        return {metadata.file_name: self.load(metadata) for metadata in metadatas}
+
+    def close(self) -> None:
+        """Release all the shared memory blocks owned by the store."""
+        for handle in self.handles.values():
+            try:
+                handle.detach()
+            except BufferError:
+                # Arrays still reference the block; it is unmapped once they are garbage collected
+                pass
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks = []
+        self.handles = {}
+
+
+def _open_shared_memory(name: str) -> shared_memory.SharedMemory:
+    """
+    Attach an existing shared memory block. Where supported, the block is not registered with the resource
+    tracker of the attaching process, as only the store that created it is responsible for releasing it.
+
+    :param name: name of the shared memory block.
+
+    :return: attached shared memory block.
+    """
+    if sys.version_info >= (3, 13):
+        return shared_memory.SharedMemory(name=name, track=False)
+    return shared_memory.SharedMemory(name=name)
+
+
+def _read_into(metadata: TSDFMetadata, view: memoryview) -> None:
+    """
+    Read the bytes of a binary file into a view of a shared memory block.
+
+    :param metadata: TSDFMetadata object describing the binary file.
+    :param view: view of the shared memory block, of the size of the binary file.
+
+    :raises Exception: if the number of rows doesn't match the file length.
+    """
+    bin_path = os.path.join(metadata.file_dir_path, metadata.file_name)
+    n_bytes = len(view)
+    with view, storage.open_binary(bin_path) as file:
+        n_read = 0
+        while n_read < n_bytes:
+            count = file.readinto(view[n_read:])
+            if not count:
+                break
+            n_read += count
+    if n_read != n_bytes:
+        raise Exception("Number of rows doesn't match file length.")
+
+
+def _copy_chunks(metadata: TSDFMetadata, array: np.ndarray) -> None:
+    """
+    Copy the rows returned by `read_binary.load_ndarray_chunks` into an array backed by a shared memory block.
+
+    :param metadata: TSDFMetadata object describing the binary file.
+    :param array: array of the shape of the data.
+    """
+    row = 0
+    for chunk in read_binary.load_ndarray_chunks(metadata):
+        array[row : row + chunk.shape[0]] = chunk
+        row += chunk.shape[0]
@@ -0,0 +1,631 @@
+"""
+Module providing the storage backends through which TSDF files are read and written.
+
+Paths are served by the backend mounted at their longest matching prefix, and by the local file system
+(including ZIP and TAR archives, see `archives`) otherwise. Backends are available for local files,
+in-memory files (e.g., for tests) and, if the `fsspec` package is installed, any fsspec file system:
+
+    >>> storage.mount("s3://recordings/", FsspecStorage(protocol="s3"))
+    >>> storage.mount("/mnt/archive/", LocalStorage())  # a high-latency network file system
+    >>> metadatas = tsdf.load_metadata_from_path("s3://recordings/session_1/meta.json")
+
+Files of mounted backends are read through a block cache shared by all backends: reads are served from cached
+blocks of `CACHE_BLOCK_SIZE` bytes, and a missing block is fetched together with the blocks following it
+(read-ahead), so repeated and adjacent reads do not access the backend again. The least recently used blocks are
+evicted beyond the capacity of the cache; blocks of a file are invalidated when the file is written, or when its
+version (size and modification time) changes.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import io
+import itertools
+import os
+import posixpath
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import IO, Any, Dict, Hashable, Iterator, List, Optional, Tuple
+from tsdf import archives
+from tsdf import file_utils
+from tsdf.constants import (
+    CACHE_BLOCK_SIZE,
+    CACHE_CAPACITY,
+    CACHE_READ_AHEAD,
+    WRITE_BUFFER_SIZE,
+)
+
+
+class Storage(ABC):
+    """Interface of the storage backends."""
+
+    @abstractmethod
+    def get_size(self, path: str) -> int:
+        """
+        :param path: path to the file.
+
+        :return: size of the file in bytes.
+        """
+
+    def get_version(self, path: str) -> Hashable:
+        """
+        :param path: path to the file.
+
+        :return: value that changes whenever the file is modified (used to invalidate cached blocks).
+        """
+        return self.get_size(path)
+
+    @abstractmethod
+    def exists(self, path: str) -> bool:
+        """
+        :param path: path to the file.
+
+        :return: True if the file exists, otherwise False.
+        """
+
+    @abstractmethod
+    def read_block(self, path: str, offset: int, size: int) -> bytes:
+        """
+        Read a range of bytes of a file.
+
+        :param path: path to the file.
+        :param offset: offset of the first byte.
+        :param size: number of bytes (fewer bytes are returned at the end of the file).
+
+        :return: bytes read.
+        """
+
+    @abstractmethod
+    def open(self, path: str) -> IO[bytes]:
+        """
+        Open a file for reading in binary mode, without the block cache.
+
+        :param path: path to the file.
+
+        :return: seekable file object.
+        """
+
+    @abstractmethod
+    def write(
+        self,
+        path: str,
+        mode: str = "wb",
+        buffer_size: int = WRITE_BUFFER_SIZE,
+        durable: bool = True,
+    ) -> Any:
+        """
+        Open a file for writing, replacing the file once the context exits without an exception.
+
+        :param path: path to the file.
+        :param mode: (optional) mode in which the file is opened ("w" or "wb").
+        :param buffer_size: (optional) size (in bytes) of the write buffer.
+        :param durable: (optional) flag to flush the data to persistent storage before the file is replaced (where the backend supports it).
+
+        :return: context manager yielding the opened file.
+        """
+
+    def get_data_region(self, path: str) -> Optional[Tuple[str, int]]:
+        """
+        Locate the data of a file on a local disk, so that it can be memory-mapped.
+
+        :param path: path to the file.
+
+        :return: tuple of the path on disk and the offset of the data, or None if the file is not on a local disk.
+        """
+        return None
+
+
+class LocalStorage(Storage):
+    """Backend for the local file system, including members of ZIP and TAR archives."""
+
+    def get_size(self, path: str) -> int:
+        return archives.get_file_size(path)
+
+    def get_version(self, path: str) -> Hashable:
+        member = archives.get_member(path) if not os.path.exists(path) else None
+        stat = os.stat(member.archive_path if member is not None else path)
+        return (stat.st_size, stat.st_mtime_ns)
+
+    def exists(self, path: str) -> bool:
+        if os.path.exists(path):
+            return True
+        try:
+            return archives.get_member(path) is not None
+        except FileNotFoundError:
+            return False
+
+    def read_block(self, path: str, offset: int, size: int) -> bytes:
+        with archives.open_binary(path) as file:
+            file.seek(offset)
+            return file.read(size)
+
+    def open(self, path: str) -> IO[bytes]:
+        return archives.open_binary(path)
+
+    def write(
+        self,
+        path: str,
+        mode: str = "wb",
+        buffer_size: int = WRITE_BUFFER_SIZE,
+        durable: bool = True,
+    ) -> Any:
+        return file_utils.atomic_write(path, mode, buffer_size, durable)
+
+    def get_data_region(self, path: str) -> Optional[Tuple[str, int]]:
+        return archives.get_data_region(path)
+
+
+class MemoryStorage(Storage):
+    """Backend keeping the files in memory, e.g., for tests."""
+
+    files: Dict[str, bytes]
+    """Content of the files, by path."""
+
+    def __init__(self) -> None:
+        self.files = {}
+        self._versions: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, path: str) -> bytes:
+        try:
+            return self.files[os.fspath(path)]
+        except KeyError:
+            raise FileNotFoundError(f"No such file: {path}")
+
+    def get_size(self, path: str) -> int:
+        return len(self._get(path))
+
+    def get_version(self, path: str) -> Hashable:
+        self._get(path)
+        return self._versions[os.fspath(path)]
+
+    def exists(self, path: str) -> bool:
+        return os.fspath(path) in self.files
+
+    def read_block(self, path: str, offset: int, size: int) -> bytes:
+        return self._get(path)[offset : offset + size]
+
+    def open(self, path: str) -> IO[bytes]:
+        return io.BytesIO(self._get(path))
+
+    @contextmanager
+    def write(
+        self,
+        path: str,
+        mode: str = "wb",
+        buffer_size: int = WRITE_BUFFER_SIZE,
+        durable: bool = True,
+    ) -> Iterator[IO[Any]]:
+        file: IO[Any] = io.BytesIO() if "b" in mode else io.StringIO()
+        yield file
+        content = file.getvalue()
+        with self._lock:
+            self.files[os.fspath(path)] = (
+                content if isinstance(content, bytes) else content.encode()
+            )
+            self._versions[os.fspath(path)] = self._versions.get(os.fspath(path), 0) + 1
+
+
+class FsspecStorage(Storage):
+    """Backend for the file systems of the optional `fsspec` package (e.g., S3, HTTP, SFTP)."""
+
+    def __init__(self, fs: Any = None, protocol: Optional[str] = None, **options: Any) -> None:
+        """
+        :param fs: (optional) fsspec file system object.
+        :param protocol: (optional) protocol of the file system to be created, if `fs` is not given.
+        :param options: (optional) options of the file system to be created.
+
+        :raises ImportError: if `fsspec` is not installed.
+        """
+        if fs is None:
+            try:
+                import fsspec
+            except ImportError:
+                raise ImportError(
+                    "The fsspec package is required to use FsspecStorage (e.g., pip install tsdf[fsspec])."
+                )
+            fs = fsspec.filesystem(protocol or "file", **options)
+        self.fs = fs
+
+    def get_size(self, path: str) -> int:
+        return int(self.fs.size(path))
+
+    def get_version(self, path: str) -> Hashable:
+        info = self.fs.info(path)
+        modified = info.get("mtime", info.get("LastModified", info.get("ETag")))
+        return (info.get("size"), str(modified))
+
+    def exists(self, path: str) -> bool:
+        return bool(self.fs.exists(path))
+
+    def read_block(self, path: str, offset: int, size: int) -> bytes:
+        return self.fs.cat_file(path, start=offset, end=offset + size)
+
+    def open(self, path: str) -> IO[bytes]:
+        return self.fs.open(path, "rb")
+
+    @contextmanager
+    def write(
+        self,
+        path: str,
+        mode: str = "wb",
+        buffer_size: int = WRITE_BUFFER_SIZE,
+        durable: bool = True,
+    ) -> Iterator[IO[Any]]:
+        # The data is written to a temporary file next to the target file, which is moved over it once complete
+        dir_path, file_name = posixpath.split(os.fspath(path))
+        tmp_path = posixpath.join(dir_path, f".{file_name}.{os.urandom(8).hex()}.tmp")
+        try:
+            with self.fs.open(tmp_path, mode, block_size=buffer_size) as file:
+                yield file
+            self.fs.mv(tmp_path, path)
+        except BaseException:
+            if self.fs.exists(tmp_path):
+                self.fs.rm(tmp_path)
+            raise
+
+
+class BlockCache:
+    """
+    Thread-safe cache of fixed-size blocks of files, evicting the least recently used blocks beyond its capacity.
+    Backends are identified by a serial number that is never reused (unlike `id`), so the blocks of a collected
+    backend are never served for another one; they are evicted like other unused blocks.
+    """
+
+    block_size: int
+    """Size of the blocks in bytes."""
+    capacity: int
+    """Maximal number of bytes kept in the cache."""
+    read_ahead: int
+    """Number of blocks read ahead of a missing block."""
+    hits: int
+    """Number of blocks served from the cache."""
+    misses: int
+    """Number of blocks read from a backend."""
+
+    def __init__(
+        self,
+        block_size: int = CACHE_BLOCK_SIZE,
+        capacity: int = CACHE_CAPACITY,
+        read_ahead: int = CACHE_READ_AHEAD,
+    ) -> None:
+        """
+        :param block_size: (optional) size of the blocks in bytes.
+        :param capacity: (optional) maximal number of bytes kept in the cache.
+        :param read_ahead: (optional) number of blocks read ahead of a missing block.
+        """
+        if block_size < 1 or capacity < 0 or read_ahead < 0:
+            raise ValueError("The block size has to be positive, and the capacity and read-ahead non-negative.")
+        self.block_size = block_size
+        self.capacity = capacity
+        self.read_ahead = read_ahead
+        self.hits = 0
+        self.misses = 0
+        self._blocks: "OrderedDict[Tuple[int, str, Hashable, int], bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._storage_keys: "weakref.WeakKeyDictionary[Storage, int]" = weakref.WeakKeyDictionary()
+        self._serials = itertools.count()
+
+    def read(
+        self,
+        storage: Storage,
+        path: str,
+        version: Hashable,
+        offset: int,
+        size: int,
+    ) -> bytes:
+        """
+        Read a range of bytes of a file through the cache.
+
+        :param storage: backend of the file.
+        :param path: path to the file.
+        :param version: version of the file (see `Storage.get_version`).
+        :param offset: offset of the first byte.
+        :param size: number of bytes.
+
+        :return: bytes read (fewer bytes at the end of the file).
+        """
+        if size <= 0:
+            return b""
+        first, last = offset // self.block_size, (offset + size - 1) // self.block_size
+        key = (self._get_storage_key(storage), os.fspath(path), version)
+        blocks: List[bytes] = []
+        index = first
+        while index <= last:
+            block = self._get(key + (index,))
+            if block is None:
+                # Fetch the run of missing blocks, and the blocks following it, in a single read
+                end = index + 1
+                while end <= last and not self._contains(key + (end,)):
+                    end += 1
+                fetched = self._fetch(storage, path, key, index, end + self.read_ahead)
+                blocks.extend(fetched[: end - index])
+                if len(fetched) < end - index or len(fetched[end - index - 1]) < self.block_size:
+                    break  # End of the file
+                index = end
+                continue
+            blocks.append(block)
+            if len(block) < self.block_size:
+                break  # End of the file
+            index += 1
+        data = b"".join(blocks)
+        start = offset - first * self.block_size
+        return data[start : start + size]
+
+    def invalidate(self, path: str) -> None:
+        """
+        Discard the cached blocks of a file.
+
+        :param path: path to the file.
+        """
+        path = os.fspath(path)
+        with self._lock:
+            for key in [key for key in self._blocks if key[1] == path]:
+                self._size -= len(self._blocks.pop(key))
+
+    def clear(self) -> None:
+        """Discard all the cached blocks."""
+        with self._lock:
+            self._blocks.clear()
+            self._size = 0
+
+    def _get_storage_key(self, storage: Storage) -> int:
+        """
+        Get the serial number identifying a backend in the cache keys, assigning one on first use.
+
+        :param storage: backend.
+
+        :return: serial number of the backend.
+        """
+        with self._lock:
+            key = self._storage_keys.get(storage)
+            if key is None:
+                key = self._storage_keys[storage] = next(self._serials)
+            return key
+
+    def _contains(self, key: Tuple[int, str, Hashable, int]) -> bool:
+        with self._lock:
+            return key in self._blocks
+
+    def _get(self, key: Tuple[int, str, Hashable, int]) -> Optional[bytes]:
+        with self._lock:
+            block = self._blocks.get(key)
+            if block is not None:
+                self._blocks.move_to_end(key)
+                self.hits += 1
+            return block
+
+    def _fetch(
+        self,
+        storage: Storage,
+        path: str,
+        key: Tuple[int, str, Hashable],
+        first: int,
+        end: int,
+    ) -> List[bytes]:
+        """
+        Read consecutive blocks from a backend and add them to the cache.
+
+        :param storage: backend of the file.
+        :param path: path to the file.
+        :param key: cache key of the file.
+        :param first: index of the first block.
+        :param end: index after the last block.
+
+        :return: blocks read (fewer blocks at the end of the file; the last one may be shorter).
+        """
+        data = storage.read_block(path, first * self.block_size, (end - first) * self.block_size)
+        blocks = [
+            data[start : start + self.block_size]
+            for start in range(0, len(data), self.block_size)
+        ]
+        with self._lock:
+            self.misses += len(blocks)
+            for index, block in enumerate(blocks, first):
+                previous = self._blocks.pop(key + (index,), None)
+                self._size += len(block) - (len(previous) if previous is not None else 0)
+                self._blocks[key + (index,)] = block
+            while self._size > self.capacity and self._blocks:
+                self._size -= len(self._blocks.popitem(last=False)[1])
+        return blocks
+
+
+class CachedFile(io.RawIOBase):
+    """Read-only file object reading a file of a backend through a block cache."""
+
+    def __init__(self, storage: Storage, path: str, cache: BlockCache) -> None:
+        """
+        :param storage: backend of the file.
+        :param path: path to the file.
+        :param cache: block cache.
+        """
+        super().__init__()
+        self._storage = storage
+        self._cache = cache
+        self._version = storage.get_version(path)
+        self._size = storage.get_size(path)
+        self._position = 0
+        self.name = os.fspath(path)
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += self._size
+        self._position = max(0, offset)
+        return self._position
+
+    def readinto(self, buffer) -> int:  # type: ignore[no-untyped-def]
+        view = memoryview(buffer).cast("B")
+        n_bytes = max(0, min(len(view), self._size - self._position))
+        data = self._cache.read(
+            self._storage, self.name, self._version, self._position, n_bytes
+        )
+        view[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+_LOCAL_STORAGE = LocalStorage()
+_mounts: List[Tuple[str, Storage, bool]] = []
+block_cache = BlockCache()
+""" Block cache shared by the mounted backends. """
+
+
+def mount(prefix: str, storage: Storage, cached: bool = True) -> None:
+    """
+    Serve the paths starting with a prefix by a backend.
+
+    :param prefix: prefix of the paths (e.g., `memory://` or `/mnt/archive/`).
+    :param storage: backend serving the paths.
+    :param cached: (optional) flag to read the files through the shared block cache.
+    """
+    unmount(prefix)
+    _mounts.append((os.fspath(prefix), storage, cached))
+    # The longest prefix is matched first
+    _mounts.sort(key=lambda mount: -len(mount[0]))
+
+
+def unmount(prefix: str) -> None:
+    """
+    Remove the backend mounted at a prefix (if any).
+
+    :param prefix: prefix of the paths.
+    """
+    _mounts[:] = [mount for mount in _mounts if mount[0] != os.fspath(prefix)]
+
+
+def configure_cache(
+    block_size: int = CACHE_BLOCK_SIZE,
+    capacity: int = CACHE_CAPACITY,
+    read_ahead: int = CACHE_READ_AHEAD,
+) -> BlockCache:
+    """
+    Replace the shared block cache (discarding the cached blocks).
+
+    :param block_size: (optional) size of the blocks in bytes.
+    :param capacity: (optional) maximal number of bytes kept in the cache.
+    :param read_ahead: (optional) number of blocks read ahead of a missing block.
+
+    :return: new block cache.
+    """
+    global block_cache
+    block_cache = BlockCache(block_size, capacity, read_ahead)
+    return block_cache
+
+
+def get_storage(path: str) -> Tuple[Storage, bool]:
+    """
+    Find the backend serving a path.
+
+    :param path: path to a file.
+
+    :return: tuple of the backend and the flag indicating whether its files are read through the block cache.
+    """
+    path = os.fspath(path)
+    for prefix, storage, cached in _mounts:
+        if _is_under_prefix(path, prefix):
+            return storage, cached
+    return _LOCAL_STORAGE, False
+
+
+def _is_under_prefix(path: str, prefix: str) -> bool:
+    """
+    Check whether a path is the prefix itself or within it, i.e., the prefix ends at a path separator
+    (`/mnt/data` matches `/mnt/data/file.bin`, but not `/mnt/database/file.bin`).
+
+    :param path: path to a file.
+    :param prefix: prefix of a mounted backend.
+
+    :return: True if the path is served by the prefix.
+    """
+    if not path.startswith(prefix):
+        return False
+    separators = ("/", os.sep)
+    return len(path) == len(prefix) or prefix.endswith(separators) or path[len(prefix)] in separators
+
+
+def is_mounted(path: str) -> bool:
+    """
+    Check whether a path is served by a mounted backend, instead of the local file system.
+
+    :param path: path to a file.
+
+    :return: True if the path is served by a mounted backend.
+    """
+    return get_storage(path)[0] is not _LOCAL_STORAGE
+
+
+def open_binary(path: str) -> IO[bytes]:
+    """
+    Open a file for reading in binary mode, through the block cache if its backend is cached.
+
+    :param path: path to the file.
+
+    :return: seekable file object.
+    """
+    storage, cached = get_storage(path)
+    if cached:
+        return CachedFile(storage, path, block_cache)
+    return storage.open(path)
+
+
+def get_file_size(path: str) -> int:
+    """
+    :param path: path to the file.
+
+    :return: size of the file in bytes.
+    """
+    return get_storage(path)[0].get_size(path)
+
+
+def get_data_region(path: str) -> Optional[Tuple[str, int]]:
+    """
+    Locate the data of a file on a local disk, so that it can be memory-mapped (see `archives.get_data_region`).
+
+    :param path: path to the file.
+
+    :return: tuple of the path on disk and the offset of the data, or None if the file cannot be memory-mapped.
+    """
+    storage, cached = get_storage(path)
+    if cached:
+        # Files read through the cache are not memory-mapped, so that their reads are cached
+        return None
+    return storage.get_data_region(path)
+
+
+@contextmanager
+def atomic_write(
+    path: str,
+    mode: str = "wb",
+    buffer_size: int = WRITE_BUFFER_SIZE,
+    durable: bool = True,
+) -> Iterator[IO[Any]]:
+    """
+    Open a file of its backend for writing, replacing the file once the context exits without an exception.
+    The cached blocks of the file are discarded.
+
+    :param path: path to the file.
+    :param mode: (optional) mode in which the file is opened ("w" or "wb").
+    :param buffer_size: (optional) size (in bytes) of the write buffer.
+    :param durable: (optional) flag to flush the data to persistent storage before the file is replaced (see `Storage.write`).
+
+    :return: context manager yielding the opened file.
+    """
+    storage, cached = get_storage(path)
+    with storage.write(path, mode, buffer_size, durable) as file:
+        yield file
+    if cached:
+        block_cache.invalidate(path)
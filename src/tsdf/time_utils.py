@@ -0,0 +1,295 @@
+"""
+Module for reading time channels of binary files associated with TSDF.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from datetime import datetime, timedelta, timezone
+from typing import Iterator, Optional, Tuple, Union
+import numpy as np
+from tsdf import read_binary
+from tsdf import tsdfmetadata
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+
+SECONDS_PER_TIME_UNIT = {
+    "s": 1.0,
+    "ms": 1e-3,
+    "us": 1e-6,
+    "ns": 1e-9,
+}
+""" Supported units of time channels, expressed in seconds. """
+
+TIME_CHANNEL = "time"
+""" Default name of the time channel. """
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def iso8601_to_ns(date_time: Union[str, datetime]) -> int:
+    """
+    Convert a time stamp into the number of nanoseconds since the Unix epoch (with microsecond precision).
+
+    :param date_time: datetime object or ISO8601 string. Time stamps without time zone are considered to be in UTC.
+
+    :return: number of nanoseconds since the Unix epoch.
+    """
+    if isinstance(date_time, str):
+        from dateutil import parser
+
+        date_time = parser.parse(date_time)
+    if date_time.tzinfo is None:
+        date_time = date_time.replace(tzinfo=timezone.utc)
+    return (date_time - _EPOCH) // timedelta(microseconds=1) * 1000
+
+
+def ns_to_iso8601(ns: int) -> str:
+    """
+    Convert a number of nanoseconds since the Unix epoch into an ISO8601 string (in UTC, with microsecond precision).
+
+    :param ns: number of nanoseconds since the Unix epoch.
+
+    :return: ISO8601 string.
+    """
+    return (_EPOCH + timedelta(microseconds=int(ns) // 1000)).isoformat()
+
+
+def get_time_channel_index(
+    metadata: "tsdfmetadata.TSDFMetadata", time_channel: str = TIME_CHANNEL
+) -> int:
+    """
+    Find the column of the time channel. A binary file with a single channel is considered to be a time channel.
+
+    :param metadata: TSDFMetadata object.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: index of the time channel.
+
+    :raises tsdfmetadata.TSDFMetadataFieldValueError: if the time channel is not present.
+    """
+    if len(metadata.channels) == 1:
+        return 0
+    if time_channel not in metadata.channels:
+        raise tsdfmetadata.TSDFMetadataFieldValueError(
+            f"Binary file {metadata.file_name} does not contain the time channel '{time_channel}'."
+        )
+    return metadata.channels.index(time_channel)
+
+
+def get_seconds_per_time_unit(
+    metadata: "tsdfmetadata.TSDFMetadata", time_channel: str = TIME_CHANNEL
+) -> float:
+    """
+    Compute the duration of one unit of the time channel in seconds.
+
+    :param metadata: TSDFMetadata object.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: number of seconds per unit.
+
+    :raises tsdfmetadata.TSDFMetadataFieldValueError: if the unit of the time channel is not supported.
+    """
+    unit = metadata.units[get_time_channel_index(metadata, time_channel)]
+    if unit not in SECONDS_PER_TIME_UNIT:
+        raise tsdfmetadata.TSDFMetadataFieldValueError(
+            f"Unit '{unit}' of the time channel is not supported. Supported units are: {list(SECONDS_PER_TIME_UNIT)}."
+        )
+    return SECONDS_PER_TIME_UNIT[unit]
+
+
+def get_time_scale_factor(
+    metadata: "tsdfmetadata.TSDFMetadata", time_channel: str = TIME_CHANNEL
+) -> float:
+    """
+    Get the scale factor by which the stored values of the time channel are multiplied. It only applies to integer
+    time channels, whose values are ticks (see `encodings`); float time channels store time stamps in the unit of the channel.
+
+    :param metadata: TSDFMetadata object.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: scale factor, or 1 if the metadata does not specify one for an integer time channel.
+    """
+    index = get_time_channel_index(metadata, time_channel)
+    data_type = metadata.data_type
+    if isinstance(data_type, list):
+        data_type = data_type[index]
+    scale_factors = getattr(metadata, "scale_factors", None)
+    if data_type not in ("int", "uint") or not scale_factors:
+        return 1.0
+    return float(scale_factors[index])
+
+
+def _get_time_column(
+    metadata: "tsdfmetadata.TSDFMetadata", chunk: np.ndarray, index: int
+) -> np.ndarray:
+    """
+    Select the time channel in a chunk of rows. Rows of binary files mixing data types are records, whose time channel is selected by name.
+
+    :param metadata: TSDFMetadata object.
+    :param chunk: numpy array containing the rows.
+    :param index: index of the time channel.
+
+    :return: numpy array containing the time channel.
+    """
+    if chunk.dtype.names is not None:
+        return chunk[metadata.channels[index]]
+    return chunk[:, index] if chunk.ndim > 1 else chunk
+
+
+def is_difference_encoded(metadata: "tsdfmetadata.TSDFMetadata") -> bool:
+    """
+    Check whether the time channel stores the differences between consecutive time stamps (`"time_encode": "difference"`).
+
+    :param metadata: TSDFMetadata object.
+
+    :return: True if the time channel is difference encoded, otherwise False.
+    """
+    return getattr(metadata, "time_encode", None) == "difference"
+
+
+def iterate_time_chunks(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = TIME_CHANNEL,
+) -> Iterator[np.ndarray]:
+    """
+    Iterate over the time channel in chunks, as absolute time stamps (float64, in the unit of the channel).
+    Integer values are multiplied by the tick of the channel (see `get_time_scale_factor`),
+    and difference encoded time channels are accumulated across chunk boundaries.
+
+    :param metadata: TSDFMetadata object.
+    :param chunk_rows: (optional) maximal number of rows in each chunk.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: iterator over numpy arrays containing consecutive chunks of time stamps.
+    """
+    index = get_time_channel_index(metadata, time_channel)
+    difference = is_difference_encoded(metadata)
+    scale_factor = get_time_scale_factor(metadata, time_channel)
+    carry = 0
+    for chunk in read_binary.load_ndarray_chunks(metadata, chunk_rows):
+        times = _get_time_column(metadata, chunk, index)
+        if difference:
+            times = _accumulate(times, carry)
+            if times.shape[0] > 0:
+                carry = times[-1]
+        times = times.astype(np.float64)
+        if scale_factor != 1:
+            times *= scale_factor
+        yield times
+
+
+def load_time_ns(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    time_origin: Optional[Union[str, datetime]] = None,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    time_channel: str = TIME_CHANNEL,
+) -> np.ndarray:
+    """
+    Load the time channel as absolute time stamps, in nanoseconds since the Unix epoch. The channel is read
+    chunk by chunk: difference encoded values are accumulated as stored (exactly, for integer ticks) and only
+    then scaled and rounded to nanoseconds, so the result does not drift over long recordings.
+
+    :param metadata: TSDFMetadata object.
+    :param time_origin: (optional) time corresponding to the value 0 of the time channel. By default, the start of the recording (`start_iso8601`).
+    :param chunk_rows: (optional) maximal number of rows read at once.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: int64 numpy array containing a time stamp for each row.
+    """
+    index = get_time_channel_index(metadata, time_channel)
+    ns_per_unit, exact = _get_ns_per_unit(metadata, time_channel)
+    origin = iso8601_to_ns(time_origin if time_origin is not None else metadata.start)
+    difference = is_difference_encoded(metadata)
+
+    result = np.empty(metadata.rows, dtype=np.int64)
+    row = 0
+    carry = 0  # sum of the stored values of the previous chunks, for difference encoded channels
+    for chunk in read_binary.load_ndarray_chunks(
+        metadata, chunk_rows, native_byte_order=True
+    ):
+        times = _get_time_column(metadata, chunk, index)
+        if difference:
+            times = _accumulate(times, carry)
+            if times.shape[0] > 0:
+                carry = times[-1]
+        out = result[row : row + times.shape[0]]
+        _to_ns(times, ns_per_unit, exact, out)
+        out += origin
+        row += times.shape[0]
+    return result
+
+
+def _get_ns_per_unit(
+    metadata: "tsdfmetadata.TSDFMetadata", time_channel: str = TIME_CHANNEL
+) -> Tuple[float, bool]:
+    """
+    Compute the number of nanoseconds per stored value of the time channel (its unit multiplied by its tick).
+
+    :param metadata: TSDFMetadata object.
+    :param time_channel: (optional) name of the time channel.
+
+    :return: tuple of the number of nanoseconds and a flag that is set if it is a whole number.
+    """
+    ns_per_unit = (
+        get_seconds_per_time_unit(metadata, time_channel)
+        * get_time_scale_factor(metadata, time_channel)
+        * 1e9
+    )
+    return ns_per_unit, abs(ns_per_unit - round(ns_per_unit)) < 1e-6
+
+
+def _to_ns(times: np.ndarray, ns_per_unit: float, exact: bool, out: np.ndarray) -> None:
+    """
+    Convert (accumulated) values of the time channel into nanoseconds relative to the time origin.
+
+    :param times: values of the time channel.
+    :param ns_per_unit: number of nanoseconds per value.
+    :param exact: flag that is set if `ns_per_unit` is a whole number.
+    :param out: int64 numpy array of the same length, in which the result is stored.
+    """
+    # Integer values are converted exactly if a unit is a whole number of nanoseconds
+    if times.dtype.kind in "iu" and exact:
+        np.multiply(times, round(ns_per_unit), out=out, dtype=np.int64)
+    else:
+        out[:] = np.rint(times * ns_per_unit)
+
+
+def _accumulate(values: np.ndarray, carry: Union[int, float, np.number]) -> np.ndarray:
+    """
+    Accumulate the stored values of a difference encoded time channel, continuing from the previous chunks.
+    Integer ticks are accumulated exactly (int64), other values in float64.
+
+    :param values: stored values of a chunk.
+    :param carry: sum of the stored values of the previous chunks.
+
+    :return: accumulated values, in the stored unit.
+    """
+    dtype = np.int64 if values.dtype.kind in "iu" else np.float64
+    times = np.cumsum(values, dtype=dtype)
+    times += carry
+    return times
+
+
+def get_sampled_time_ns(metadata: "tsdfmetadata.TSDFMetadata") -> np.ndarray:
+    """
+    Compute the time stamps of a binary file sampled at a constant rate, from `start_iso8601` and `sampling_rate`.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: int64 numpy array containing a time stamp (in nanoseconds since the Unix epoch) for each row.
+
+    :raises tsdfmetadata.TSDFMetadataFieldValueError: if the metadata does not specify a sampling rate.
+    """
+    rate = getattr(metadata, "sampling_rate", None)
+    if not rate:
+        raise tsdfmetadata.TSDFMetadataFieldValueError(
+            f"Binary file {metadata.file_name} has neither a time channel nor a sampling rate."
+        )
+    times = np.arange(metadata.rows, dtype=np.int64)
+    period_ns = 1e9 / rate
+    if period_ns == round(period_ns):
+        times *= int(period_ns)
+    else:
+        times = np.rint(times * period_ns).astype(np.int64)
+    times += iso8601_to_ns(metadata.start)
+    return times
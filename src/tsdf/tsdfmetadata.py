@@ -1,9 +1,9 @@
 import copy
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Union
 from datetime import datetime
-from dateutil import parser
 
 from tsdf import parse_metadata
+from tsdf.instrumentation import traced
 
 class TSDFMetadataFieldError(Exception):
     "Raised when the TSDFMetadata is missing an obligatory field."
@@ -41,10 +41,10 @@ class TSDFMetadata:
     """List of channels in the binary file."""
     units: List[str]
     """List of units for each channel in the binary file."""
-    data_type: str
-    """Data type of the binary file."""
-    bits: int
-    """Number of bits per sample in the binary file."""
+    data_type: Union[str, List[str]]
+    """Data type of the binary file, or of each channel for binary files of records (mixed data types)."""
+    bits: Union[int, List[int]]
+    """Number of bits per sample in the binary file, or per channel for binary files of records."""
     endianness: str
     """Endianness of the binary file."""
 
@@ -79,6 +79,7 @@ class TSDFMetadata:
                 raise TSDFMetadataFieldValueError("The provided metadata is invalid.")
 
 
+    @traced("validate_metadata")
     def validate(self) -> bool:
         isValid: bool = True
 
@@ -116,6 +117,8 @@ class TSDFMetadata:
         Returns the start date of the recording as a datetime object.
         :return: datetime object containing the start date.
         """
+        from dateutil import parser
+
         return parser.parse(self.start_iso8601)
 
     def set_end_datetime(self, date_time: datetime) -> None:
@@ -130,6 +133,8 @@ class TSDFMetadata:
         Returns the end date of the recording as a datetime object.
         :return: datetime object containing the end date.
         """
+        from dateutil import parser
+
         return parser.parse(self.end_iso8601)
 
     start = property(get_start_datetime, set_start_datetime, doc=
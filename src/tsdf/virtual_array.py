@@ -0,0 +1,149 @@
+"""
+Module providing a lazy view over multiple binary files associated with TSDF.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from typing import List, Tuple, Union
+import numpy as np
+from tsdf import read_binary
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+
+class ConcatenatedArray:
+    """
+    Read-only array that concatenates the rows of multiple binary files, without loading them.
+    Rows are addressed with a global row index, and only the files (and the byte ranges within them)
+    that are touched by an access are read.
+    """
+
+    metadatas: List[TSDFMetadata]
+    """Metadata of the concatenated binary files, in order."""
+    offsets: np.ndarray
+    """Global index of the first row of each file, followed by the total number of rows."""
+
+    def __init__(self, metadatas: List[TSDFMetadata]) -> None:
+        """
+        :param metadatas: list of TSDFMetadata objects describing row-compatible binary files (i.e., same channels and data format).
+
+        :raises TSDFMetadataFieldValueError: if the list is empty or the binary files are not row-compatible.
+        """
+        if len(metadatas) == 0:
+            raise TSDFMetadataFieldValueError(
+                "At least one TSDFMetadata object is needed to create a concatenated array."
+            )
+        first = metadatas[0]
+        for meta in metadatas[1:]:
+            if meta.channels != first.channels:
+                raise TSDFMetadataFieldValueError(
+                    f"Binary file {meta.file_name} has different channels than {first.file_name}."
+                )
+            if read_binary._get_decoded_row_format(
+                meta
+            ) != read_binary._get_decoded_row_format(first):
+                raise TSDFMetadataFieldValueError(
+                    f"Binary file {meta.file_name} has a different data format than {first.file_name}."
+                )
+
+        self.metadatas = list(metadatas)
+        self.offsets = np.concatenate(
+            [[0], np.cumsum([meta.rows for meta in metadatas])]
+        ).astype(np.int64)
+
+    @property
+    def dtype(self) -> np.dtype:
+        """Data type of the values (quantised values are decoded to float64)."""
+        dtype, _ = read_binary._get_decoded_row_format(self.metadatas[0])
+        return dtype
+
+    @property
+    def shape(self) -> Tuple[int, ...]:
+        """Shape of the concatenated data."""
+        n_channels = len(self.metadatas[0].channels)
+        if n_channels > 1 and self.dtype.names is None:
+            return (len(self), n_channels)
+        return (len(self),)
+
+    @property
+    def ndim(self) -> int:
+        """Number of dimensions of the concatenated data."""
+        return len(self.shape)
+
+    def __len__(self) -> int:
+        return int(self.offsets[-1])
+
+    def read(self, start_row: int, end_row: int) -> np.ndarray:
+        """
+        Load a contiguous range of rows, reading only the files that overlap with it.
+
+        :param start_row: first (global) row to load.
+        :param end_row: row after the last (global) row to load.
+
+        :return: numpy array containing the data.
+        """
+        n_rows = len(self)
+        if not 0 <= start_row <= end_row <= n_rows:
+            raise IndexError(
+                f"Row range [{start_row}, {end_row}) is out of bounds for {n_rows} rows."
+            )
+
+        first_file = int(np.searchsorted(self.offsets, start_row, side="right")) - 1
+        last_file = int(np.searchsorted(self.offsets, end_row, side="left"))
+        pieces = []
+        for index in range(max(first_file, 0), min(last_file, len(self.metadatas))):
+            file_start = self.offsets[index]
+            local_start = int(max(start_row, file_start) - file_start)
+            local_end = int(min(end_row, self.offsets[index + 1]) - file_start)
+            if local_end > local_start:
+                pieces.append(
+                    read_binary.load_ndarray_from_binary(
+                        self.metadatas[index], local_start, local_end
+                    )
+                )
+
+        if len(pieces) == 0:
+            return np.empty((0,) + self.shape[1:], dtype=self.dtype)
+        if len(pieces) == 1:
+            return pieces[0]
+        return np.concatenate(pieces)
+
+    def __getitem__(
+        self, key: Union[int, slice, Tuple[Union[int, slice], ...]]
+    ) -> np.ndarray:
+        """
+        Index the rows with an integer or a slice, optionally followed by a channel index.
+
+        :param key: row index, or a tuple of a row index and a channel index.
+
+        :return: numpy array containing the selected data.
+        """
+        channel_key = None
+        if isinstance(key, tuple):
+            key, channel_key = key[0], key[1:]
+
+        n_rows = len(self)
+        if isinstance(key, slice):
+            row_range = range(*key.indices(n_rows))
+            if len(row_range) == 0:
+                data = self.read(0, 0)
+            else:
+                low = min(row_range)
+                data = self.read(low, max(row_range) + 1)
+                data = data[row_range.start - low :: row_range.step]
+        elif isinstance(key, (int, np.integer)):
+            index = int(key)
+            if index < 0:
+                index += n_rows
+            if not 0 <= index < n_rows:
+                raise IndexError(f"Row {key} is out of bounds for {n_rows} rows.")
+            data = self.read(index, index + 1)[0]
+        else:
+            raise TypeError(
+                f"Rows can only be indexed with integers or slices, not {type(key).__name__}."
+            )
+
+        if channel_key:
+            if isinstance(key, slice):
+                return data[(slice(None),) + channel_key]
+            return data[channel_key]
+        return data
@@ -0,0 +1,103 @@
+"""
+Module for iterating over (overlapping) windows of binary files associated with TSDF.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+from typing import Iterator
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from tsdf import read_binary
+from tsdf import tsdfmetadata
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+
+
+def count_windows(n_rows: int, window_length: int, step: int) -> int:
+    """
+    Compute the number of complete windows that fit in the given number of rows.
+
+    :param n_rows: number of rows.
+    :param window_length: number of rows in a window.
+    :param step: number of rows between the starts of consecutive windows.
+
+    :return: number of windows.
+    """
+    if n_rows < window_length:
+        return 0
+    return (n_rows - window_length) // step + 1
+
+
+def iterate_windows(
+    metadata: "tsdfmetadata.TSDFMetadata",
+    window_length: int,
+    step: int,
+    batch_size: int = 256,
+    chunk_rows: int = DEFAULT_CHUNK_ROWS,
+    use_memmap: bool = False,
+) -> Iterator[np.ndarray]:
+    """
+    Iterate over batches of windows of a binary file. Each batch is an array of shape
+    (n_windows, window_length, n_channels) and is a strided view into the loaded data,
+    i.e., overlapping windows share memory. Windows that do not fit completely in the file are omitted.
+    For windows defined in seconds, multiply by the sampling rate of the stream, e.g.,
+    6 s windows with 50% overlap at 100 Hz correspond to `window_length=600, step=300`.
+
+    The file is either memory-mapped as a whole (`use_memmap=True`), or read in chunks of about `chunk_rows` rows.
+    Consecutive chunks overlap by `window_length - step` rows, so windows that cross chunk boundaries are complete.
+
+    :param metadata: TSDFMetadata object.
+    :param window_length: number of rows in a window.
+    :param step: number of rows between the starts of consecutive windows.
+    :param batch_size: (optional) maximal number of windows in a batch.
+    :param chunk_rows: (optional) approximate number of rows read at once.
+    :param use_memmap: (optional) flag to memory-map the file instead of reading it in chunks.
+
+    :return: iterator over the batches of windows.
+    """
+    if window_length < 1 or step < 1 or batch_size < 1:
+        raise ValueError("Window length, step and batch size have to be positive.")
+    if isinstance(metadata.data_type, list):
+        raise tsdfmetadata.TSDFMetadataFieldValueError(
+            f"Windows require channels of a single data type, but {metadata.file_name} mixes data types."
+        )
+
+    n_windows = count_windows(metadata.rows, window_length, step)
+    if n_windows == 0:
+        return
+
+    if use_memmap:
+        data = read_binary.load_memmap_from_binary(metadata)
+        yield from _iterate_batches(data, window_length, step, batch_size)
+        return
+
+    # Each chunk contains a whole number of batches (except for the last one)
+    batches_per_chunk = max(1, chunk_rows // (step * batch_size))
+    windows_per_chunk = batches_per_chunk * batch_size
+    for first_window in range(0, n_windows, windows_per_chunk):
+        last_window = min(first_window + windows_per_chunk, n_windows)
+        start_row = first_window * step
+        end_row = (last_window - 1) * step + window_length
+        data = read_binary.load_ndarray_from_binary(metadata, start_row, end_row)
+        yield from _iterate_batches(data, window_length, step, batch_size)
+
+
+def _iterate_batches(
+    data: np.ndarray, window_length: int, step: int, batch_size: int
+) -> Iterator[np.ndarray]:
+    """
+    Split the data into windows, without copying it, and iterate over batches of these windows.
+
+    :param data: numpy array of shape (rows, channels), or (rows,) for a single channel.
+    :param window_length: number of rows in a window.
+    :param step: number of rows between the starts of consecutive windows.
+    :param batch_size: maximal number of windows in a batch.
+
+    :return: iterator over views of shape (n_windows, window_length, n_channels).
+    """
+    if data.ndim == 1:
+        data = data.reshape((-1, 1))
+    # sliding_window_view appends the window dimension: (n_windows, n_channels, window_length)
+    windows = sliding_window_view(data, window_length, axis=0)[::step]
+    windows = windows.transpose(0, 2, 1)
+    for start in range(0, windows.shape[0], batch_size):
+        yield windows[start : start + batch_size]
@@ -5,73 +5,397 @@ Reference: https://arxiv.org/abs/2211.11294
 """
 
 import os
-from typing import Any, Dict, List
+import sys
+from contextlib import ExitStack
+from datetime import timedelta
+from typing import TYPE_CHECKING, Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
 import numpy as np
-import pandas as pd
+from tsdf import encodings
 from tsdf import numpy_utils
+from tsdf import quantization
+from tsdf import storage
+from tsdf import time_utils
+from tsdf.instrumentation import traced
+from tsdf.constants import WRITE_BUFFER_SIZE
 
-from tsdf.tsdfmetadata import TSDFMetadata
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 
 def write_dataframe_to_binaries(
-    file_dir: str, df: pd.DataFrame, metadatas: List[TSDFMetadata]
+    file_dir: str,
+    df: "pd.DataFrame",
+    metadatas: List[TSDFMetadata],
+    preserve_dtypes: bool = False,
+    buffer_size: int = WRITE_BUFFER_SIZE,
+    endianness: Optional[str] = None,
+    quantize: Optional[float] = None,
+    durable: bool = True,
 ) -> None:
     """
     Save binary file based on the provided pandas DataFrame.
+    Each file is written atomically (see `storage.atomic_write`).
 
     :param file_dir:    path to the directory where the file will be saved.
     :param df:          pandas DataFrame containing the data.
     :param metadatas:   list of metadata objects to be saved, also contains
                         channels to be retrieved from dataframe.
+    :param preserve_dtypes: (optional) flag to store channels of different data types
+                        as records mixing these types (with 'data_type' and 'bits'
+                        specified per channel), instead of converting them to a common type.
+    :param buffer_size: (optional) number of bytes written at once.
+    :param endianness: (optional) byte order of the binary files ("little" or "big"). By default, the byte order of the data.
+    :param quantize:    (optional) largest absolute error allowed to store float channels as fixed-point integers
+                        (0 to only store them losslessly, see `quantization`). By default, the data is stored as it is.
+    :param durable:     (optional) flag to flush each file to disk before it replaces the previous version (see `file_utils.atomic_write`).
     """
     for metadata in metadatas:
         file_name = metadata.file_name
         path = os.path.join(file_dir, file_name)
         
         # Write
-        data = df[metadata.channels].to_numpy() # TODO: derive channels from dataframe or use specified in metadata? Also for file_name?
-        data.tofile(path)
+        selected = df[metadata.channels] # TODO: derive channels from dataframe or use specified in metadata? Also for file_name?
+        if preserve_dtypes and selected.dtypes.nunique() > 1:
+            data = np.empty(
+                len(selected),
+                dtype=[(channel, selected[channel].dtype) for channel in metadata.channels],
+            )
+            for channel in metadata.channels:
+                data[channel] = selected[channel].to_numpy()
+        else:
+            data = selected.to_numpy()
+        data_props = _write_data(path, data, buffer_size, endianness, quantize, durable)
 
         # Update metadata with data properties
-        data_props = _get_metadata_from_ndarray(data)
+        quantization.clear_encoding(metadata)
         for key in data_props:
             metadata.__setattr__(key, data_props[key])
 
 
-def _get_metadata_from_ndarray(data: np.ndarray) -> Dict[str, Any]:
+def _get_metadata_from_ndarray(
+    data: np.ndarray, dtype: Optional[np.dtype] = None
+) -> Dict[str, Any]:
     """
     Retrieve metadata information encoded in the NumPy array.
 
     :param data: NumPy array containing the data.
+    :param dtype: (optional) data type in which the data is stored, if it differs from the data type of the array.
 
     :return: dictionary containing the metadata.
     """
-
+    stored = data if dtype is None else np.empty(0, dtype)
     metadata = {
-        "data_type": numpy_utils.data_type_numpy_to_tsdf(data),
-        "bits": numpy_utils.bits_numpy_to_tsdf(data),
-        "endianness": numpy_utils.endianness_numpy_to_tsdf(data),
+        "data_type": numpy_utils.data_type_numpy_to_tsdf(stored),
+        "bits": numpy_utils.bits_numpy_to_tsdf(stored),
+        "endianness": numpy_utils.endianness_numpy_to_tsdf(stored),
         "rows": numpy_utils.rows_numpy_to_tsdf(data),
     }
     return metadata
 
 
+def _get_output_dtype(dtype: np.dtype, endianness: Optional[str]) -> np.dtype:
+    """
+    Compute the data type in which data is stored, given the requested byte order.
+
+    :param dtype: data type of the data.
+    :param endianness: requested TSDF metadata 'endianness' value, or None to keep the byte order of the data.
+
+    :return: NumPy data type.
+    """
+    if endianness is None:
+        return dtype
+    return numpy_utils.dtype_with_endianness(dtype, endianness)
+
+
+@traced("write_binary", lambda meta, file_dir, file_name, data, *args, **kwargs: data.nbytes)
 def write_binary_file(
-    file_dir: str, file_name: str, data: np.ndarray, metadata: dict
+    file_dir: str,
+    file_name: str,
+    data: np.ndarray,
+    metadata: dict,
+    buffer_size: int = WRITE_BUFFER_SIZE,
+    endianness: Optional[str] = None,
+    quantize: Optional[float] = None,
+    durable: bool = True,
 ) -> TSDFMetadata:
     """
     Save binary file based on the provided NumPy array.
+    The file is written atomically: readers see either the previous or the complete new version of the file.
 
     :param file_dir: path to the directory where the file will be saved.
     :param file_name: name of the file to be saved.
-    :param data: NumPy array containing the data.
+    :param data: NumPy array containing the data. Structured arrays are stored as records
+                 mixing data types, with one field per channel.
     :param metadata: dictionary containing the metadata.
+    :param buffer_size: (optional) number of bytes written at once.
+    :param endianness: (optional) byte order of the binary file ("little" or "big"). By default, the byte order of the data.
+    :param quantize: (optional) largest absolute error allowed to store float channels as fixed-point integers
+                     (0 to only store them losslessly, see `quantization`). By default, the data is stored as it is.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `file_utils.atomic_write`).
 
     :return: TSDFMetadata object.
     """
     path = os.path.join(file_dir, file_name)
-    data.tofile(path)
-    metadata.update(_get_metadata_from_ndarray(data))
+    data_props = _write_data(path, data, buffer_size, endianness, quantize, durable)
+    quantization.clear_encoding(metadata)
+    metadata.update(data_props)
     metadata.update({"file_name": file_name})
 
     return TSDFMetadata(metadata, file_dir)
+
+
+def write_time_binary_file(
+    file_dir: str,
+    file_name: str,
+    times: np.ndarray,
+    metadata: dict,
+    encoding: str = "difference",
+    tick: Optional[float] = None,
+    rate: Optional[float] = None,
+    tolerance: Optional[float] = None,
+    buffer_size: int = WRITE_BUFFER_SIZE,
+    durable: bool = True,
+) -> TSDFMetadata:
+    """
+    Save a time channel in a compact encoding (see `encodings`), which is declared in the metadata and decoded by the readers.
+
+    :param file_dir: path to the directory where the file will be saved.
+    :param file_name: name of the file to be saved.
+    :param times: time stamps relative to the start of the recording, in the unit of the channel ('units' of the metadata, by default 'ms').
+    :param metadata: dictionary containing the metadata.
+    :param encoding: (optional) encoding of the time stamps; one of `encodings.TIME_ENCODINGS`.
+    :param tick: (optional) resolution of difference encoded time stamps, in the unit of the channel.
+    :param rate: (optional) sampling rate (in Hz) of constant rate time stamps.
+    :param tolerance: (optional) largest error of constant rate time stamps, in the unit of the channel.
+    :param buffer_size: (optional) number of bytes written at once.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `file_utils.atomic_write`).
+
+    :return: TSDFMetadata object.
+
+    :raises TSDFMetadataFieldValueError: if the time stamps cannot be encoded.
+    """
+    units = metadata.get("units") or ["ms"]
+    data, fields = encodings.encode_time(
+        times, encoding, units[0], tick=tick, rate=rate, tolerance=tolerance
+    )
+    metadata.setdefault("channels", [time_utils.TIME_CHANNEL])
+    metadata.update(fields)
+    new_metadata = write_binary_file(
+        file_dir, file_name, data, metadata, buffer_size, durable=durable
+    )
+    # Constant rate time stamps are not stored, but the file still describes a row per time stamp
+    metadata["rows"] = new_metadata.rows = len(times)
+    return new_metadata
+
+
+def write_chunks_to_binaries(
+    file_dir: str,
+    chunks: Iterable[Union["pd.DataFrame", np.ndarray, Sequence[np.ndarray]]],
+    metadatas: List[TSDFMetadata],
+    total_rows: Optional[int] = None,
+    buffer_size: int = WRITE_BUFFER_SIZE,
+    update_end_time: bool = True,
+    endianness: Optional[str] = None,
+    durable: bool = True,
+) -> None:
+    """
+    Save binary files incrementally from an iterator of chunks, so the data never has to be in memory at once.
+    The data properties ('rows', 'data_type', etc.) of the metadata objects are derived after the last chunk;
+    the data type of each file is determined by its first chunk, and later chunks are converted to it (if their values fit in it).
+    If a metadata object specifies a 'sampling_rate', 'end_iso8601' is derived from 'start_iso8601' and the number of rows.
+    The files are written atomically, and only replace existing files once all the chunks have been written.
+
+    :param file_dir:    path to the directory where the files will be saved.
+    :param chunks:      iterator over chunks of consecutive rows. A chunk is either a pandas DataFrame
+                        containing the channels of all the metadata objects, a NumPy array (only for a
+                        single metadata object), or a sequence with a NumPy array for each metadata object.
+    :param metadatas:   list of metadata objects to be saved.
+    :param total_rows:  (optional) expected number of rows, used to preallocate the files (where supported).
+    :param buffer_size: (optional) size (in bytes) of the write buffer of each file.
+    :param update_end_time: (optional) flag to derive 'end_iso8601' from the 'sampling_rate'.
+    :param endianness: (optional) byte order of the binary files ("little" or "big"). By default, the byte order of the first chunk.
+    :param durable: (optional) flag to flush the files to disk before they replace the previous versions (see `file_utils.atomic_write`).
+
+    :raises TSDFMetadataFieldValueError: if a chunk does not match the metadata objects, or its values do not fit in the data type of the file.
+    """
+    paths = [os.path.join(file_dir, metadata.file_name) for metadata in metadatas]
+    dtypes: List[Optional[np.dtype]] = [None] * len(metadatas)
+    n_rows = 0
+    with ExitStack() as stack:
+        files = [
+            stack.enter_context(
+                storage.atomic_write(path, buffer_size=buffer_size, durable=durable)
+            )
+            for path in paths
+        ]
+        for chunk in chunks:
+            arrays = _split_chunk(chunk, metadatas)
+            for i, data in enumerate(arrays):
+                if dtypes[i] is None:
+                    dtypes[i] = _get_output_dtype(data.dtype, endianness)
+                    _preallocate(files[i], total_rows, data)
+                _check_chunk_dtype(data, dtypes[i], metadatas[i].file_name)
+                data = np.ascontiguousarray(data, dtype=dtypes[i])
+                if data.shape[0] != arrays[0].shape[0]:
+                    raise TSDFMetadataFieldValueError(
+                        "All the binary files have to receive the same number of rows from a chunk."
+                    )
+                _write_ndarray(files[i], data, buffer_size)
+            n_rows += arrays[0].shape[0]
+        if total_rows is not None:
+            for file in files:
+                # Remove the preallocated space that was not used (only local files are preallocated)
+                if file.seekable():
+                    file.truncate()
+
+    for metadata, dtype in zip(metadatas, dtypes):
+        quantization.clear_encoding(metadata)
+        if dtype is not None:
+            data_props = _get_metadata_from_ndarray(np.empty(0, dtype))
+            for key in data_props:
+                metadata.__setattr__(key, data_props[key])
+        metadata.rows = n_rows
+        sampling_rate = getattr(metadata, "sampling_rate", None)
+        if update_end_time and sampling_rate and n_rows > 0:
+            metadata.end = metadata.start + timedelta(
+                seconds=(n_rows - 1) / sampling_rate
+            )
+
+
+def _check_chunk_dtype(data: np.ndarray, dtype: np.dtype, file_name: str) -> None:
+    """
+    Check that a chunk can be converted to the data type of its binary file without changing its values,
+    i.e., it has the same kind of data type (e.g., integers) and its values are within the range of the data type.
+
+    :param data: NumPy array containing the chunk.
+    :param dtype: data type of the binary file.
+    :param file_name: name of the binary file, for the error message.
+
+    :raises TSDFMetadataFieldValueError: if the chunk cannot be converted.
+    """
+    if np.can_cast(data.dtype, dtype, "safe"):
+        return
+    fits = np.can_cast(data.dtype, dtype, "same_kind")
+    if fits and dtype.names is None and data.size > 0:
+        limits = np.iinfo(dtype) if dtype.kind in "iu" else np.finfo(dtype)
+        finite = data[np.isfinite(data)] if dtype.kind == "f" else data
+        fits = finite.size == 0 or (finite.min() >= limits.min and finite.max() <= limits.max)
+    if not fits:
+        raise TSDFMetadataFieldValueError(
+            f"A chunk of type {data.dtype} cannot be stored in binary file {file_name} of type {dtype} "
+            "(the type of its first chunk) without changing its values."
+        )
+
+
+def _write_data(
+    path: str,
+    data: np.ndarray,
+    buffer_size: int,
+    endianness: Optional[str],
+    quantize: Optional[float],
+    durable: bool = True,
+) -> Dict[str, Any]:
+    """
+    Write a NumPy array to a binary file (atomically), quantising it if requested and possible.
+
+    :param path: path to the binary file.
+    :param data: NumPy array containing the data.
+    :param buffer_size: number of bytes written at once.
+    :param endianness: requested TSDF metadata 'endianness' value, or None to keep the byte order of the data.
+    :param quantize: largest absolute error allowed to quantise the data, or None to store it as it is.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version.
+
+    :return: metadata fields describing the stored data.
+    """
+    encoding = None if quantize is None else quantization.analyse(data, quantize)
+    dtype = _get_output_dtype(
+        data.dtype if encoding is None else encoding.dtype, endianness
+    )
+    encode = None if encoding is None else lambda block: quantization.quantize(block, encoding)
+    with storage.atomic_write(path, buffer_size=buffer_size, durable=durable) as file:
+        _write_ndarray(file, data, buffer_size, dtype, encode)
+
+    data_props = _get_metadata_from_ndarray(data, dtype)
+    if encoding is not None:
+        data_props.update(quantization.get_encoding_fields(encoding))
+    return data_props
+
+
+def _write_ndarray(
+    file: Any,
+    data: np.ndarray,
+    write_size: int,
+    dtype: Optional[np.dtype] = None,
+    encode: Optional[Callable[[np.ndarray], np.ndarray]] = None,
+) -> None:
+    """
+    Write the rows of a NumPy array (in C order) to an opened binary file, in blocks of about `write_size` bytes.
+    Only one block at a time is copied if the array is not contiguous or has to be converted.
+
+    :param file: opened binary file.
+    :param data: NumPy array containing the data.
+    :param write_size: number of bytes written at once.
+    :param dtype: (optional) data type in which the data is written (e.g., with another byte order).
+    :param encode: (optional) function applied to each block before it is written (e.g., quantisation).
+    """
+    if data.ndim == 0 or data.shape[0] == 0:
+        return
+    row_size = max(1, data.itemsize * (data.size // data.shape[0]))
+    rows_per_write = max(1, write_size // row_size)
+    for start in range(0, data.shape[0], rows_per_write):
+        block = data[start : start + rows_per_write]
+        if encode is not None:
+            block = encode(block)
+        file.write(np.ascontiguousarray(block, dtype=dtype))
+
+
+def _split_chunk(
+    chunk: Union["pd.DataFrame", np.ndarray, Sequence[np.ndarray]],
+    metadatas: List[TSDFMetadata],
+) -> List[np.ndarray]:
+    """
+    Split a chunk into the arrays to be appended to each binary file.
+
+    :param chunk: pandas DataFrame, NumPy array or sequence of NumPy arrays.
+    :param metadatas: list of metadata objects.
+
+    :return: list with a NumPy array for each metadata object.
+
+    :raises TSDFMetadataFieldValueError: if the chunk does not match the metadata objects.
+    """
+    # A data frame can only have been created if pandas has been imported
+    pandas = sys.modules.get("pandas")
+    if pandas is not None and isinstance(chunk, pandas.DataFrame):
+        return [chunk[metadata.channels].to_numpy() for metadata in metadatas]
+    if isinstance(chunk, np.ndarray):
+        if len(metadatas) != 1:
+            raise TSDFMetadataFieldValueError(
+                "A chunk given as a single NumPy array can only be written to one binary file."
+            )
+        return [chunk]
+    arrays = list(chunk)
+    if len(arrays) != len(metadatas):
+        raise TSDFMetadataFieldValueError(
+            "A chunk given as a sequence has to contain a NumPy array for each metadata object."
+        )
+    return arrays
+
+
+def _preallocate(file: Any, total_rows: Optional[int], data: np.ndarray) -> None:
+    """
+    Reserve disk space for the expected size of a binary file, if supported by the platform.
+
+    :param file: opened binary file.
+    :param total_rows: expected number of rows, or None if unknown.
+    :param data: first chunk of the data, used to compute the size of a row.
+    """
+    if total_rows is None or not hasattr(os, "posix_fallocate") or data.shape[0] == 0:
+        return
+    row_size = data.nbytes // data.shape[0]
+    try:
+        os.posix_fallocate(file.fileno(), 0, total_rows * row_size)
+    except OSError:
+        # Preallocation is an optimisation; not all file systems support it
+        pass
@@ -4,18 +4,33 @@ Module for writing TSDF files.
 Reference: https://arxiv.org/abs/2211.11294
 """
 
-from typing import Any, Dict, List
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
 from tsdf import file_utils
 from tsdf import parse_metadata
+from tsdf import storage
+from tsdf.instrumentation import traced
 from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
 
 
-def write_metadata(metadatas: List[TSDFMetadata], file_name: str) -> None:
+def _get_metadata_file_size(
+    result: None, metadatas: List[TSDFMetadata], file_name: str, *args: Any, **kwargs: Any
+) -> int:
+    """Size of the written metadata file, reported to the tracers of `write_metadata`."""
+    return storage.get_file_size(os.path.join(metadatas[0].file_dir_path, file_name))
+
+
+@traced("write_metadata", _get_metadata_file_size)
+def write_metadata(
+    metadatas: List[TSDFMetadata], file_name: str, durable: bool = True
+) -> None:
     """
     Combine and save the TSDF metadata objects as a json file.
 
     :param metadatas: List of TSDFMetadata objects to be saved.
     :param file_name: Name of the file to be saved. The file will be saved in the directory of the first TSDFMetadata object in the list.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `file_utils.atomic_write`).
 
     :raises TSDFMetadataFieldValueError: if the metadata files cannot be combined (e.g. they have no common fields) or if the list of TSDFMetadata objects is empty.
     """
@@ -30,23 +45,306 @@ def write_metadata(metadatas: List[TSDFMetadata], file_name: str) -> None:
     if len(metadatas) == 1:
         meta = metadatas[0]
         file_utils.write_to_file(
-            meta.get_plain_tsdf_dict_copy(), meta.file_dir_path, file_name
+            meta.get_plain_tsdf_dict_copy(), meta.file_dir_path, file_name, durable
         )
         return
 
     # Ensure that the metadata files can be combined
     parse_metadata.confirm_dir_of_metadata(metadatas)
 
+    overlap = _build_metadata_tree(metadatas)
+    file_utils.write_to_file(
+        overlap, metadatas[0].file_dir_path, file_name, durable
+    )
+
+
+def _build_metadata_tree(metadatas: List[TSDFMetadata]) -> Dict[str, Any]:
+    """
+    Combine multiple TSDF metadata objects into a tree structure, by grouping common values.
+
+    :param metadatas: List of TSDFMetadata objects.
+
+    :return: Dictionary containing the combined metadata.
+
+    :raises TSDFMetadataFieldValueError: if the metadata objects have no common fields.
+    """
     plain_meta = [meta.get_plain_tsdf_dict_copy() for meta in metadatas]
     overlap = _extract_common_fields(plain_meta)
     if not overlap:
         raise TSDFMetadataFieldValueError(
-            "Metadata files mist have at least one common field. Otherwise, they should be stored separately."
+            "Metadata files must have at least one common field. Otherwise, they should be stored separately."
         )
 
     if len(plain_meta) > 0:
         overlap["sensors"] = _calculate_overlaps_rec(plain_meta)
-    file_utils.write_to_file(overlap, metadatas[0].file_dir_path, file_name)
+    return overlap
+
+
+def add_stream_to_metadata(
+    metadata_path: str, metadata: TSDFMetadata, durable: bool = True
+) -> None:
+    """
+    Add a stream to an existing metadata file, without regrouping the other streams. The stream is inserted
+    under the group (e.g., an element of `sensors`) whose fields best match its metadata, and only the fields
+    that differ from the inherited ones are stored with it. The file is rewritten atomically.
+
+    The whole metadata file is parsed and rewritten, so the cost of an update is proportional to the size of
+    the file rather than to the size of the change; the binary files of the other streams are not read.
+
+    :param metadata_path: path to the metadata file.
+    :param metadata: TSDFMetadata object of the stream, located in the directory of the metadata file.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `file_utils.atomic_write`).
+
+    :raises TSDFMetadataFieldValueError: if the metadata is invalid, is located in another directory, or if the file already contains the stream.
+    """
+    tree = _load_metadata_tree(metadata_path, metadata)
+    if _find_stream(tree, metadata.file_name) is not None:
+        raise TSDFMetadataFieldValueError(
+            f"{metadata_path} already contains the binary file {metadata.file_name}."
+        )
+    _insert_stream(tree, metadata, metadata_path)
+    _write_metadata_tree(tree, metadata_path, durable)
+
+
+def replace_stream_in_metadata(
+    metadata_path: str, metadata: TSDFMetadata, durable: bool = True
+) -> None:
+    """
+    Replace the metadata of a stream (identified by its `file_name`) in an existing metadata file, without
+    regrouping the other streams. If it is the only stream, the file describes the new metadata alone.
+    The whole file is parsed and rewritten atomically (see `add_stream_to_metadata`).
+
+    :param metadata_path: path to the metadata file.
+    :param metadata: new TSDFMetadata object of the stream, located in the directory of the metadata file.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `file_utils.atomic_write`).
+
+    :raises TSDFMetadataFieldValueError: if the metadata is invalid, is located in another directory, or if the file does not contain the stream.
+    """
+    tree = _load_metadata_tree(metadata_path, metadata)
+    _remove_stream(tree, metadata.file_name, metadata_path, allow_empty=True)
+    if parse_metadata._contains_file_name(tree):
+        _insert_stream(tree, metadata, metadata_path)
+    else:
+        # The stream was the only one, so its new metadata replaces the whole structure
+        tree = metadata.get_plain_tsdf_dict_copy()
+    _write_metadata_tree(tree, metadata_path, durable)
+
+
+def remove_stream_from_metadata(
+    metadata_path: str, file_name: str, durable: bool = True
+) -> None:
+    """
+    Remove a stream from an existing metadata file, without regrouping the other streams. Groups left
+    without streams are removed as well. The whole file is parsed and rewritten atomically (see `add_stream_to_metadata`).
+
+    :param metadata_path: path to the metadata file.
+    :param file_name: name of the binary file of the stream.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version (see `file_utils.atomic_write`).
+
+    :raises TSDFMetadataFieldValueError: if the file does not contain the stream, or if it is the only stream in the file.
+    """
+    tree = _load_metadata_tree(metadata_path)
+    _remove_stream(tree, file_name, metadata_path)
+    _write_metadata_tree(tree, metadata_path, durable)
+
+
+def _load_metadata_tree(
+    metadata_path: str, metadata: Optional[TSDFMetadata] = None
+) -> Dict[str, Any]:
+    """
+    Load the json structure of a metadata file, and check that a stream can be added to it.
+
+    :param metadata_path: path to the metadata file.
+    :param metadata: (optional) TSDFMetadata object of the stream to be added.
+
+    :return: json structure of the metadata file.
+
+    :raises TSDFMetadataFieldValueError: if the metadata is invalid or is located in another directory.
+    """
+    if metadata is not None:
+        metadata.validate()
+        if os.path.realpath(metadata.file_dir_path) != os.path.dirname(
+            os.path.realpath(metadata_path)
+        ):
+            raise TSDFMetadataFieldValueError(
+                "Metadata files have to be in the same folder to be combined."
+            )
+    with storage.open_binary(metadata_path) as file:
+        return json.load(file)
+
+
+def _write_metadata_tree(
+    tree: Dict[str, Any], metadata_path: str, durable: bool = True
+) -> None:
+    """
+    Save the json structure of a metadata file (atomically).
+
+    :param tree: json structure of the metadata file.
+    :param metadata_path: path to the metadata file.
+    :param durable: (optional) flag to flush the file to disk before it replaces the previous version.
+    """
+    dir_path, file_name = os.path.split(os.fspath(metadata_path))
+    file_utils.write_to_file(tree, dir_path, file_name, durable)
+
+
+def _get_children(node: Dict[str, Any]) -> List[Tuple[str, Any]]:
+    """
+    Get the keys of a node of the metadata structure that contain nested streams.
+
+    :param node: node of the metadata structure.
+
+    :return: list of (key, value) tuples, where the value is a list or a dictionary containing streams.
+    """
+    return [
+        (key, value)
+        for key, value in node.items()
+        if key != "file_name" and parse_metadata._contains_file_name(value)
+    ]
+
+
+def _get_fields(node: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Get the fields defined at a node of the metadata structure (inherited by the nested streams).
+
+    :param node: node of the metadata structure.
+
+    :return: dictionary of the fields.
+    """
+    children = {key for key, _ in _get_children(node)}
+    return {key: value for key, value in node.items() if key not in children}
+
+
+def _find_stream(node: Any, file_name: str) -> Optional[List[Tuple[Any, Any]]]:
+    """
+    Find the path from a node of the metadata structure to the node describing a stream.
+
+    :param node: node of the metadata structure (a dictionary or a list of nodes).
+    :param file_name: name of the binary file of the stream.
+
+    :return: list of (container, key) tuples, from the given node down to the stream (i.e., `container[key]` is the next node), or None if the stream is not found.
+    """
+    items = enumerate(node) if isinstance(node, list) else node.items()
+    for key, child in items:
+        if isinstance(child, dict) and child.get("file_name") == file_name:
+            return [(node, key)]
+        if isinstance(child, (dict, list)):
+            path = _find_stream(child, file_name)
+            if path is not None:
+                return [(node, key)] + path
+    return None
+
+
+def _remove_stream(
+    tree: Dict[str, Any], file_name: str, metadata_path: str, allow_empty: bool = False
+) -> None:
+    """
+    Remove a stream from the metadata structure, together with the groups that no longer contain any streams.
+
+    :param tree: json structure of the metadata file.
+    :param file_name: name of the binary file of the stream.
+    :param metadata_path: path to the metadata file (used in error messages).
+    :param allow_empty: (optional) flag to allow removing the only stream, which leaves no stream in the structure.
+
+    :raises TSDFMetadataFieldValueError: if the structure does not contain the stream, or if it is the only stream (unless `allow_empty` is set).
+    """
+    if tree.get("file_name") == file_name:
+        # The structure describes this stream alone
+        if not allow_empty:
+            raise TSDFMetadataFieldValueError(
+                f"{file_name} is the only stream in {metadata_path}, so it cannot be removed."
+            )
+        tree.clear()
+        return
+    path = _find_stream(tree, file_name)
+    if path is None:
+        raise TSDFMetadataFieldValueError(
+            f"{metadata_path} does not contain the binary file {file_name}."
+        )
+    for container, key in reversed(path):
+        del container[key]
+        if parse_metadata._contains_file_name(container):
+            break
+    if not allow_empty and not parse_metadata._contains_file_name(tree):
+        raise TSDFMetadataFieldValueError(
+            f"{file_name} is the only stream in {metadata_path}, so it cannot be removed."
+        )
+
+
+def _insert_stream(
+    tree: Dict[str, Any], metadata: TSDFMetadata, metadata_path: str
+) -> None:
+    """
+    Insert a stream under the group of the metadata structure that best matches its fields.
+
+    :param tree: json structure of the metadata file.
+    :param metadata: TSDFMetadata object of the stream.
+    :param metadata_path: path to the metadata file.
+
+    :raises TSDFMetadataFieldValueError: if the stream has no field in common with the other streams, or if the
+                                         field 'sensors' of the group does not describe streams.
+    """
+    stream = metadata.get_plain_tsdf_dict_copy()
+
+    if "file_name" in tree:
+        # The file describes a single stream, which becomes a group of two streams
+        old_stream = dict(tree)
+        common = _extract_common_fields([old_stream, stream])
+        if not common:
+            raise TSDFMetadataFieldValueError(
+                "Metadata files must have at least one common field. Otherwise, they should be stored separately."
+            )
+        tree.clear()
+        tree.update(common)
+        tree["sensors"] = [old_stream, stream]
+        return
+
+    inherited = _get_fields(tree)
+    if any(key not in stream for key in inherited):
+        # The stream would inherit fields it does not have, so the streams have to be regrouped
+        streams = parse_metadata.read_data(tree, os.path.realpath(metadata_path))
+        regrouped = _build_metadata_tree(list(streams.values()) + [metadata])
+        tree.clear()
+        tree.update(regrouped)
+        return
+
+    # Descend into the groups whose fields all match the stream, preferring the ones defining most fields
+    node = tree
+    while True:
+        best: Optional[Dict[str, Any]] = None
+        best_fields: Dict[str, Any] = {}
+        for _, value in _get_children(node):
+            for child in value if isinstance(value, list) else [value]:
+                if not isinstance(child, dict) or "file_name" in child:
+                    continue
+                fields = _get_fields(child)
+                if all(key in stream and stream[key] == v for key, v in fields.items()):
+                    if best is None or len(fields) > len(best_fields):
+                        best, best_fields = child, fields
+        if best is None:
+            break
+        node = best
+        inherited.update(best_fields)
+
+    leaf = {
+        key: value
+        for key, value in stream.items()
+        if key not in inherited or inherited[key] != value
+    }
+    children = _get_children(node)
+    lists = [value for _, value in children if isinstance(value, list)]
+    if lists:
+        lists[0].append(leaf)
+        return
+    sensors = node.get("sensors")
+    if sensors is None:
+        node["sensors"] = [leaf]
+    elif isinstance(sensors, dict) and parse_metadata._contains_file_name(sensors):
+        # A single nested group (or stream) becomes a list, next to the new stream
+        node["sensors"] = [sensors, leaf]
+    else:
+        raise TSDFMetadataFieldValueError(
+            f"The field 'sensors' of {metadata_path} does not describe streams, so {metadata.file_name} cannot be added to it."
+        )
 
 
 def _extract_common_fields(metadatas: List[Dict[str, Any]]) -> Dict[str, Any]:
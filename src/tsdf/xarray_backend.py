@@ -0,0 +1,153 @@
+"""
+Module providing an xarray backend for TSDF, i.e., `xr.open_dataset(path, engine="tsdf")`.
+
+Requires the optional `xarray` package. Each binary file referenced by the metadata file becomes a
+variable with dimensions time × channel, which is lazily backed by the binary file: only the rows
+that are accessed are read. Variables can be chunked (e.g., with dask), and chunks are read concurrently.
+
+Reference: https://arxiv.org/abs/2211.11294
+"""
+
+import os
+from typing import Any, Dict, Iterable, Optional, Tuple
+import numpy as np
+from xarray import Dataset, Variable
+from xarray.backends import BackendArray, BackendEntrypoint
+from xarray.core import indexing
+from tsdf import read_binary
+from tsdf import read_tsdf
+from tsdf.constants import DEFAULT_CHUNK_ROWS
+from tsdf.tsdfmetadata import TSDFMetadata, TSDFMetadataFieldValueError
+
+
+class TSDFBackendArray(BackendArray):
+    """Lazy two-dimensional (time × channel) array backed by a binary file."""
+
+    def __init__(self, metadata: TSDFMetadata) -> None:
+        """
+        :param metadata: TSDFMetadata object describing the binary file.
+
+        :raises TSDFMetadataFieldValueError: if the binary file mixes data types per channel.
+        """
+        if isinstance(metadata.data_type, list):
+            raise TSDFMetadataFieldValueError(
+                f"Binary file {metadata.file_name} mixes data types per channel, which cannot be represented by one variable."
+            )
+        self.metadata = metadata
+        self.shape = (metadata.rows, len(metadata.channels))
+        self.dtype = read_binary.load_ndarray_from_binary(metadata, 0, 0).dtype
+
+    def __getitem__(self, key: indexing.ExplicitIndexer) -> np.ndarray:
+        return indexing.explicit_indexing_adapter(
+            key, self.shape, indexing.IndexingSupport.BASIC, self._raw_indexing_method
+        )
+
+    def _raw_indexing_method(self, key: Tuple[Any, ...]) -> np.ndarray:
+        """
+        Read the rows selected by the key from the binary file. Every call opens the file separately, so concurrent reads are safe.
+
+        :param key: tuple of a row index and a channel index (integers or slices).
+
+        :return: numpy array containing the selected data.
+        """
+        row_key, channel_key = key
+        if isinstance(row_key, slice):
+            row_range = range(*row_key.indices(self.shape[0]))
+            if len(row_range) == 0:
+                data = read_binary.load_ndarray_from_binary(self.metadata, 0, 0)
+            else:
+                low = min(row_range)
+                data = read_binary.load_ndarray_from_binary(
+                    self.metadata, low, max(row_range) + 1
+                )
+                data = data[row_range.start - low :: row_range.step]
+        else:
+            row = int(row_key)
+            data = read_binary.load_ndarray_from_binary(self.metadata, row, row + 1)
+        data = data.reshape((-1, self.shape[1]))
+        if not isinstance(row_key, slice):
+            data = data[0]
+            return data[channel_key]
+        return data[:, channel_key]
+
+
+class TSDFBackendEntrypoint(BackendEntrypoint):
+    """xarray backend opening TSDF metadata files."""
+
+    description = "Open TSDF (Time Series Data Format) files in xarray"
+    url = "https://github.com/biomarkersParkinson/tsdf"
+    open_dataset_parameters = ["filename_or_obj", "drop_variables", "stream"]
+
+    def open_dataset(
+        self,
+        filename_or_obj: Any,
+        *,
+        drop_variables: Optional[Iterable[str]] = None,
+        stream: Optional[str] = None,
+    ) -> Dataset:
+        """
+        Open a TSDF metadata file as a dataset. Each binary file becomes a variable named after the
+        file (without extension), with the channels and units as coordinates and the remaining scalar
+        metadata fields as attributes. If the dataset contains a single variable (or `stream` is provided),
+        its dimensions are named `time` and `channel`; otherwise, the dimensions are prefixed by the variable name.
+
+        :param filename_or_obj: path to the TSDF metadata file.
+        :param drop_variables: (optional) variables that are not loaded.
+        :param stream: (optional) file name of the binary file to be opened (by default, all are opened).
+
+        :return: lazily loaded xarray Dataset.
+        """
+        metadatas = read_tsdf.load_metadata_from_path(os.fspath(filename_or_obj))
+        if stream is not None:
+            metadatas = {stream: metadatas[stream]}
+        drop_variables = set(drop_variables or [])
+        selected = {
+            os.path.splitext(file_name)[0]: metadata
+            for file_name, metadata in metadatas.items()
+            if os.path.splitext(file_name)[0] not in drop_variables
+        }
+
+        data_vars = {}
+        coords = {}
+        for name, metadata in selected.items():
+            prefix = "" if len(selected) == 1 else f"{name}_"
+            time_dim = f"{prefix}time"
+            channel_dim = f"{prefix}channel"
+            data = indexing.LazilyIndexedArray(TSDFBackendArray(metadata))
+            data_vars[name] = Variable(
+                (time_dim, channel_dim),
+                data,
+                attrs=_get_scalar_attributes(metadata),
+                encoding={"preferred_chunks": {time_dim: DEFAULT_CHUNK_ROWS}},
+            )
+            coords[channel_dim] = (channel_dim, metadata.channels)
+            coords[f"{prefix}units"] = (channel_dim, metadata.units)
+        return Dataset(data_vars, coords=coords)
+
+    def guess_can_open(self, filename_or_obj: Any) -> bool:
+        """
+        Check whether the path points to a TSDF metadata file (i.e., ends with "meta.json").
+
+        :param filename_or_obj: path to the file.
+
+        :return: True if the file can be opened by this backend.
+        """
+        try:
+            return os.fspath(filename_or_obj).endswith("meta.json")
+        except TypeError:
+            return False
+
+
+def _get_scalar_attributes(metadata: TSDFMetadata) -> Dict[str, Any]:
+    """
+    Collect the metadata fields that can be stored as attributes of a variable.
+
+    :param metadata: TSDFMetadata object.
+
+    :return: dictionary containing the scalar metadata fields.
+    """
+    return {
+        key: value
+        for key, value in metadata.get_plain_tsdf_dict_copy().items()
+        if isinstance(value, (str, int, float))
+    }
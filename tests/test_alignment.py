@@ -0,0 +1,110 @@
+import numpy as np
+import pytest
+import tsdf
+from tsdf import alignment
+from utils import load_meta_dict
+
+
+def _write_stream(shared_datadir, name, times, values, time_unit="s", start=None):
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_float32")
+    if start is not None:
+        meta_dict["start_iso8601"] = start
+    n_channels = values.shape[1]
+    time_meta = tsdf.write_binary_file(
+        shared_datadir,
+        f"tmp_{name}_time.bin",
+        times,
+        dict(meta_dict, channels=["time"], units=[time_unit]),
+    )
+    values_meta = tsdf.write_binary_file(
+        shared_datadir,
+        f"tmp_{name}_values.bin",
+        values,
+        dict(
+            meta_dict,
+            channels=[f"{name}_{i}" for i in range(n_channels)],
+            units=["unitless"] * n_channels,
+        ),
+    )
+    return time_meta, values_meta
+
+
+def _test_streams(shared_datadir):
+    rs = np.random.RandomState(seed=42)
+    acc_times = np.cumsum(rs.uniform(0.009, 0.011, 120))
+    ppg_times = 0.05 + np.cumsum(rs.uniform(0.03, 0.035, 30))
+    acc = _write_stream(shared_datadir, "acc", acc_times, rs.rand(120, 3))
+    # The PPG time channel is stored in ms
+    ppg = _write_stream(shared_datadir, "ppg", ppg_times * 1000, rs.rand(30, 1), "ms")
+    return acc, ppg, acc_times, ppg_times
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 1000])
+def test_align_union_linear(shared_datadir, chunk_rows):
+    acc, ppg, acc_times, ppg_times = _test_streams(shared_datadir)
+
+    times, values = alignment.align_streams([acc, ppg], chunk_rows=chunk_rows)
+    union = np.union1d(acc_times, ppg_times)
+    expected_times = union[
+        (union >= ppg_times[0]) & (union <= min(acc_times[-1], ppg_times[-1]))
+    ]
+    assert np.allclose(times, expected_times)
+    assert values.shape == (expected_times.shape[0], 4)
+    assert alignment.get_aligned_channels([acc, ppg]) == [
+        "acc_0",
+        "acc_1",
+        "acc_2",
+        "ppg_0",
+    ]
+
+    acc_values = tsdf.load_ndarray_from_binary(acc[1])
+    ppg_values = tsdf.load_ndarray_from_binary(ppg[1])
+    for i in range(3):
+        assert np.allclose(values[:, i], np.interp(times, acc_times, acc_values[:, i]))
+    assert np.allclose(values[:, 3], np.interp(times, ppg_times, ppg_values))
+
+
+@pytest.mark.parametrize("method", ["previous", "nearest", "linear"])
+def test_align_rate_matches_unchunked(shared_datadir, method):
+    acc, ppg, _, ppg_times = _test_streams(shared_datadir)
+
+    expected_times, expected_values = alignment.align_streams(
+        [acc, ppg], method, rate=25.0, chunk_rows=1000
+    )
+    times, values = alignment.align_streams([acc, ppg], method, rate=25.0, chunk_rows=4)
+    assert np.allclose(np.diff(times), 0.04)
+    assert np.isclose(times[0], ppg_times[0])
+    assert np.array_equal(times, expected_times)
+    assert np.array_equal(values, expected_values)
+
+
+def test_align_same_metadata_for_time_and_values(shared_datadir):
+    metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    time_meta = metadata["ppp_format_time.bin"]
+    values_meta = metadata["ppp_format_samples.bin"]
+
+    times, values = alignment.align_streams(
+        [(time_meta, values_meta), (time_meta, time_meta)], method="previous", chunk_rows=3
+    )
+    assert times.shape == (17,)
+    assert np.array_equal(values[:, :6], tsdf.load_ndarray_from_binary(values_meta))
+
+
+def test_align_streams_with_different_starts(shared_datadir):
+    rs = np.random.RandomState(seed=42)
+    acc_times = np.arange(100) * 0.1
+    acc = _write_stream(
+        shared_datadir, "acc", acc_times, rs.rand(100, 1), start="2019-10-15T10:39:17+00:00"
+    )
+    # The PPG stream starts 5 s later, and its time channel is relative to its own start
+    ppg = _write_stream(
+        shared_datadir, "ppg", acc_times, rs.rand(100, 1), start="2019-10-15T10:39:22+00:00"
+    )
+
+    times, values = alignment.align_streams([acc, ppg], rate=10.0)
+    assert np.isclose(times[0], 5.0)
+    assert np.isclose(times[-1], 9.9)
+    ppg_values = tsdf.load_ndarray_from_binary(ppg[1])
+    acc_values = tsdf.load_ndarray_from_binary(acc[1])
+    assert np.allclose(values[:, 0], acc_values[50:].reshape(-1))
+    assert np.allclose(values[:, 1], ppg_values[:50].reshape(-1))
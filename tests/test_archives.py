@@ -0,0 +1,78 @@
+import io
+import tarfile
+import zipfile
+import numpy as np
+import pytest
+import tsdf
+from tsdf import archives
+
+FILE_NAMES = ["ppp_format_meta.json", "ppp_format_time.bin", "ppp_format_samples.bin"]
+
+
+def _create_zip(shared_datadir, name, compression):
+    path = shared_datadir / name
+    with zipfile.ZipFile(path, "w", compression=compression) as archive:
+        for file_name in FILE_NAMES:
+            archive.write(shared_datadir / file_name, f"session/{file_name}")
+    return path
+
+
+def _create_tar(shared_datadir, name, mode):
+    path = shared_datadir / name
+    with tarfile.open(path, mode) as archive:
+        for file_name in FILE_NAMES:
+            archive.add(shared_datadir / file_name, f"session/{file_name}")
+    return path
+
+
+@pytest.mark.parametrize(
+    "create_archive",
+    [
+        lambda d: _create_zip(d, "tmp_stored.zip", zipfile.ZIP_STORED),
+        lambda d: _create_zip(d, "tmp_deflated.zip", zipfile.ZIP_DEFLATED),
+        lambda d: _create_tar(d, "tmp_archive.tar", "w"),
+        lambda d: _create_tar(d, "tmp_archive.tar.gz", "w:gz"),
+    ],
+)
+def test_load_from_archive(shared_datadir, create_archive):
+    """Test that the data loaded from an archive matches the extracted data."""
+    archive_path = create_archive(shared_datadir)
+    expected = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    metadatas = tsdf.load_metadata_from_path(archive_path / "session" / "ppp_format_meta.json")
+
+    for file_name, metadata in metadatas.items():
+        data = tsdf.load_ndarray_from_binary(expected[file_name])
+        assert np.array_equal(tsdf.load_ndarray_from_binary(metadata), data)
+        assert np.array_equal(tsdf.load_ndarray_from_binary(metadata, 5, 12), data[5:12])
+        assert np.array_equal(tsdf.load_memmap_from_binary(metadata), data)
+        chunks = list(tsdf.load_ndarray_chunks(metadata, chunk_rows=7))
+        assert np.array_equal(np.concatenate(chunks), data)
+
+    assert len(tsdf.load_metadatas_from_dir(archive_path)) == 1
+
+
+def test_memmap_stored_member(shared_datadir):
+    """Test that binary files stored without compression are memory-mapped within the archive."""
+    archive_path = _create_zip(shared_datadir, "tmp_stored.zip", zipfile.ZIP_STORED)
+    metadatas = tsdf.load_metadata_from_path(archive_path / "session" / "ppp_format_meta.json")
+    data = tsdf.load_memmap_from_binary(metadatas["ppp_format_samples.bin"])
+    assert isinstance(data, np.memmap)
+    assert data.filename == str(archive_path)
+
+
+def test_load_from_file_object(shared_datadir):
+    """Test loading metadata from file objects, with and without a name."""
+    with open(shared_datadir / "ppp_format_meta.json", "rb") as file:
+        metadatas = tsdf.load_metadata_from_path(file)
+    assert tsdf.load_ndarray_from_binary(metadatas["ppp_format_time.bin"]).shape[0] > 0
+
+    content = (shared_datadir / "ppp_format_meta.json").read_bytes()
+    metadatas = tsdf.load_metadata_file(io.BytesIO(content))
+    assert metadatas["ppp_format_time.bin"].file_dir_path == ""
+
+
+def test_missing_member(shared_datadir):
+    """Test that a missing member of an archive raises an error."""
+    archive_path = _create_zip(shared_datadir, "tmp_stored.zip", zipfile.ZIP_STORED)
+    with pytest.raises(FileNotFoundError):
+        archives.open_binary(str(archive_path / "session" / "missing.bin"))
@@ -0,0 +1,83 @@
+import numpy as np
+import pytest
+import tsdf
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.parquet as pq
+from tsdf import arrow_utils
+
+
+def _load_ppp(shared_datadir):
+    metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    return [metadata["ppp_format_time.bin"], metadata["ppp_format_samples.bin"]]
+
+
+def test_arrow_table_is_zero_copy_for_single_channel(shared_datadir):
+    metas = _load_ppp(shared_datadir)
+    table = arrow_utils.load_arrow_table(metas, chunk_rows=5)
+    assert table.num_rows == 17
+    assert table.column_names == metas[0].channels + metas[1].channels
+    assert table.schema.field("acceleration_x").type == pa.int16()
+
+    df = tsdf.load_dataframe_from_binaries(metas, tsdf.constants.ConcatenationType.columns)
+    for channel in table.column_names:
+        assert np.array_equal(table.column(channel).to_numpy(), df[channel].to_numpy())
+
+    # Only the single-channel time file can be wrapped without copying
+    assert arrow_utils._is_zero_copy(metas[0])
+    assert not arrow_utils._is_zero_copy(metas[1])
+
+
+@pytest.mark.parametrize("file_format", ["arrow", "parquet"])
+def test_arrow_round_trip(shared_datadir, file_format):
+    metas = _load_ppp(shared_datadir)
+    path = str(shared_datadir / f"tmp_round_trip.{file_format}")
+    if file_format == "arrow":
+        arrow_utils.write_arrow_file(metas, path, chunk_rows=4)
+        convert = arrow_utils.arrow_file_to_binary
+    else:
+        arrow_utils.write_parquet_file(metas, path, chunk_rows=4)
+        convert = arrow_utils.parquet_file_to_binary
+
+    if file_format == "arrow":
+        schema = pa.ipc.open_file(path).schema
+    else:
+        schema = pq.read_schema(path)
+    stored = arrow_utils.load_arrow_metadata(schema)
+    assert [meta["file_name"] for meta in stored] == [meta.file_name for meta in metas]
+
+    base = metas[1].get_plain_tsdf_dict_copy()
+    base.pop("units")
+    new_meta = convert(
+        path, shared_datadir, "tmp_round_trip.bin", base, channels=metas[1].channels
+    )
+    assert new_meta.units == metas[1].units
+    assert new_meta.data_type == "int"
+    assert new_meta.bits == 16
+    assert np.array_equal(
+        tsdf.load_ndarray_from_binary(new_meta), tsdf.load_ndarray_from_binary(metas[1])
+    )
+
+
+def test_arrow_big_endian(shared_datadir):
+    data = np.arange(12, dtype=">f8").reshape(6, 2)
+    meta_dict = _load_ppp(shared_datadir)[1].get_plain_tsdf_dict_copy()
+    meta_dict.update(channels=["a", "b"], units=["s", "s"])
+    meta = tsdf.write_binary_file(shared_datadir, "tmp_big_endian.bin", data, meta_dict)
+    assert meta.endianness == "big"
+
+    table = arrow_utils.load_arrow_table([meta])
+    assert table.schema.field("a").type == pa.float64()
+    assert np.array_equal(table.column("b").to_numpy(), data[:, 1])
+
+
+def test_arrow_quantized(shared_datadir):
+    data = np.random.RandomState(seed=42).uniform(-8, 8, size=(100, 2))
+    meta_dict = _load_ppp(shared_datadir)[1].get_plain_tsdf_dict_copy()
+    meta_dict.update(channels=["a", "b"], units=["g", "g"])
+    meta = tsdf.write_binary_file(shared_datadir, "tmp_quantized.bin", data, meta_dict, quantize=0.01)
+    assert meta.value_encode == "fixed_point"
+
+    table = arrow_utils.load_arrow_table([meta], chunk_rows=30)
+    assert table.schema.field("a").type == pa.float64()
+    assert np.array_equal(table.column("b").to_numpy(), tsdf.load_ndarray_from_binary(meta)[:, 1])
@@ -0,0 +1,65 @@
+import numpy as np
+from tsdf import time_utils
+from tsdf.catalog import Catalog, CatalogEntry
+
+
+def _brute_force(catalog, subject_id, start_ns, end_ns):
+    return [
+        e
+        for e in catalog.entries
+        if e.subject_id == subject_id and e.start_ns <= end_ns and e.end_ns >= start_ns
+    ]
+
+
+def test_query_directory(shared_datadir):
+    """Test querying the streams of the metadata files in a directory."""
+    catalog = Catalog.from_dir(shared_datadir)
+    assert len(catalog) == 10
+
+    entries = catalog.query(subject_id="PD0234", channels=["temperature"])
+    assert [e.file_name for e in entries] == ["temperature_t1.bin", "temperature_t2.bin"]
+
+    entries = catalog.query(start="2019-10-15T12:00:00+00:00", end="2019-10-15T13:00:00+00:00")
+    assert {e.subject_id for e in entries} == {"dummy", "77"}
+
+    entries = catalog.query(device_id="Verily Study Watch", channels=["time"])
+    assert [e.file_name for e in entries] == ["ppp_format_time.bin"]
+    assert entries[0].load_metadata().rows == 17
+    assert catalog.query(subject_id="unknown") == []
+
+
+def test_query_intervals(shared_datadir):
+    """Test interval queries against a brute-force search, and saving and loading the catalog."""
+    rs = np.random.RandomState(seed=42)
+    starts = rs.randint(0, 10**6, 2000).astype(np.int64) * 10**9
+    durations = rs.exponential(10**4, 2000).astype(np.int64) * 10**9
+    entries = [
+        CatalogEntry(
+            metadata_path=f"rec_{i}_meta.json",
+            file_name=f"rec_{i}.bin",
+            study_id="study",
+            subject_id=f"subject_{i % 7}",
+            device_id="device",
+            channels=["x"],
+            start_iso8601=time_utils.ns_to_iso8601(start),
+            end_iso8601=time_utils.ns_to_iso8601(start + duration),
+            start_ns=int(start),
+            end_ns=int(start + duration),
+        )
+        for i, (start, duration) in enumerate(zip(starts, durations))
+    ]
+    catalog = Catalog(entries)
+
+    path = shared_datadir / "tmp_catalog.json"
+    catalog.save(path)
+    loaded = Catalog.load(path)
+    assert loaded.entries == catalog.entries
+
+    for start_ns in rs.randint(0, 10**6, 20).astype(np.int64) * 10**9:
+        end_ns = start_ns + 5 * 10**12
+        result = loaded.query(
+            subject_id="subject_3",
+            start=time_utils.ns_to_iso8601(start_ns),
+            end=time_utils.ns_to_iso8601(end_ns),
+        )
+        assert result == _brute_force(catalog, "subject_3", start_ns, end_ns)
@@ -0,0 +1,72 @@
+import os
+import numpy as np
+import tsdf
+from tsdf import TSDFMetadata
+from tsdf.channel_statistics import ChannelStatistics, STATISTICS_SIDECAR_SUFFIX
+from utils import load_meta_dict
+
+
+def test_load_ndarray_chunks(shared_datadir):
+    name = "example_10_3_int16"
+    metadata = tsdf.load_metadata_from_path(shared_datadir / (name + "_meta.json"))
+    meta = metadata[name + ".bin"]
+    chunks = list(tsdf.load_ndarray_chunks(meta, chunk_rows=4))
+    assert [chunk.shape for chunk in chunks] == [(4, 3), (4, 3), (2, 3)]
+    assert np.array_equal(np.concatenate(chunks), tsdf.load_ndarray_from_binary(meta))
+
+
+def test_statistics_match_numpy(shared_datadir):
+    metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    meta = metadata["ppp_format_samples.bin"]
+    data = tsdf.load_ndarray_from_binary(meta).astype(np.float64)
+
+    summary = tsdf.compute_channel_statistics(
+        meta, chunk_rows=5, workers=3, use_cache=False
+    )
+    assert list(summary.keys()) == meta.channels
+    for i, channel in enumerate(meta.channels):
+        assert summary[channel]["count"] == 17
+        assert summary[channel]["nan_count"] == 0
+        assert summary[channel]["min"] == data[:, i].min()
+        assert summary[channel]["max"] == data[:, i].max()
+        assert np.isclose(summary[channel]["mean"], data[:, i].mean())
+        assert np.isclose(summary[channel]["std"], data[:, i].std())
+
+
+def test_statistics_with_nan():
+    stats = ChannelStatistics(2)
+    data = np.array([[1.0, np.nan], [np.nan, np.nan], [3.0, np.nan], [5.0, np.nan]])
+    stats.update(data[:2])
+    stats.update(data[2:])
+    summary = stats.to_dict(["a", "b"])
+    assert summary["a"]["count"] == 3
+    assert summary["a"]["nan_count"] == 1
+    assert summary["a"]["mean"] == 3.0
+    assert np.isclose(summary["a"]["std"], np.nanstd(data[:, 0]))
+    assert summary["b"]["count"] == 0
+    assert summary["b"]["nan_count"] == 4
+    assert np.isnan(summary["b"]["mean"])
+
+
+def test_statistics_cache(shared_datadir):
+    test_file_name = "tmp_test_statistics.bin"
+    data = np.arange(30, dtype=np.float32).reshape(10, 3)
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_float32")
+    meta: TSDFMetadata = tsdf.write_binary_file(
+        shared_datadir, test_file_name, data, meta_dict
+    )
+
+    summary = tsdf.compute_channel_statistics(meta)
+    sidecar_path = shared_datadir / (test_file_name + STATISTICS_SIDECAR_SUFFIX)
+    assert os.path.exists(sidecar_path)
+    assert tsdf.compute_channel_statistics(meta) == summary
+
+    # Rewriting the binary invalidates the cache
+    tsdf.write_binary_file(shared_datadir, test_file_name, data[:5], meta_dict)
+    meta.rows = 5
+    assert tsdf.compute_channel_statistics(meta)[meta.channels[0]]["count"] == 5
+
+    # Reinterpreting the same bytes (e.g., with another byte order) invalidates the cache
+    summary = tsdf.compute_channel_statistics(meta)
+    meta.endianness = "big" if meta.endianness == "little" else "little"
+    assert tsdf.compute_channel_statistics(meta) != summary
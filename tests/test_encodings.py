@@ -0,0 +1,108 @@
+import os
+import numpy as np
+import pytest
+import tsdf
+from tsdf import time_utils, write_binary
+from tsdf.shared_memory import SharedMemoryStore
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
+
+
+def _time_metadata_dict(shared_datadir):
+    metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    meta_dict = metadata["ppp_format_time.bin"].get_plain_tsdf_dict_copy()
+    for key in ["time_encode", "scale_factors", "data_type", "bits", "rows", "file_name"]:
+        meta_dict.pop(key)
+    return meta_dict
+
+
+def _times():
+    rs = np.random.RandomState(seed=42)
+    times = np.arange(10000) * 10.0 + rs.uniform(-0.1, 0.1, 10000)
+    times[6000:] += 2500.0
+    return times
+
+
+def test_difference_encoding(shared_datadir, tmp_path):
+    """Test that int32 tick differences are decoded within half a tick."""
+    times = _times()
+    metadata = write_binary.write_time_binary_file(
+        str(tmp_path), "tmp_time.bin", times, _time_metadata_dict(shared_datadir), tick=0.001
+    )
+    assert metadata.data_type == "int" and metadata.bits == 32
+    assert os.path.getsize(tmp_path / "tmp_time.bin") == 4 * len(times)
+    decoded = np.concatenate(list(time_utils.iterate_time_chunks(metadata, chunk_rows=999)))
+    assert np.abs(decoded - times).max() <= 0.0005
+
+    with pytest.raises(TSDFMetadataFieldValueError):
+        write_binary.write_time_binary_file(
+            str(tmp_path), "tmp_time.bin", times, _time_metadata_dict(shared_datadir), tick=1e-9
+        )
+
+
+def test_constant_rate_encoding(shared_datadir, tmp_path):
+    """Test that constant rate time stamps are generated within the tolerance, also after a gap."""
+    times = _times()
+    metadata = write_binary.write_time_binary_file(
+        str(tmp_path),
+        "tmp_time.bin",
+        times,
+        _time_metadata_dict(shared_datadir),
+        "constant_rate",
+        rate=100,
+        tolerance=0.2,
+    )
+    assert os.path.getsize(tmp_path / "tmp_time.bin") == 0
+    assert metadata.rows == len(times)
+    assert [row for row, _ in metadata.time_exceptions] == [0, 6000]
+
+    assert np.abs(tsdf.load_ndarray_from_binary(metadata) - times).max() <= 0.2
+    assert np.abs(tsdf.load_ndarray_from_binary(metadata, 5990, 6010) - times[5990:6010]).max() <= 0.2
+    chunks = list(tsdf.load_ndarray_chunks(metadata, chunk_rows=4096))
+    assert np.abs(np.concatenate(chunks) - times).max() <= 0.2
+
+    # The encoding is kept in the metadata file
+    tsdf.write_metadata([metadata], "tmp_meta.json")
+    loaded = tsdf.load_metadata_from_path(tmp_path / "tmp_meta.json")["tmp_time.bin"]
+    assert np.array_equal(tsdf.load_ndarray_from_binary(loaded), tsdf.load_ndarray_from_binary(metadata))
+
+
+def test_constant_rate_row_ranges_and_shared_memory(shared_datadir, tmp_path):
+    """Test that constant rate time stamps are generated by the readers of row ranges and shared memory."""
+    times = _times()
+    metadata = write_binary.write_time_binary_file(
+        str(tmp_path),
+        "tmp_time.bin",
+        times,
+        _time_metadata_dict(shared_datadir),
+        "constant_rate",
+        rate=100,
+        tolerance=0.2,
+    )
+    expected = tsdf.load_ndarray_from_binary(metadata)
+
+    ranges = [(5990, 6010), (0, 3), (7, 7)]
+    pieces = tsdf.load_row_ranges(metadata, ranges)
+    for (start, end), piece in zip(ranges, pieces):
+        assert np.array_equal(piece, expected[start:end])
+    values, offsets = tsdf.load_row_ranges(metadata, ranges, concatenate=True)
+    assert np.array_equal(values, np.concatenate(pieces))
+    assert list(offsets) == [0, 20, 23, 23]
+
+    with SharedMemoryStore() as store:
+        handle = store.load(metadata)
+        assert np.array_equal(handle.attach(), expected)
+        handle.detach()
+
+
+def test_difference_encoding_does_not_drift(shared_datadir, tmp_path):
+    """Test that ticks which are not a whole number of nanoseconds are accumulated before they are rounded."""
+    tick = 1 / 3
+    ticks = np.arange(3_000_000)
+    metadata = write_binary.write_time_binary_file(
+        str(tmp_path), "tmp_time.bin", ticks * tick, _time_metadata_dict(shared_datadir), tick=tick
+    )
+    origin = time_utils.iso8601_to_ns(metadata.start)
+    expected = origin + np.rint(ticks * (tick * 1e6)).astype(np.int64)
+    assert np.array_equal(time_utils.load_time_ns(metadata), expected)
+    decoded = np.concatenate(list(time_utils.iterate_time_chunks(metadata)))
+    assert np.abs(decoded - ticks * tick).max() < 1e-6
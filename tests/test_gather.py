@@ -0,0 +1,36 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+import pytest
+import tsdf
+from tsdf.gather import SampleGatherer
+
+
+def test_gather_samples(shared_datadir):
+    """Test that gathered samples match the binary files, in the requested order."""
+    names = ["example_10_3_float32"] * 3
+    metadatas = [
+        tsdf.load_metadata_from_path(shared_datadir / (name + "_meta.json"))[name + ".bin"]
+        for name in names
+    ]
+    expected = [tsdf.load_ndarray_from_binary(metadata) for metadata in metadatas]
+    gatherer = SampleGatherer(metadatas, window_rows=3, max_open_streams=2)
+
+    rs = np.random.RandomState(seed=42)
+    streams = rs.randint(0, 3, size=50)
+    rows = rs.randint(0, 8, size=50)
+    batch = gatherer.gather(streams, rows)
+    assert batch.shape == (50, 3, 3)
+    for sample, stream, row in zip(batch, streams, rows):
+        assert np.array_equal(sample, expected[stream][row : row + 3])
+
+    # Concurrent use, and use after being sent to another process
+    with ThreadPoolExecutor(4) as executor:
+        batches = list(executor.map(lambda _: gatherer.gather(streams, rows), range(8)))
+    assert all(np.array_equal(other, batch) for other in batches)
+    assert np.array_equal(pickle.loads(pickle.dumps(gatherer)).gather(streams, rows), batch)
+
+    out = np.empty((2, 3, 3), dtype=np.float32)
+    assert gatherer.gather([0, 1], [7, 0], out=out) is out
+    with pytest.raises(IndexError):
+        gatherer.gather([0], [8])
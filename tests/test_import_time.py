@@ -0,0 +1,46 @@
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET_US = 200_000
+""" Budget for importing tsdf, excluding numpy (importing pandas alone takes longer). """
+
+LAZY_MODULES = ["pandas", "dateutil", "importlib.metadata"]
+
+
+def _get_cumulative_import_times(code: str) -> dict:
+    """Run the code in a fresh interpreter and collect the cumulative import time (in µs) of each module."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        parts = line.split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+def test_import_does_not_load_heavy_dependencies():
+    """Test that pandas and dateutil are only imported once they are needed."""
+    code = "import sys, tsdf; print([m for m in %r if m in sys.modules])" % LAZY_MODULES
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip() == "[]"
+
+
+def test_import_time_budget():
+    """Test that importing tsdf stays within the import time budget."""
+    times = _get_cumulative_import_times("import tsdf")
+    assert times["tsdf"] - times.get("numpy", 0) < IMPORT_TIME_BUDGET_US
+
+
+def test_version():
+    """Test that the version is still available, although it is read lazily."""
+    import tsdf
+    from importlib.metadata import version
+
+    assert tsdf.__version__ == version("tsdf")
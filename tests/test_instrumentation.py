@@ -0,0 +1,28 @@
+from tsdf import instrumentation, read_binary, read_tsdf, write_binary, write_tsdf
+
+
+def test_phase_totals(shared_datadir):
+    """Test that the instrumented calls are reported per phase while a tracer is registered."""
+    with instrumentation.PhaseTotals() as totals:
+        metadatas = read_tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+        metadata = metadatas["ppp_format_time.bin"]
+        data = read_binary.load_ndarray_from_binary(metadata)
+        new_meta = write_binary.write_binary_file(
+            shared_datadir,
+            "tmp_instrumented.bin",
+            data,
+            metadata.get_plain_tsdf_dict_copy(),
+        )
+        write_tsdf.write_metadata([new_meta], "tmp_instrumented_meta.json")
+
+    assert totals.totals["parse_metadata"]["calls"] == 1
+    assert totals.totals["read_binary"]["bytes"] == data.nbytes
+    assert totals.totals["write_binary"]["bytes"] == data.nbytes
+    assert totals.totals["write_metadata"]["bytes"] > 0
+    assert totals.totals["validate_metadata"]["calls"] >= 2
+    assert "read_binary" in totals.summary()
+
+    # Calls are no longer reported once the tracer is removed
+    read_binary.load_ndarray_from_binary(metadata)
+    assert totals.totals["read_binary"]["calls"] == 1
+    assert instrumentation._tracers == []
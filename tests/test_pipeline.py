@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+import tsdf
+from tsdf.pipeline import map_chunks
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
+
+
+def _moving_sum(data):
+    """Sum of each row with its neighbours, which depends on the rows around the chunks."""
+    padded = np.pad(data, ((1, 1), (0, 0)))
+    return padded[:-2] + padded[1:-1] + padded[2:]
+
+
+@pytest.mark.parametrize("use_processes", [False, True])
+def test_map_chunks(shared_datadir, tmp_path, use_processes):
+    """Test that processing chunks with overlapping rows gives the same result as processing the whole stream."""
+    metadatas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    metadata = metadatas["ppp_format_samples.bin"]
+    data = tsdf.load_ndarray_from_binary(metadata)
+
+    new_metadata = map_chunks(
+        metadata,
+        _moving_sum,
+        str(tmp_path),
+        "tmp_filtered.bin",
+        chunk_rows=7,
+        overlap=1,
+        workers=2,
+        use_processes=use_processes,
+    )
+    assert new_metadata.rows == metadata.rows
+    assert new_metadata.channels == metadata.channels
+    result = tsdf.load_ndarray_from_binary(new_metadata)
+    assert np.allclose(result, _moving_sum(data.astype(result.dtype)))
+
+
+def test_map_chunks_channels(shared_datadir, tmp_path):
+    metadatas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    metadata = metadatas["ppp_format_samples.bin"]
+    data = tsdf.load_ndarray_from_binary(metadata)
+
+    norm = lambda chunk: np.linalg.norm(chunk[:, :3].astype(np.float64), axis=1)
+    new_metadata = map_chunks(
+        metadata, norm, str(tmp_path), "tmp_norm.bin", chunk_rows=5, channels=["norm"], units=["g"]
+    )
+    assert new_metadata.data_type == "float"
+    assert np.allclose(tsdf.load_ndarray_from_binary(new_metadata), norm(data))
+
+    with pytest.raises(TSDFMetadataFieldValueError):
+        map_chunks(metadata, norm, str(tmp_path), "tmp_norm.bin", chunk_rows=5)
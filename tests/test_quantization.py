@@ -0,0 +1,112 @@
+import numpy as np
+import pandas as pd
+import tsdf
+from tsdf import quantization
+from tsdf.shared_memory import SharedMemoryStore
+from tsdf.virtual_array import ConcatenatedArray
+from utils import load_meta_dict
+
+
+def _meta_dict(shared_datadir, channels):
+    return load_meta_dict(shared_datadir, "example_10_3_int16", channels=channels, units=["g"] * len(channels))
+
+
+def test_quantize_dataframe(shared_datadir, tmp_path):
+    """Test that float channels are stored as small integers within the tolerance, and decoded when read."""
+    rs = np.random.RandomState(seed=42)
+    df = pd.DataFrame(
+        {
+            "counts": rs.randint(-2000, 2000, size=1000).astype(np.float64),
+            "acceleration": rs.uniform(-8, 8, size=1000),
+        }
+    )
+    meta_dict = _meta_dict(shared_datadir, ["counts", "acceleration"])
+    meta_dict["file_name"] = "tmp_quantized.bin"
+    metadata = tsdf.TSDFMetadata(meta_dict, str(tmp_path))
+    tsdf.write_dataframe_to_binaries(str(tmp_path), df, [metadata], quantize=0.001)
+
+    assert (metadata.data_type, metadata.bits) == ("uint", 16)
+    assert metadata.value_encode == "fixed_point"
+    assert (tmp_path / "tmp_quantized.bin").stat().st_size == 1000 * 2 * 2
+
+    tsdf.write_metadata([metadata], "tmp_meta.json")
+    loaded = tsdf.load_metadata_from_path(tmp_path / "tmp_meta.json")["tmp_quantized.bin"]
+    data = tsdf.load_ndarray_from_binary(loaded)
+    assert data.dtype == np.float64
+    assert np.array_equal(data[:, 0], df["counts"].to_numpy())
+    assert np.abs(data[:, 1] - df["acceleration"].to_numpy()).max() <= 0.001
+    chunks = list(tsdf.load_ndarray_chunks(loaded, chunk_rows=300))
+    assert np.array_equal(np.concatenate(chunks), data)
+    result = tsdf.load_dataframe_from_binaries([loaded])[0]
+    assert np.array_equal(result.to_numpy(), data)
+
+    # Writing unquantised data removes the encoding
+    tsdf.write_dataframe_to_binaries(str(tmp_path), df, [metadata])
+    assert not quantization.is_quantized(metadata)
+    assert not hasattr(metadata, "value_scales") and not hasattr(metadata, "value_offsets")
+    assert np.array_equal(tsdf.load_ndarray_from_binary(metadata), df.to_numpy())
+
+
+def test_quantize_lossless(shared_datadir, tmp_path):
+    data = np.arange(300, dtype=np.float32).reshape(3, -1).T + 1000
+    metadata = tsdf.write_binary_file(
+        str(tmp_path), "tmp_lossless.bin", data, _meta_dict(shared_datadir, ["x", "y", "z"]), quantize=0
+    )
+    assert (metadata.data_type, metadata.bits) == ("uint", 8)
+    assert np.array_equal(tsdf.load_ndarray_from_binary(metadata), data)
+
+    # Data that cannot be encoded losslessly (or contains non-finite values) is stored as it is
+    for values in [data + 0.5, np.where(data > 1100, np.nan, data)]:
+        metadata = tsdf.write_binary_file(
+            str(tmp_path), "tmp_lossless.bin", values, _meta_dict(shared_datadir, ["x", "y", "z"]), quantize=0
+        )
+        assert (metadata.data_type, metadata.bits) == ("float", 32)
+        assert np.array_equal(tsdf.load_ndarray_from_binary(metadata), values, equal_nan=True)
+
+
+def test_quantized_shared_memory_and_virtual_array(shared_datadir, tmp_path):
+    """Test that the other readers decode quantised binary files too."""
+    data = np.random.RandomState(seed=42).uniform(-8, 8, size=(500, 3))
+    metadata = tsdf.write_binary_file(
+        str(tmp_path), "tmp_quantized.bin", data, _meta_dict(shared_datadir, ["x", "y", "z"]), quantize=0.01
+    )
+    assert quantization.is_quantized(metadata)
+    expected = tsdf.load_ndarray_from_binary(metadata)
+
+    with SharedMemoryStore() as store:
+        handle = store.load(metadata)
+        assert handle.dtype == np.float64
+        assert np.array_equal(handle.attach(), expected)
+        handle.detach()
+
+    array = ConcatenatedArray([metadata, metadata])
+    assert array.dtype == np.float64
+    assert array[0:0].dtype == np.float64
+    assert np.array_equal(array[490:510], np.concatenate([expected[490:], expected[:10]]))
+
+
+def test_quantize_within_tolerance(shared_datadir, tmp_path):
+    """Test that decoded values are within the tolerance, also for values far from zero."""
+    rs = np.random.RandomState(seed=42)
+    data = np.column_stack([1e4 + rs.uniform(-8, 8, 10000), rs.uniform(0, 1, 10000)])
+    for tolerance in [0.01, 0.001, 0.05]:
+        metadata = tsdf.write_binary_file(
+            str(tmp_path), "tmp_tolerance.bin", data, _meta_dict(shared_datadir, ["x", "y"]), quantize=tolerance
+        )
+        assert quantization.is_quantized(metadata)
+        assert np.abs(tsdf.load_ndarray_from_binary(metadata) - data).max() <= tolerance
+
+
+def test_quantize_keeps_scale_factors(shared_datadir, tmp_path):
+    """Test that the fixed-point parameters do not overwrite the physical scale factors of the channels."""
+    data = np.linspace(-1, 1, 200).reshape(100, 2)
+    meta_dict = dict(_meta_dict(shared_datadir, ["x", "y"]), scale_factors=[9.81, 9.81])
+    metadata = tsdf.write_binary_file(str(tmp_path), "tmp_scaled.bin", data, meta_dict, quantize=0.001)
+    assert quantization.is_quantized(metadata)
+    assert metadata.scale_factors == [9.81, 9.81]
+    assert len(metadata.value_scales) == 2 and len(metadata.value_offsets) == 2
+    assert np.abs(tsdf.load_ndarray_from_binary(metadata) - data).max() <= 0.001
+
+    metadata = tsdf.write_binary_file(str(tmp_path), "tmp_scaled.bin", data, metadata.get_plain_tsdf_dict_copy())
+    assert not quantization.is_quantized(metadata) and not hasattr(metadata, "value_scales")
+    assert metadata.scale_factors == [9.81, 9.81]
@@ -1,10 +1,12 @@
 import numpy as np
 from pathlib import Path
 
+import pytest
 import pandas as pd
 import tsdf
 from tsdf import parse_metadata
 from tsdf.constants import ConcatenationType
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
 from utils import load_single_bin_file
 
 
@@ -63,6 +65,46 @@ def test_random_access(shared_datadir):
     assert data.dtype == "int16"
 
 
+@pytest.mark.parametrize("native_byte_order", [False, True])
+def test_load_truncated_row(shared_datadir, native_byte_order):
+    """Test that a binary file ending within a row is reported as a length mismatch."""
+    name = "example_10_3_int16"
+    meta_dict = tsdf.load_metadata_from_path(shared_datadir / (name + "_meta.json"))[
+        name + ".bin"
+    ].get_plain_tsdf_dict_copy()
+    data = np.arange(30, dtype=">i2").reshape((10, 3))
+    metadata = tsdf.write_binary_file(shared_datadir, "tmp_truncated.bin", data, meta_dict)
+    with open(shared_datadir / "tmp_truncated.bin", "r+b") as file:
+        file.truncate(data.nbytes - 2)
+
+    with pytest.raises(Exception, match="Number of rows doesn't match file length."):
+        tsdf.load_ndarray_from_binary(metadata, native_byte_order=native_byte_order)
+    with pytest.raises(Exception, match="Number of rows doesn't match file length."):
+        list(tsdf.load_ndarray_chunks(metadata, 4, native_byte_order=native_byte_order))
+
+
+def test_load_row_ranges(shared_datadir):
+    name = "example_10_3_int16"
+    metadata = tsdf.load_metadata_from_path(shared_datadir / (name + "_meta.json"))
+    metadata = metadata[name + ".bin"]
+    data = tsdf.load_ndarray_from_binary(metadata)
+    ranges = [(6, 9), (0, 2), (1, 4), (5, 5), (9, 10)]
+
+    # Without a gap, only overlapping ranges are coalesced
+    for max_gap_size in [0, 2**16]:
+        pieces = tsdf.load_row_ranges(metadata, ranges, max_gap_size=max_gap_size)
+        assert len(pieces) == len(ranges)
+        for (start, end), piece in zip(ranges, pieces):
+            assert np.array_equal(piece, data[start:end])
+
+    values, offsets = tsdf.load_row_ranges(metadata, ranges, concatenate=True)
+    assert offsets.tolist() == [0, 3, 5, 8, 8, 9]
+    assert np.array_equal(values, np.concatenate([data[s:e] for s, e in ranges]))
+
+    with pytest.raises(IndexError):
+        tsdf.load_row_ranges(metadata, [(8, 11)])
+
+
 def test_load_binary_to_dataframe(shared_datadir):
     metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
     df = tsdf.load_dataframe_from_binaries(
@@ -142,3 +184,30 @@ def test_load_dataframe_concatenation_none(shared_datadir):
     assert dataframes[1].shape == (17, 3)
     assert dataframes[2].shape == (29, 3)
 
+
+
+def test_load_dataframe_time_index(shared_datadir):
+    """Test indexing data frames by the time channel, or by the start time and sampling rate."""
+    metadatas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    time_meta = metadatas["ppp_format_time.bin"]
+    samples_meta = metadatas["ppp_format_samples.bin"]
+    df = tsdf.load_dataframe_from_binaries(
+        [time_meta, samples_meta], ConcatenationType.columns, time_index=True
+    )
+    assert list(df.columns) == samples_meta.channels
+    assert str(df.index.dtype) == "datetime64[ns, UTC]"
+    start = pd.Timestamp(time_meta.start_iso8601)
+    deltas = np.cumsum(tsdf.load_ndarray_from_binary(time_meta).astype(np.float64))
+    expected = start + pd.to_timedelta(deltas, unit="ms")
+    assert np.all(np.abs((df.index - expected).asi8) <= len(deltas))
+
+    # The time channel of a binary file starting at another time is not used
+    samples_meta.start_iso8601 = "2020-01-01T00:00:00+00:00"
+    with pytest.raises(TSDFMetadataFieldValueError):
+        tsdf.load_dataframe_from_binaries([time_meta, samples_meta], time_index=True)
+    samples_meta.start_iso8601 = time_meta.start_iso8601
+
+    samples_meta.sampling_rate = 100
+    df = tsdf.load_dataframe_from_binaries([samples_meta], time_index=True)[0]
+    assert df.index[0] == start
+    assert df.index[-1] == start + pd.Timedelta(milliseconds=10 * (samples_meta.rows - 1))
@@ -0,0 +1,131 @@
+import numpy as np
+import pytest
+import tsdf
+from tsdf import alignment, resampling, segments
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
+from utils import load_meta_dict
+
+
+def _write_stream(shared_datadir, times, values):
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_float32")
+    time_dict = dict(meta_dict, channels=["time"], units=["s"])
+    values_dict = dict(meta_dict, channels=["x", "y"], units=["g", "g"])
+    time_meta = tsdf.write_binary_file(
+        shared_datadir, "tmp_resampling_time.bin", times, time_dict
+    )
+    values_meta = tsdf.write_binary_file(
+        shared_datadir, "tmp_resampling_values.bin", values, values_dict
+    )
+    return time_meta, values_meta
+
+
+def _irregular_stream(n_rows=97):
+    rs = np.random.RandomState(seed=42)
+    times = np.cumsum(rs.uniform(0.008, 0.012, n_rows))
+    values = rs.rand(n_rows, 2)
+    return times, values
+
+
+@pytest.mark.parametrize("chunk_rows", [1, 7, 1000])
+def test_resample_linear(shared_datadir, chunk_rows):
+    times, values = _irregular_stream()
+    time_meta, values_meta = _write_stream(shared_datadir, times, values)
+
+    new_times, new_values = resampling.resample(
+        time_meta, values_meta, 100.0, chunk_rows=chunk_rows
+    )
+    expected_times = times[0] + np.arange(new_times.shape[0]) * 0.01
+    assert np.allclose(new_times, expected_times)
+    assert new_times[-1] <= times[-1] < new_times[-1] + 0.01
+    for channel in range(2):
+        assert np.allclose(
+            new_values[:, channel], np.interp(new_times, times, values[:, channel])
+        )
+
+
+@pytest.mark.parametrize("method", ["nearest", "previous"])
+def test_resample_nearest_previous(shared_datadir, method):
+    times, values = _irregular_stream()
+    time_meta, values_meta = _write_stream(shared_datadir, times, values)
+
+    new_times, new_values = resampling.resample(
+        time_meta, values_meta, 100.0, method=method, chunk_rows=5
+    )
+    left = np.searchsorted(times, new_times, side="right") - 1
+    if method == "previous":
+        expected = left
+    else:
+        right = np.minimum(left + 1, times.shape[0] - 1)
+        expected = np.where(
+            times[right] - new_times < new_times - times[left], right, left
+        )
+    assert np.array_equal(new_values, values[expected])
+
+
+def test_resample_difference_encoded(shared_datadir):
+    metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    time_meta = metadata["ppp_format_time.bin"]
+    values_meta = metadata["ppp_format_samples.bin"]
+    times = np.cumsum(tsdf.load_ndarray_from_binary(time_meta).astype(np.float64))
+
+    # The time channel is in ms
+    new_times, new_values = resampling.resample(
+        time_meta, values_meta, 2000.0, method="previous", chunk_rows=4
+    )
+    assert np.allclose(np.diff(new_times), 0.5)
+    left = np.searchsorted(times, new_times, side="right") - 1
+    assert np.array_equal(new_values, tsdf.load_ndarray_from_binary(values_meta)[left])
+
+
+def test_resample_to_binaries(shared_datadir):
+    times, values = _irregular_stream()
+    time_meta, values_meta = _write_stream(shared_datadir, times, values)
+    segments.add_segments(time_meta, [values_meta])
+
+    new_time_meta, new_values_meta = resampling.resample_to_binaries(
+        time_meta,
+        values_meta,
+        50.0,
+        shared_datadir,
+        "tmp_resampled_time.bin",
+        "tmp_resampled_values.bin",
+        chunk_rows=10,
+    )
+    expected_times, expected_values = resampling.resample(time_meta, values_meta, 50.0)
+    assert new_values_meta.sampling_rate == 50.0
+    assert new_values_meta.rows == expected_times.shape[0]
+    assert np.array_equal(tsdf.load_ndarray_from_binary(new_time_meta), expected_times)
+    assert np.array_equal(
+        tsdf.load_ndarray_from_binary(new_values_meta), expected_values
+    )
+    # The segment table of the original stream does not describe the resampled rows
+    assert not hasattr(new_time_meta, "segments") and not hasattr(new_values_meta, "segments")
+
+
+def test_resample_empty_single_channel(shared_datadir):
+    """Test that an empty result of a single channel is one-dimensional, like other results of single channels."""
+    time_meta, _ = _write_stream(shared_datadir, np.empty(0), np.empty((0, 2)))
+    values_meta = tsdf.write_binary_file(
+        shared_datadir,
+        "tmp_resampling_single.bin",
+        np.empty(0, dtype=np.float32),
+        load_meta_dict(shared_datadir, "example_10_3_float32", channels=["x"], units=["g"]),
+    )
+    times, values = resampling.resample(time_meta, values_meta, 50.0)
+    assert times.shape == (0,) and values.shape == (0,)
+
+
+def test_resample_records_mixing_data_types(shared_datadir):
+    """Test that records mixing data types are rejected with a clear error."""
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_float32")
+    data = np.zeros(10, dtype=[("time", "<f8"), ("x", "<i2")])
+    data["time"] = np.arange(10) * 0.01
+    metadata = tsdf.write_binary_file(
+        shared_datadir, "tmp_records.bin", data, dict(meta_dict, channels=["time", "x"], units=["s", "g"])
+    )
+    assert isinstance(metadata.data_type, list)
+
+    with pytest.raises(TSDFMetadataFieldValueError, match="mixes data types"):
+        resampling.resample(metadata, metadata, 50.0)
+    with pytest.raises(TSDFMetadataFieldValueError, match="mixes data types"):
+        alignment.align_streams([(metadata, metadata)])
@@ -0,0 +1,146 @@
+from datetime import timedelta
+import numpy as np
+import pytest
+import tsdf
+from tsdf import segments
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
+from utils import load_meta_dict
+
+
+def _write_segmented_stream(shared_datadir):
+    times = np.concatenate(
+        [
+            np.arange(100) * 0.01,
+            5.0 + np.arange(50) * 0.01,
+            10.0 + np.arange(30) * 0.01,
+        ]
+    )
+    values = np.arange(times.shape[0] * 2, dtype=np.int16).reshape(-1, 2)
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    time_meta = tsdf.write_binary_file(
+        shared_datadir,
+        "tmp_segments_time.bin",
+        times,
+        dict(meta_dict, channels=["time"], units=["s"]),
+    )
+    values_meta = tsdf.write_binary_file(
+        shared_datadir,
+        "tmp_segments_values.bin",
+        values,
+        dict(meta_dict, channels=["x", "y"], units=["g", "g"]),
+    )
+    return time_meta, values_meta, times
+
+
+def test_build_segments(shared_datadir):
+    time_meta, values_meta, _ = _write_segmented_stream(shared_datadir)
+
+    table = segments.add_segments(time_meta, [values_meta], chunk_rows=37)
+    assert [(s["row_offset"], s["rows"]) for s in table] == [(0, 100), (100, 50), (150, 30)]
+    assert table[0]["start_iso8601"] == "2019-10-15T10:39:17.025000+00:00"
+    assert table[1]["start_iso8601"] == "2019-10-15T10:39:22.025000+00:00"
+    assert table[2]["end_iso8601"] == "2019-10-15T10:39:27.315000+00:00"
+    assert values_meta.segments == table
+
+    # The segment table is stored with the metadata
+    tsdf.write_metadata([time_meta, values_meta], "tmp_segments_meta.json")
+    loaded = tsdf.load_metadata_from_path(shared_datadir / "tmp_segments_meta.json")
+    assert loaded["tmp_segments_values.bin"].segments == table
+
+
+@pytest.mark.parametrize(
+    "start_offset,end_offset",
+    [(0.505, 5.195), (-1.0, 100.0), (1.5, 4.5), (5.1, 5.2), (10.29, 12.0)],
+)
+def test_load_time_range(shared_datadir, start_offset, end_offset):
+    time_meta, values_meta, times = _write_segmented_stream(shared_datadir)
+    segments.add_segments(time_meta, [values_meta])
+    start = time_meta.start + timedelta(seconds=start_offset)
+    end = time_meta.start + timedelta(seconds=end_offset)
+
+    selected = (times >= start_offset) & (times < end_offset)
+    data = segments.load_ndarray_from_time_range(values_meta, start, end, time_metadata=time_meta)
+    assert np.array_equal(data, tsdf.load_ndarray_from_binary(values_meta)[selected])
+    assert np.array_equal(
+        segments.load_ndarray_from_time_range(time_meta, start.isoformat(), end.isoformat()),
+        times[selected],
+    )
+
+
+def test_load_time_range_irregular(shared_datadir):
+    """Test that the rows of a time range are found exactly in segments with irregular sampling intervals."""
+    rs = np.random.RandomState(seed=42)
+    intervals = rs.choice([0.001, 0.004, 0.03], size=300)
+    intervals[200] = 2.0
+    times = np.cumsum(intervals)
+    values = np.arange(times.shape[0], dtype=np.int16)
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    time_meta = tsdf.write_binary_file(
+        shared_datadir, "tmp_segments_time.bin", times, dict(meta_dict, channels=["time"], units=["s"])
+    )
+    values_meta = tsdf.write_binary_file(
+        shared_datadir, "tmp_segments_values.bin", values, dict(meta_dict, channels=["x"], units=["g"])
+    )
+    table = segments.add_segments(time_meta, [values_meta], max_gap=1.0)
+    assert len(table) == 2
+
+    time_ns = tsdf.time_utils.load_time_ns(time_meta)
+    for start_row, end_row in [(17, 150), (0, 203), (120, 299), (250, 251)]:
+        start, end = time_ns[start_row], time_ns[end_row] - 1
+        loaded = segments.load_ndarray_from_time_range(
+            values_meta,
+            tsdf.time_utils.ns_to_iso8601(start),
+            tsdf.time_utils.ns_to_iso8601(end),
+            time_metadata=time_meta,
+        )
+        # The ISO8601 strings have microsecond precision
+        selected = (time_ns >= start // 1000 * 1000) & (time_ns < end // 1000 * 1000)
+        assert np.array_equal(loaded, values[selected])
+
+    # Without the time channel, only whole segments can be selected
+    with pytest.raises(TSDFMetadataFieldValueError):
+        segments.load_ndarray_from_time_range(
+            values_meta, table[0]["start_iso8601"], tsdf.time_utils.ns_to_iso8601(time_ns[150])
+        )
+    whole = segments.load_ndarray_from_time_range(
+        values_meta, table[1]["start_iso8601"], time_meta.start + timedelta(seconds=100)
+    )
+    assert np.array_equal(whole, values[200:])
+
+
+def test_segments_of_records(shared_datadir):
+    """Test segmenting a binary file whose time channel is a field of records mixing data types."""
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    data = np.zeros(10, dtype=[("time", "<f8"), ("x", "<i2")])
+    data["time"] = np.concatenate([np.arange(5), 20.0 + np.arange(5)])
+    data["x"] = np.arange(10)
+    metadata = tsdf.write_binary_file(
+        shared_datadir, "tmp_records.bin", data, dict(meta_dict, channels=["time", "x"], units=["s", "g"])
+    )
+
+    table = segments.add_segments(metadata)
+    assert [(s["row_offset"], s["rows"]) for s in table] == [(0, 5), (5, 5)]
+    loaded = segments.load_ndarray_from_time_range(
+        metadata, table[1]["start_iso8601"], metadata.start + timedelta(seconds=30)
+    )
+    assert np.array_equal(loaded, data[5:])
+
+
+def test_segment_table_validation():
+    with pytest.raises(TSDFMetadataFieldValueError):
+        segments.SegmentTable(
+            [
+                {
+                    "start_iso8601": "2024-01-01T00:00:10+00:00",
+                    "end_iso8601": "2024-01-01T00:00:20+00:00",
+                    "row_offset": 0,
+                    "rows": 10,
+                },
+                {
+                    "start_iso8601": "2024-01-01T00:00:15+00:00",
+                    "end_iso8601": "2024-01-01T00:00:30+00:00",
+                    "row_offset": 10,
+                    "rows": 10,
+                },
+            ]
+        )
@@ -0,0 +1,38 @@
+import multiprocessing
+import pickle
+import numpy as np
+import tsdf
+from tsdf.shared_memory import SharedMemoryStore
+
+
+def _sum_rows(args):
+    handle, start, end = args
+    data = handle.attach()
+    result = data[start:end].sum(axis=0)
+    handle.detach()
+    return result
+
+
+def test_load_into_shared_memory(shared_datadir):
+    """Test that the shared data matches the binary file and can be used by worker processes."""
+    metadatas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    metadata = metadatas["ppp_format_samples.bin"]
+    expected = tsdf.load_ndarray_from_binary(metadata)
+
+    with SharedMemoryStore() as store:
+        handles = store.load_all(list(metadatas.values()))
+        handle = handles["ppp_format_samples.bin"]
+        assert len(pickle.dumps(handle)) < 1000
+        assert np.array_equal(handle.attach(), expected)
+        df = handle.attach_dataframe()
+        assert list(df.columns) == metadata.channels
+        assert np.array_equal(df.to_numpy(), expected)
+        del df
+
+        bounds = np.linspace(0, metadata.rows, 4).astype(int)
+        tasks = [(handle, start, end) for start, end in zip(bounds[:-1], bounds[1:])]
+        with multiprocessing.get_context("fork").Pool(2) as pool:
+            results = pool.map(_sum_rows, tasks)
+        assert np.array_equal(np.sum(results, axis=0), expected.sum(axis=0))
+
+    assert store.handles == {}
@@ -0,0 +1,131 @@
+import gc
+import posixpath
+import numpy as np
+import pytest
+import tsdf
+from tsdf import storage
+from tsdf.storage import BlockCache, LocalStorage, MemoryStorage
+
+
+@pytest.fixture
+def memory_storage():
+    backend = MemoryStorage()
+    storage.mount("memory://", backend)
+    yield backend
+    storage.unmount("memory://")
+
+
+def test_memory_storage_round_trip(shared_datadir, memory_storage):
+    """Test writing and reading binary and metadata files through a mounted backend."""
+    metadatas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    metadata = metadatas["ppp_format_samples.bin"]
+    data = tsdf.load_ndarray_from_binary(metadata)
+
+    meta_dict = metadata.get_plain_tsdf_dict_copy()
+    new_metadata = tsdf.write_binary_file("memory://session", "tmp_samples.bin", data, meta_dict)
+    tsdf.write_metadata([new_metadata], "tmp_meta.json")
+    assert set(memory_storage.files) == {
+        "memory://session/tmp_samples.bin",
+        "memory://session/tmp_meta.json",
+    }
+
+    loaded = tsdf.load_metadata_from_path("memory://session/tmp_meta.json")["tmp_samples.bin"]
+    assert loaded.file_dir_path == "memory://session"
+    assert np.array_equal(tsdf.load_ndarray_from_binary(loaded), data)
+    assert np.array_equal(tsdf.load_ndarray_from_binary(loaded, 3, 9), data[3:9])
+    assert np.array_equal(tsdf.load_memmap_from_binary(loaded), data)
+    assert np.array_equal(np.concatenate(list(tsdf.load_ndarray_chunks(loaded, 5))), data)
+    assert np.array_equal(tsdf.load_row_ranges(loaded, [(8, 10), (0, 2)])[0], data[8:10])
+
+
+def test_storage_interface():
+    """Test that backends have to implement the abstract methods of the interface."""
+    with pytest.raises(TypeError):
+        storage.Storage()
+
+    class SizeOnlyStorage(storage.Storage):
+        def get_size(self, path):
+            return 0
+
+    with pytest.raises(TypeError):
+        SizeOnlyStorage()
+
+
+def test_mount_prefix_boundary(memory_storage):
+    """Test that a prefix only serves the paths within it."""
+    backend = MemoryStorage()
+    storage.mount("/mnt/data", backend)
+    try:
+        assert storage.get_storage("/mnt/data")[0] is backend
+        assert storage.get_storage("/mnt/data/file.bin")[0] is backend
+        assert not storage.is_mounted("/mnt/database/file.bin")
+        # Prefixes ending with a separator match the paths starting with them
+        assert storage.get_storage("memory://session/file.bin")[0] is memory_storage
+    finally:
+        storage.unmount("/mnt/data")
+
+
+def test_block_cache():
+    """Test that adjacent and repeated reads are served from the cache, and that writes invalidate it."""
+    backend = MemoryStorage()
+    with backend.write("file.bin") as file:
+        file.write(bytes(range(250)))
+    cache = BlockCache(block_size=16, capacity=64, read_ahead=1)
+
+    assert cache.read(backend, "file.bin", 1, 10, 20) == bytes(range(10, 30))
+    assert cache.misses == 3  # Blocks 0 and 1, and block 2 read ahead
+    assert cache.read(backend, "file.bin", 1, 35, 10) == bytes(range(35, 45))
+    assert cache.hits == 1
+    assert cache.read(backend, "file.bin", 1, 240, 100) == bytes(range(240, 250))
+    # The least recently used blocks are evicted beyond the capacity
+    assert sum(len(block) for block in cache._blocks.values()) <= 64
+
+    cache.invalidate("file.bin")
+    assert len(cache._blocks) == 0
+
+
+def test_block_cache_backend_identity():
+    """Test that the blocks of a collected backend are not served for a new backend with the same paths."""
+    cache = BlockCache(block_size=16, capacity=1024)
+    for index in range(20):
+        # The backends have the same path and version, and collected backends' ids are often reused
+        content = f"backend {index}".encode()
+        backend = MemoryStorage()
+        with backend.write("file.bin") as file:
+            file.write(content)
+        assert cache.read(backend, "file.bin", backend.get_version("file.bin"), 0, 100) == content
+        del backend
+        gc.collect()
+
+
+def test_fsspec_storage_write_is_atomic():
+    """Test that a file of an fsspec backend is only replaced once it has been written completely."""
+    pytest.importorskip("fsspec")
+    backend = storage.FsspecStorage(protocol="memory")
+    path = f"/tsdf-{np.random.randint(1 << 30)}/file.bin"
+    with backend.write(path) as file:
+        file.write(b"first")
+
+    with pytest.raises(RuntimeError):
+        with backend.write(path) as file:
+            file.write(b"second")
+            raise RuntimeError("interrupted")
+    assert backend.read_block(path, 0, 100) == b"first"
+    assert backend.fs.ls(posixpath.dirname(path), detail=False) == [path]
+    backend.fs.rm(posixpath.dirname(path), recursive=True)
+
+
+def test_mounted_local_directory(shared_datadir):
+    """Test that a mounted local directory is read through the shared cache."""
+    storage.mount(str(shared_datadir), LocalStorage())
+    try:
+        cache = storage.configure_cache(block_size=64, read_ahead=2)
+        metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+        data = tsdf.load_ndarray_from_binary(metadata["ppp_format_samples.bin"])
+        assert cache.misses > 0
+        misses = cache.misses
+        assert np.array_equal(tsdf.load_ndarray_from_binary(metadata["ppp_format_samples.bin"]), data)
+        assert cache.misses == misses
+    finally:
+        storage.unmount(str(shared_datadir))
+        storage.configure_cache()
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import tsdf
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
+
+
+def _load_hierarchical(shared_datadir):
+    return tsdf.load_metadata_from_path(
+        shared_datadir / "hierarchical/hierarchical_meta.json"
+    )
+
+
+def test_concatenated_array_matches_rows_concatenation(shared_datadir):
+    metadata = _load_hierarchical(shared_datadir)
+    metas = [metadata["accelerometer_t1.bin"], metadata["accelerometer_t2.bin"]]
+    expected = np.concatenate([tsdf.load_ndarray_from_binary(m) for m in metas])
+
+    array = tsdf.ConcatenatedArray(metas)
+    assert array.shape == (46, 3)
+    assert array.dtype == np.int16
+    assert np.array_equal(array[:], expected)
+    assert np.array_equal(array[10:30], expected[10:30])
+    assert np.array_equal(array[17:20], expected[17:20])
+    assert np.array_equal(array[40:5:-3], expected[40:5:-3])
+    assert np.array_equal(array[-1], expected[-1])
+    assert np.array_equal(array[5:25, 1], expected[5:25, 1])
+    assert array[30:30].shape == (0, 3)
+    with pytest.raises(IndexError):
+        array[46]
+
+
+def test_concatenated_array_reads_touched_files_only(shared_datadir, monkeypatch):
+    metadata = _load_hierarchical(shared_datadir)
+    array = tsdf.ConcatenatedArray(
+        [metadata["time_t1.bin"], metadata["time_t2.bin"]]
+    )
+    assert array.shape == (46,)
+
+    loaded = []
+    original = tsdf.read_binary.load_ndarray_from_binary
+
+    def tracking_load(meta, start_row=0, end_row=-1):
+        loaded.append((meta.file_name, start_row, end_row))
+        return original(meta, start_row, end_row)
+
+    monkeypatch.setattr(tsdf.read_binary, "load_ndarray_from_binary", tracking_load)
+    array[20:25]
+    assert loaded == [("time_t2.bin", 3, 8)]
+
+
+def test_concatenated_array_incompatible(shared_datadir):
+    metadata = _load_hierarchical(shared_datadir)
+    with pytest.raises(TSDFMetadataFieldValueError):
+        tsdf.ConcatenatedArray([metadata["time_t1.bin"], metadata["accelerometer_t2.bin"]])
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+import tsdf
+from tsdf.windowing import count_windows
+from utils import load_meta_dict
+
+
+def _write_test_binary(shared_datadir, data):
+    meta_dict = load_meta_dict(
+        shared_datadir,
+        "example_10_3_float32",
+        channels=[f"c{i}" for i in range(data.shape[1])],
+        units=["unitless"] * data.shape[1],
+    )
+    return tsdf.write_binary_file(
+        shared_datadir, "tmp_test_windowing.bin", data, meta_dict
+    )
+
+
+def _expected_windows(data, window_length, step):
+    n_windows = count_windows(data.shape[0], window_length, step)
+    return np.stack(
+        [data[i * step : i * step + window_length] for i in range(n_windows)]
+    )
+
+
+@pytest.mark.parametrize("use_memmap", [False, True])
+@pytest.mark.parametrize("window_length,step", [(6, 3), (5, 5), (4, 7)])
+def test_iterate_windows(shared_datadir, use_memmap, window_length, step):
+    data = np.arange(103 * 2, dtype=np.float32).reshape(103, 2)
+    meta = _write_test_binary(shared_datadir, data)
+
+    batches = list(
+        tsdf.iterate_windows(
+            meta, window_length, step, batch_size=4, chunk_rows=20, use_memmap=use_memmap
+        )
+    )
+    assert all(batch.shape[1:] == (window_length, 2) for batch in batches)
+    assert all(batch.shape[0] <= 4 for batch in batches)
+    assert np.array_equal(
+        np.concatenate(batches), _expected_windows(data, window_length, step)
+    )
+
+
+def test_iterate_windows_single_channel(shared_datadir):
+    metadata = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    meta = metadata["ppp_format_time.bin"]
+    data = tsdf.load_ndarray_from_binary(meta).reshape((-1, 1))
+
+    batches = list(tsdf.iterate_windows(meta, 6, 3))
+    assert len(batches) == 1
+    assert batches[0].shape == (4, 6, 1)
+    assert np.array_equal(batches[0], _expected_windows(data, 6, 3))
+    assert list(tsdf.iterate_windows(meta, 18, 1)) == []
@@ -1,6 +1,9 @@
 import numpy as np
 import pandas as pd
-from tsdf import read_tsdf, write_binary, TSDFMetadata
+import pytest
+from tsdf import read_binary, read_tsdf, time_utils, write_binary, write_tsdf, TSDFMetadata
+from tsdf.tsdfmetadata import TSDFMetadataFieldValueError
+from utils import load_meta_dict
 
 def test_write_binary(shared_datadir):
     """Test writing of binary files from loaded data (e.g., NumPy array)."""
@@ -72,3 +75,230 @@ def test_write_dataframe(shared_datadir):
         assert(np.array_equal(data_original, data_written))
 
     #TODO: don't provide all data props (type, etc), also channels, in metadata, but infer from data and test that it is correct
+
+
+def test_write_compact_dtypes(shared_datadir):
+    """Test writing and reading unsigned integers, half-precision floats and booleans."""
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    rs = np.random.RandomState(seed=42)
+    for data, data_type, bits in [
+        (rs.randint(0, 4096, (10, 3)).astype(np.uint16), "uint", 16),
+        (rs.rand(10, 3).astype(np.float16), "float", 16),
+        (rs.rand(10, 3) > 0.5, "bool", 8),
+        (rs.randint(0, 256, (10, 3)).astype(np.uint8), "uint", 8),
+    ]:
+        meta = write_binary.write_binary_file(
+            shared_datadir, "tmp_test_compact.bin", data, meta_dict.copy()
+        )
+        assert meta.data_type == data_type
+        assert meta.bits == bits
+        loaded = read_binary.load_ndarray_from_binary(meta)
+        assert loaded.dtype == data.dtype
+        assert np.array_equal(loaded, data)
+
+
+def test_write_mixed_dtypes(shared_datadir):
+    """Test writing and reading records that mix data types per channel."""
+    meta_dict = load_meta_dict(
+        shared_datadir, "example_10_3_int16", channels=["time", "x", "y"], units=["s", "g", "g"]
+    )
+    meta = TSDFMetadata(dict(meta_dict, file_name="tmp_test_mixed.bin"), shared_datadir)
+    df = pd.DataFrame(
+        {
+            "time": np.linspace(0, 1, 10),
+            "x": np.arange(10, dtype=np.int16),
+            "y": np.arange(10, 20, dtype=np.int16),
+        }
+    )
+    write_binary.write_dataframe_to_binaries(
+        shared_datadir, df, [meta], preserve_dtypes=True
+    )
+    assert meta.data_type == ["float", "int", "int"]
+    assert meta.bits == [64, 16, 16]
+    assert (shared_datadir / "tmp_test_mixed.bin").stat().st_size == 10 * 12
+
+    # Mixed data types survive writing and reading the metadata
+    write_tsdf.write_metadata([meta], "tmp_test_mixed_meta.json")
+    loaded_meta = read_tsdf.load_metadata_from_path(
+        shared_datadir / "tmp_test_mixed_meta.json"
+    )["tmp_test_mixed.bin"]
+    loaded = read_binary.load_ndarray_from_binary(loaded_meta)
+    assert loaded.dtype.names == ("time", "x", "y")
+    assert np.array_equal(loaded["x"], df["x"].to_numpy())
+
+    loaded_df = read_binary.load_dataframe_from_binaries([loaded_meta])[0]
+    assert loaded_df.dtypes.tolist() == [np.float64, np.int16, np.int16]
+    assert loaded_df.equals(df)
+
+    # The time channel of the records is selected by name
+    indexed = read_binary.load_dataframe_from_binaries([loaded_meta], time_index=True)[0]
+    assert list(indexed.columns) == ["x", "y"]
+    start = pd.Timestamp(loaded_meta.start_iso8601)
+    assert indexed.index[-1] == start + pd.Timedelta(seconds=1)
+    times = np.concatenate(list(time_utils.iterate_time_chunks(loaded_meta, chunk_rows=3)))
+    assert np.array_equal(times, df["time"].to_numpy())
+
+
+def test_write_chunks_to_binaries(shared_datadir):
+    """Test writing binary files incrementally from chunks of a data frame."""
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    meta_dict["sampling_rate"] = 10
+    time_meta = TSDFMetadata(
+        dict(meta_dict, file_name="tmp_chunks_time.bin", channels=["time"], units=["s"]),
+        shared_datadir,
+    )
+    values_meta = TSDFMetadata(
+        dict(meta_dict, file_name="tmp_chunks_values.bin"), shared_datadir
+    )
+    rs = np.random.RandomState(seed=42)
+    df = pd.DataFrame(
+        {
+            "time": np.arange(95) / 10,
+            "x": rs.randint(-100, 100, 95).astype(np.int16),
+            "y": rs.randint(-100, 100, 95).astype(np.int16),
+            "z": rs.randint(-100, 100, 95).astype(np.int16),
+        }
+    )
+    chunks = (df.iloc[start : start + 10] for start in range(0, 95, 10))
+
+    # The expected number of rows is overestimated, the preallocated space is released
+    write_binary.write_chunks_to_binaries(
+        shared_datadir, chunks, [time_meta, values_meta], total_rows=200
+    )
+    assert time_meta.rows == 95
+    assert values_meta.data_type == "int"
+    assert values_meta.bits == 16
+    assert values_meta.end_iso8601 == "2019-10-15T10:39:26.425000+00:00"
+    assert (shared_datadir / "tmp_chunks_values.bin").stat().st_size == 95 * 3 * 2
+    assert np.array_equal(
+        read_binary.load_ndarray_from_binary(values_meta), df[["x", "y", "z"]].to_numpy()
+    )
+    assert np.array_equal(read_binary.load_ndarray_from_binary(time_meta), df["time"])
+
+
+def test_write_chunks_from_arrays(shared_datadir):
+    """Test writing binary files incrementally from NumPy arrays."""
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    meta = TSDFMetadata(dict(meta_dict, file_name="tmp_chunks.bin"), shared_datadir)
+    data = np.arange(60, dtype=np.float32).reshape(20, 3)
+
+    write_binary.write_chunks_to_binaries(
+        shared_datadir, (data[i : i + 6] for i in range(0, 20, 6)), [meta]
+    )
+    assert meta.rows == 20
+    assert meta.data_type == "float"
+    assert meta.end_iso8601 == meta_dict["end_iso8601"]
+    assert np.array_equal(read_binary.load_ndarray_from_binary(meta), data)
+
+
+def test_write_chunks_with_other_dtypes(shared_datadir):
+    """Test that later chunks are only converted to the data type of the first chunk if their values fit."""
+    meta_dict = load_meta_dict(shared_datadir, "example_10_3_int16")
+    meta = TSDFMetadata(dict(meta_dict, file_name="tmp_chunks.bin", channels=["x"], units=["g"]), shared_datadir)
+
+    chunks = [np.arange(5, dtype=np.int16), np.array([7, -3], dtype=np.int64), np.array([9], dtype=np.int8)]
+    write_binary.write_chunks_to_binaries(shared_datadir, iter(chunks), [meta])
+    assert (meta.data_type, meta.bits) == ("int", 16)
+    assert np.array_equal(read_binary.load_ndarray_from_binary(meta), np.concatenate(chunks))
+
+    for chunk in [np.array([1.7, 70000.5]), np.array([70000], dtype=np.int64)]:
+        with pytest.raises(TSDFMetadataFieldValueError):
+            write_binary.write_chunks_to_binaries(
+                shared_datadir, iter([np.arange(5, dtype=np.int16), chunk]), [meta]
+            )
+
+
+def test_write_binary_is_atomic(shared_datadir):
+    """Test that a failed rewrite leaves the existing binary file untouched."""
+    test_file_name = "tmp_test_atomic.bin"
+    with open(shared_datadir / "flat_meta.json", "r") as file:
+        metadatas = read_tsdf.load_metadata_file(file)
+    meta_dict = metadatas["audio_voice_089.raw"].get_plain_tsdf_dict_copy()
+
+    data_original = np.arange(1000, dtype=np.int32).reshape((500, 2))
+    write_binary.write_binary_file(
+        shared_datadir, test_file_name, data_original, dict(meta_dict), buffer_size=64
+    )
+
+    def failing_chunks():
+        yield np.zeros((10, 2), dtype=np.int32)
+        raise RuntimeError("Interrupted")
+
+    new_meta = TSDFMetadata(
+        dict(meta_dict, file_name=test_file_name, channels=["a", "b"], units=["-", "-"]),
+        shared_datadir,
+    )
+    try:
+        write_binary.write_chunks_to_binaries(shared_datadir, failing_chunks(), [new_meta])
+    except RuntimeError:
+        pass
+
+    data_written = np.fromfile(shared_datadir / test_file_name, dtype=np.int32)
+    assert np.array_equal(data_written.reshape((500, 2)), data_original)
+    assert not any(path.name.endswith(".tmp") for path in shared_datadir.iterdir())
+
+
+def test_write_without_durability(shared_datadir, monkeypatch):
+    """Test that non-durable writes do not flush the binary and metadata files to disk."""
+    with open(shared_datadir / "flat_meta.json", "r") as file:
+        metadatas = read_tsdf.load_metadata_file(file)
+    meta_dict = metadatas["audio_voice_089.raw"].get_plain_tsdf_dict_copy()
+    data = np.arange(1000, dtype=np.int32).reshape((500, 2))
+
+    synced = []
+    monkeypatch.setattr("os.fsync", synced.append)
+    meta = write_binary.write_binary_file(
+        shared_datadir, "tmp_test_durable.bin", data, dict(meta_dict), durable=False
+    )
+    write_binary.write_chunks_to_binaries(shared_datadir, [data], [meta], durable=False)
+    write_tsdf.write_metadata([meta], "tmp_test_durable_meta.json", durable=False)
+    assert synced == []
+
+    write_binary.write_binary_file(shared_datadir, "tmp_test_durable.bin", data, dict(meta_dict))
+    assert len(synced) > 0
+    assert np.array_equal(read_binary.load_ndarray_from_binary(meta), data)
+
+
+def test_write_and_normalise_byte_order(shared_datadir):
+    """Test writing big-endian files and normalising them to native byte order in one streaming pass."""
+    with open(shared_datadir / "flat_meta.json", "r") as file:
+        metadatas = read_tsdf.load_metadata_file(file)
+    meta_dict = metadatas["audio_voice_089.raw"].get_plain_tsdf_dict_copy()
+    meta_dict.update(channels=["x", "y", "z"], units=["m", "m", "m"])
+
+    data = np.arange(60, dtype=np.float64).reshape((20, 3))
+    big_meta = write_binary.write_binary_file(
+        shared_datadir, "tmp_big.bin", data, dict(meta_dict), endianness="big"
+    )
+    assert big_meta.endianness == "big"
+    assert read_binary.load_ndarray_from_binary(big_meta).dtype.byteorder == ">"
+
+    native = read_binary.load_ndarray_from_binary(big_meta, native_byte_order=True)
+    assert native.dtype.isnative
+    assert native.flags.writeable
+    assert np.array_equal(native, data)
+
+    records = np.zeros(5, dtype=[("a", "<i2"), ("b", "<f4")])
+    records["a"] = np.arange(5)
+    big_records = write_binary.write_binary_file(
+        shared_datadir,
+        "tmp_big_records.bin",
+        records,
+        dict(meta_dict, channels=["a", "b"], units=["-", "-"]),
+        endianness="big",
+    )
+    loaded = read_binary.load_ndarray_from_binary(big_records, native_byte_order=True)
+    assert np.array_equal(loaded["a"], records["a"])
+
+    little_meta = TSDFMetadata(
+        dict(big_meta.get_plain_tsdf_dict_copy(), file_name="tmp_little.bin"),
+        shared_datadir,
+    )
+    write_binary.write_chunks_to_binaries(
+        shared_datadir,
+        read_binary.load_ndarray_chunks(big_meta, chunk_rows=7, native_byte_order=True),
+        [little_meta],
+        endianness="little",
+    )
+    assert little_meta.endianness == "little"
+    assert np.array_equal(read_binary.load_ndarray_from_binary(little_meta), data)
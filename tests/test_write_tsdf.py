@@ -1,3 +1,4 @@
+import json
 import os
 import numpy as np
 import pytest
@@ -131,3 +132,90 @@ def test_write_metadata_validate_fail(shared_datadir):
     metadata = TSDFMetadata(basic_metadata, shared_datadir, do_validate=False) # Should validate on write below
     with pytest.raises(TSDFMetadataFieldValueError):
         tsdf.write_metadata([metadata], "tmp_meta.json")
+
+
+def test_incremental_metadata_updates(shared_datadir):
+    """Test adding, replacing and removing streams in an existing metadata file."""
+    test_path = shared_datadir / "tmp_test_incremental_meta.json"
+    metas = tsdf.load_metadata_from_path(shared_datadir / "hierarchical_meta.json")
+    plain = {name: meta.get_plain_tsdf_dict_copy() for name, meta in metas.items()}
+    names = sorted(metas)
+
+    tsdf.write_metadata([metas[name] for name in names[:3]], test_path.name)
+    tsdf.add_stream_to_metadata(test_path, metas[names[3]])
+    loaded = tsdf.load_metadata_from_path(test_path)
+    assert {name: meta.get_plain_tsdf_dict_copy() for name, meta in loaded.items()} == plain
+
+    replaced = TSDFMetadata(dict(plain[names[0]], rows=42), shared_datadir)
+    tsdf.replace_stream_in_metadata(test_path, replaced)
+    tsdf.remove_stream_from_metadata(test_path, names[1])
+    loaded = tsdf.load_metadata_from_path(test_path)
+    assert sorted(loaded) == [names[0]] + names[2:]
+    assert loaded[names[0]].rows == 42
+    assert loaded[names[2]].get_plain_tsdf_dict_copy() == plain[names[2]]
+
+    with pytest.raises(TSDFMetadataFieldValueError):
+        tsdf.add_stream_to_metadata(test_path, metas[names[2]])
+    with pytest.raises(TSDFMetadataFieldValueError):
+        tsdf.remove_stream_from_metadata(test_path, names[1])
+
+
+def test_incremental_update_single_stream(shared_datadir):
+    """Test adding a stream to a metadata file describing a single stream."""
+    test_path = shared_datadir / "tmp_test_incremental_single_meta.json"
+    metas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    time_meta, samples_meta = metas["ppp_format_time.bin"], metas["ppp_format_samples.bin"]
+
+    tsdf.write_metadata([time_meta], test_path.name)
+    tsdf.add_stream_to_metadata(test_path, samples_meta)
+    loaded = tsdf.load_metadata_from_path(test_path)
+    for name, meta in metas.items():
+        assert loaded[name].get_plain_tsdf_dict_copy() == meta.get_plain_tsdf_dict_copy()
+
+    tsdf.remove_stream_from_metadata(test_path, "ppp_format_samples.bin")
+    with pytest.raises(TSDFMetadataFieldValueError):
+        tsdf.remove_stream_from_metadata(test_path, "ppp_format_time.bin")
+
+
+
+def test_replace_single_stream(shared_datadir):
+    """Test replacing the stream of a metadata file describing a single stream."""
+    test_path = shared_datadir / "tmp_test_replace_single_meta.json"
+    metas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    time_meta, samples_meta = metas["ppp_format_time.bin"], metas["ppp_format_samples.bin"]
+    new_meta = TSDFMetadata(
+        dict(time_meta.get_plain_tsdf_dict_copy(), rows=time_meta.rows - 1), time_meta.file_dir_path
+    )
+
+    tsdf.write_metadata([time_meta], test_path.name)
+    tsdf.replace_stream_in_metadata(test_path, new_meta)
+    loaded = tsdf.load_metadata_from_path(test_path)
+    assert list(loaded) == ["ppp_format_time.bin"]
+    assert loaded["ppp_format_time.bin"].get_plain_tsdf_dict_copy() == new_meta.get_plain_tsdf_dict_copy()
+
+    # A single stream nested in a group, e.g., after the other streams were removed
+    tsdf.write_metadata([time_meta, samples_meta], test_path.name)
+    tsdf.remove_stream_from_metadata(test_path, "ppp_format_samples.bin")
+    tsdf.replace_stream_in_metadata(test_path, new_meta)
+    loaded = tsdf.load_metadata_from_path(test_path)
+    assert list(loaded) == ["ppp_format_time.bin"]
+    assert loaded["ppp_format_time.bin"].get_plain_tsdf_dict_copy() == new_meta.get_plain_tsdf_dict_copy()
+
+    with pytest.raises(TSDFMetadataFieldValueError):
+        tsdf.replace_stream_in_metadata(test_path, samples_meta)
+
+def test_incremental_update_nested_dict(shared_datadir):
+    """Test adding a stream next to a group that is stored as a single object instead of a list."""
+    test_path = shared_datadir / "tmp_test_incremental_dict_meta.json"
+    metas = tsdf.load_metadata_from_path(shared_datadir / "ppp_format_meta.json")
+    time_plain = metas["ppp_format_time.bin"].get_plain_tsdf_dict_copy()
+    samples_plain = metas["ppp_format_samples.bin"].get_plain_tsdf_dict_copy()
+    common = {key: value for key, value in time_plain.items() if samples_plain.get(key) == value}
+    tree = dict(common, sensors={key: value for key, value in time_plain.items() if key not in common})
+    with open(test_path, "w") as file:
+        json.dump(tree, file)
+
+    tsdf.add_stream_to_metadata(test_path, metas["ppp_format_samples.bin"])
+    loaded = tsdf.load_metadata_from_path(test_path)
+    for name, meta in metas.items():
+        assert loaded[name].get_plain_tsdf_dict_copy() == meta.get_plain_tsdf_dict_copy()
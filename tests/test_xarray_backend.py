@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+import tsdf
+
+xr = pytest.importorskip("xarray")
+
+
+def test_open_dataset_single_stream(shared_datadir):
+    ds = xr.open_dataset(
+        shared_datadir / "example_10_3_int16_meta.json", engine="tsdf"
+    )
+    data = tsdf.load_ndarray_from_binary(
+        tsdf.load_metadata_from_path(shared_datadir / "example_10_3_int16_meta.json")[
+            "example_10_3_int16.bin"
+        ]
+    )
+    var = ds["example_10_3_int16"]
+    assert var.dims == ("time", "channel")
+    assert var.shape == (10, 3)
+    assert list(ds["units"].values) == ["m/s/s", "m/s/s", "m/s/s"]
+    assert np.array_equal(var.values, data)
+    assert np.array_equal(var[2:8:2, 1].values, data[2:8:2, 1])
+    assert np.array_equal(var.isel(time=-1).values, data[-1])
+
+
+def test_open_dataset_reads_lazily(shared_datadir, monkeypatch):
+    loaded = []
+    original = tsdf.read_binary.load_ndarray_from_binary
+
+    def tracking_load(meta, start_row=0, end_row=-1):
+        loaded.append((meta.file_name, start_row, end_row))
+        return original(meta, start_row, end_row)
+
+    monkeypatch.setattr(tsdf.read_binary, "load_ndarray_from_binary", tracking_load)
+    ds = xr.open_dataset(
+        shared_datadir / "hierarchical/hierarchical_meta.json", engine="tsdf"
+    )
+    assert set(ds.data_vars) == {
+        "time_t1",
+        "time_t2",
+        "accelerometer_t1",
+        "accelerometer_t2",
+    }
+    assert ds["accelerometer_t2"].dims == ("accelerometer_t2_time", "accelerometer_t2_channel")
+    assert ds["accelerometer_t2"].attrs["rows"] == 29
+
+    loaded.clear()
+    ds["accelerometer_t2"][5:9].values
+    assert loaded == [("accelerometer_t2.bin", 5, 9)]
+
+
+def test_open_dataset_single_selected_stream(shared_datadir):
+    ds = xr.open_dataset(
+        shared_datadir / "ppp_format_meta.json",
+        engine="tsdf",
+        stream="ppp_format_samples.bin",
+    )
+    assert list(ds.data_vars) == ["ppp_format_samples"]
+    assert ds["ppp_format_samples"].sizes == {"time": 17, "channel": 6}
+    assert ds["channel"].values[0] == "acceleration_x"
@@ -1,5 +1,6 @@
 import numpy as np
 from pathlib import Path
+from typing import Any, Dict
 import tsdf
 
 
@@ -15,3 +16,19 @@ def load_single_bin_file(data_dir: Path, name: str) -> np.ndarray:
     metadata = tsdf.load_metadata_from_path(data_dir / (name + "_meta.json"))
     data = tsdf.load_ndarray_from_binary(metadata[name + ".bin"])
     return data
+
+
+def load_meta_dict(data_dir: Path, name: str, **fields: Any) -> Dict[str, Any]:
+    """
+    Load the metadata of a single binary file as a plain dictionary, e.g., to write new test binary files.
+
+    :param data_dir: The directory path where the metadata file is located.
+    :param name: The name of the binary file without the extension.
+    :param fields: Fields overriding the loaded metadata (e.g., channels and units).
+
+    :returns: The metadata dictionary.
+    """
+    metadata = tsdf.load_metadata_from_path(data_dir / (name + "_meta.json"))
+    meta_dict = metadata[name + ".bin"].get_plain_tsdf_dict_copy()
+    meta_dict.update(fields)
+    return meta_dict